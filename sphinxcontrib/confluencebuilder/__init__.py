@@ -225,6 +225,10 @@ def setup(app):
     cm.add_conf('confluence_proxy')
     # Subset of documents which are allowed to be published.
     cm.add_conf('confluence_publish_allowlist')
+    # Number of workers to use when publishing assets.
+    cm.add_conf_int('confluence_publish_asset_workers')
+    # Duration (in seconds) to cache responses from API requests.
+    cm.add_conf_int('confluence_publish_cache_ttl')
     # Configure debugging for publish requests.
     cm.add_conf('confluence_publish_debug')
     # Duration (in seconds) to delay each API request.
@@ -237,22 +241,32 @@ def setup(app):
     cm.add_conf('confluence_publish_headers')
     # Whether to publish a generated intersphinx database to the root document
     cm.add_conf_bool('confluence_publish_intersphinx')
+    # Whether to track published pages in a local ledger.
+    cm.add_conf_bool('confluence_publish_ledger')
+    # Sample rate of ledger-tracked pages to verify against remote pages.
+    cm.add_conf('confluence_publish_ledger_verify')
     # Publish only new content (no page updates, etc.).
     cm.add_conf_bool('confluence_publish_onlynew')
     # Publish orphan pages to Confluence.
     cm.add_conf_bool('confluence_publish_orphan')
     # Container page to publish orphan pages under.
     cm.add_conf_int('confluence_publish_orphan_container')
+    # Whether to index remote pages before publishing.
+    cm.add_conf_bool('confluence_publish_page_index')
     # Override the path prefixes for various REST API requests.
     cm.add_conf('confluence_publish_override_api_prefix')
     # Modifier for postfix hash of published pages.
     cm.add_conf('confluence_publish_postfix_hash_modifier', 'confluence')
+    # Whether to resume an interrupted publish from a publish journal.
+    cm.add_conf_bool('confluence_publish_resume')
     # Number of attempts permitted when trying to retry a failed API request
     cm.add_conf('confluence_publish_retry_attempts')
     # Duration (in seconds) between retrying failed API requests
     cm.add_conf('confluence_publish_retry_duration')
     # Publish only new/updates content within the root document's hierarchy.
     cm.add_conf_bool('confluence_publish_trample')
+    # Number of workers to use when publishing pages.
+    cm.add_conf_int('confluence_publish_workers')
     # Whether to skip page updates for pages that have inlined comments
     cm.add_conf('confluence_publish_skip_commented_pages')
     # Manipulate a requests instance.
@@ -267,6 +281,8 @@ def setup(app):
     cm.add_conf('confluence_version_comment')
 
     # (configuration - advanced processing)
+    # The storage backend to use for build cache information.
+    cm.add_conf('confluence_cache_backend')
     # Filename suffix for generated files.
     cm.add_conf('confluence_file_suffix', 'confluence')
     # Macro configuration for Confluence-managed HTML content.
@@ -81,6 +81,10 @@ sphinx-build-confluence [action] <options>
 (builder arguments)
  -o, --output-dir      alter the output directory for generated documentation
                         (defaults to `_build/confluence`)
+ --resume              resume an interrupted publish using the publish
+                        journal in the output directory
+ --verify-ledger       verify all pages tracked in a publish ledger against
+                        the configured Confluence instance
 
 (connection-test arguments)
  --no-sanitize         Do not sanitize configuration content
@@ -93,7 +97,10 @@ sphinx-build-confluence [action] <options>
 
 (wipe arguments)
  --danger              flag that must be set to use this action
+ -o, --output-dir      alter the output directory for a generated wipe plan
+                        (defaults to `_build/confluence`)
  -P, --parent          only remove pages from the configured parent page
+ --resume PLAN         resume an interrupted wipe using a generated wipe plan
 
 (other options)
  --color[=WHEN]        when to colorize output: never, always or auto
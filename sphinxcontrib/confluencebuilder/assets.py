@@ -59,8 +59,10 @@ class ConfluenceAssetManager:
     Args:
         env: the build environment
         out_dir: configured output directory (where assets may be stored)
+        cache_info (optional): cache to track asset hashes across runs
     """
-    def __init__(self, env, out_dir):
+    def __init__(self, env, out_dir, cache_info=None):
+        self.cache_info = cache_info
         self.dockeys = {}
         self.env = env
         self.hash2asset = {}
@@ -234,8 +236,16 @@ class ConfluenceAssetManager:
 
             # for any "delayed" assets, check if they are registered on the
             # main builder's thread; if not, append them to the list
+            tracked_paths = set()
             for asset_entry in self._delayed_assets:
                 docname, key, path, hash_, type_ = asset_entry
+
+                # delayed assets may have been registered in another process
+                # (i.e. a parallel write), so track cache entries from here
+                if self.cache_info and path not in tracked_paths:
+                    self.cache_info.track_asset_entry(path, hash_, type_)
+                    tracked_paths.add(path)
+
                 key_db = self.dockeys.setdefault(docname, set())
                 if key in key_db:
                     continue
@@ -326,19 +336,31 @@ class ConfluenceAssetManager:
         # if no asset, check if the hash of the contents already has an
         # asset reference
         if not asset:
-            hash_ = ConfluenceUtil.hash_asset(path)
+            # re-use the hash/type of an asset unchanged since the last run
+            entry = self.cache_info.asset_entry(path) if self.cache_info else None
+            if entry:
+                hash_ = entry['hash']
+                type_ = entry['type']
+            else:
+                hash_ = ConfluenceUtil.hash_asset(path)
+                type_ = None
+
             asset = self.hash2asset.get(hash_, None)
 
             if asset:
                 logger.verbose(f'attachment alias ({hash_:.8s}): {asset.path}')
             # if still no asset, build a new asset entry for this path
             else:
-                type_ = guess_mimetype(path, default=DEFAULT_CONTENT_TYPE)
+                if not type_:
+                    type_ = guess_mimetype(path, default=DEFAULT_CONTENT_TYPE)
                 asset = ConfluenceAsset(path, type_, hash_)
                 self.hash2asset[hash_] = asset
                 self._assets.append(asset)
                 logger.verbose(f'new attachment ({hash_:.8s}): {path}')
 
+            if self.cache_info and not entry:
+                self.cache_info.track_asset_entry(path, hash_, type_)
+
             self.path2asset[path] = asset
 
         # acquire the attachment key; if none, build one now
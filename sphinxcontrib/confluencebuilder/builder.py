@@ -4,6 +4,8 @@
 
 from collections import defaultdict
 from collections.abc import Set as AbstractSet
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from docutils import nodes
 from docutils.io import StringOutput
 from pathlib import Path
@@ -11,25 +13,35 @@ from sphinx import addnodes
 from sphinx import version_info as sphinx_version_info
 from sphinx.builders import Builder
 from sphinx.locale import _ as SL
+from sphinx.util import docname_join
 from sphinx.util.display import status_iterator
 from sphinxcontrib.confluencebuilder.assets import ConfluenceAssetManager
 from sphinxcontrib.confluencebuilder.compat import docutils_findall as findall
+from sphinxcontrib.confluencebuilder.concurrency import dependency_pool
 from sphinxcontrib.confluencebuilder.confcloud78192 import find_risked_delayed_anchor_pages
 from sphinxcontrib.confluencebuilder.config import process_ask_configs
 from sphinxcontrib.confluencebuilder.config.checks import validate_configuration
 from sphinxcontrib.confluencebuilder.config.defaults import apply_defaults
 from sphinxcontrib.confluencebuilder.config.env import apply_env_overrides
 from sphinxcontrib.confluencebuilder.config.env import build_hash
+from sphinxcontrib.confluencebuilder.debug import PublishDebug
+from sphinxcontrib.confluencebuilder.env import ENV_CACHE_JOURNAL
 from sphinxcontrib.confluencebuilder.env import ConfluenceCacheInfo
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceCleanupError
 from sphinxcontrib.confluencebuilder.intersphinx import build_intersphinx
+from sphinxcontrib.confluencebuilder.journal import ConfluencePublishJournal
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger
 from sphinxcontrib.confluencebuilder.manifest import ConfluenceManifest
+from sphinxcontrib.confluencebuilder.metrics import ConfluenceMetrics
+from sphinxcontrib.confluencebuilder.metrics import track_phase
 from sphinxcontrib.confluencebuilder.nodes import confluence_footer
 from sphinxcontrib.confluencebuilder.nodes import confluence_header
 from sphinxcontrib.confluencebuilder.nodes import confluence_metadata
 from sphinxcontrib.confluencebuilder.nodes import confluence_page_generation_notice
 from sphinxcontrib.confluencebuilder.nodes import confluence_source_link
 from sphinxcontrib.confluencebuilder.nodes import confluence_parameters_fetch as PARAMS
+from sphinxcontrib.confluencebuilder.publisher import LONGTASK_TIMEOUT
 from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
 from sphinxcontrib.confluencebuilder.state import ConfluenceState
 from sphinxcontrib.confluencebuilder.std.confluence import API_CLOUD_ENDPOINT
@@ -46,9 +58,29 @@ from sphinxcontrib.confluencebuilder.util import extract_strings_from_file
 from sphinxcontrib.confluencebuilder.util import first
 from sphinxcontrib.confluencebuilder.util import handle_cli_file_subset
 from sphinxcontrib.confluencebuilder.writer import ConfluenceWriter
+import json
 import os
+import random
 import tempfile
-import time
+import threading
+
+
+# maximum number of pages to list when archive requests have not completed
+ARCHIVE_REPORT_LIMIT = 10
+
+# maximum number of endpoints/documents to list in a request summary
+REPORT_REQUESTS_LIMIT = 10
+
+# options which only control how a publish is performed (and not what is
+# published), which are not considered when resuming an interrupted publish
+PUBLISH_CONTROL_OPTIONS = [
+    'confluence_publish_asset_workers',
+    'confluence_publish_cache_ttl',
+    'confluence_publish_debug',
+    'confluence_publish_ledger_verify',
+    'confluence_publish_resume',
+    'confluence_publish_workers',
+]
 
 
 class ConfluenceBuilder(Builder):
@@ -94,10 +126,16 @@ class ConfluenceBuilder(Builder):
         self._cached_footer_data = None
         self._cached_header_data = None
         self._config_confluence_hash = None
+        self._journal = ConfluencePublishJournal(self.out_dir / ENV_CACHE_JOURNAL)
+        self._legacy_discovery = None
         self._original_get_doctree = None
+        self._publish_lock = threading.Lock()
+        self._published_attachment_ids = set()
+        self._published_page_ids = None
         self._verbose = app.verbosity
 
         self.manifest = ConfluenceManifest(self.config, self.state)
+        self.metrics = ConfluenceMetrics()
 
         # state tracking is set at initialization (not cleanup) so its content's
         # can be checked/validated on after the builder has executed (testing)
@@ -113,6 +151,7 @@ class ConfluenceBuilder(Builder):
                     self.allow_parallel = False
                     break
 
+    @track_phase('init')
     def init(self):
         apply_env_overrides(self.__app)
         validate_configuration(self)
@@ -163,9 +202,13 @@ class ConfluenceBuilder(Builder):
             self.warn(f'normalizing confluence url from {old_url} to {new_url}')
             self.config.confluence_server_url = new_url
 
-        self.assets = ConfluenceAssetManager(self.env, self.out_dir)
+        self.assets = ConfluenceAssetManager(
+            self.env, self.out_dir, self._cache_info)
         self.writer = ConfluenceWriter(self)
         self.config.sphinx_verbosity = self._verbose
+        self.metrics.trace.enabled = \
+            PublishDebug.trace in config.confluence_publish_debug
+        self.publisher.request_metrics = self.metrics.requests
         self.publisher.init(self.config)
 
         # With the configuration finalizes, generate a Confluence-specific
@@ -238,6 +281,11 @@ class ConfluenceBuilder(Builder):
         Return an iterable of input files that are outdated.
         """
 
+        # hash all documents ahead of time, to allow any documents which
+        # need to be (re-)hashed to be processed concurrently
+        self._cache_info.track_page_hashes(self.env.found_docs,
+            self.config.confluence_publish_workers)
+
         for docname in self.env.found_docs:
             if self._cache_info.is_outdated(docname):
                 yield docname
@@ -246,10 +294,12 @@ class ConfluenceBuilder(Builder):
     def get_target_uri(self, docname, typ=None):
         return self.link_transform(docname)
 
+    @track_phase('prepare_writing')
     def prepare_writing(self, docnames):
         if self._verbose:
             print()
 
+        dependencies = {}
         ordered_docnames = []
         traversed = [self.config.root_doc]
 
@@ -342,6 +392,10 @@ class ConfluenceBuilder(Builder):
             # register targets for references
             self._register_doctree_targets(docname, doctree)
 
+            # track other documents this document's output depends on
+            dependencies[docname] = self._find_doctree_dependencies(
+                docname, doctree)
+
         # register titles for special documents (if needed); if a title is not
         # already set from a placeholder document, configure a default title
         if self.use_index and not self.state.title('genindex'):
@@ -381,10 +435,18 @@ class ConfluenceBuilder(Builder):
         if navdocs_transform:
             nav_docnames = navdocs_transform(self, nav_docnames)
 
+        use_nav = bool(self.config.confluence_prev_next_buttons_location)
+
         prevdoc = nav_docnames[0] if nav_docnames else None
         for docname in nav_docnames[1:]:
             self.nav_prev[docname] = self.get_relative_uri(docname, prevdoc)
             self.nav_next[prevdoc] = self.get_relative_uri(prevdoc, docname)
+
+            # navigational links depend on their neighbours (if used)
+            if use_nav:
+                dependencies.setdefault(docname, set()).add(prevdoc)
+                dependencies.setdefault(prevdoc, set()).add(docname)
+
             prevdoc = docname
 
         # register labels for special documents (if needed)
@@ -403,6 +465,19 @@ class ConfluenceBuilder(Builder):
                 anonlabels[indexname] = indexname, ''
                 labels[indexname] = indexname, '', ''
 
+        # Track the dependencies of each document, to help rebuild documents
+        # which have not changed but whose output depends on another document
+        # which has (e.g. a reference to a document with a new title). Any of
+        # these documents are added to the set of documents to write.
+        outdated_docnames = self._track_dependencies(
+            ordered_docnames, dependencies, docnames)
+        if outdated_docnames:
+            self.verbose('documents with changed dependencies: ' +
+                ', '.join(sorted(outdated_docnames)))
+            docnames.update(outdated_docnames)
+            self.publish_docnames = [x for x in ordered_docnames
+                if x in docnames and self.state.title(x)]
+
         # Scan for assets that may exist in the documents to be published. This
         # will find most if not all assets in the documentation set. The
         # exception is assets which may be finalized during a document's post
@@ -418,7 +493,8 @@ class ConfluenceBuilder(Builder):
                     length=len(ordered_docnames),
                     verbosity=self._verbose):
                 doctree = self.env.get_doctree(docname)
-                self.assets.preprocess_doctree(doctree, docname)
+                with self.metrics.track('preprocess_doctree'):
+                    self.assets.preprocess_doctree(doctree, docname)
             self.note('pre-process assets: ', nonl=True)
 
     def _prepare_doctree_writing(self, docname, doctree):
@@ -427,7 +503,8 @@ class ConfluenceBuilder(Builder):
 
         # convert any desired nodes in a doctree to node types supported by the
         # translator implementation
-        doctree_transmute(self, doctree)
+        with self.metrics.track('doctree_transmute'):
+            doctree_transmute(self, doctree)
 
         # for every doctree, pick the best image candidate
         self.post_process_images(doctree)
@@ -448,14 +525,26 @@ class ConfluenceBuilder(Builder):
         # (note: this call only applies to sphinx v8.1+)
 
         # if parallel, prepare a multiprocessing list to help track assets
+        # (and any metrics/trace information tracked in worker processes)
         if self.parallel_ok:
-            with self.assets.multiprocessing_asset_tracking():
+            debug = self.config.confluence_publish_debug
+            with ExitStack() as stack:
+                stack.enter_context(self.assets.multiprocessing_asset_tracking())
+                if PublishDebug.metrics in debug or self.metrics.trace.enabled:
+                    stack.enter_context(self.metrics.multiprocessing_tracking())
+
                 super().write_documents(docnames)
+
+            # documents are written in worker processes, so save the progress
+            # of each written document from the main process
+            for docname in sorted(docnames):
+                self._cache_info.save_document(docname)
             return
 
         # non-parallel, perform a default write
         super().write_documents(docnames)
 
+    @track_phase('write_doc', docname_arg=0)
     def write_doc(self, docname, doctree):
         if docname in self.omitted_docnames:
             return
@@ -519,6 +608,11 @@ class ConfluenceBuilder(Builder):
 
         self._cache_info.track_page_hash(docname)
 
+        # (when writing in parallel, documents are saved after all writes)
+        if not self.parallel_ok:
+            self._cache_info.save_document(docname)
+
+    @track_phase('publish_doc', docname_arg=0)
     def publish_doc(self, docname, output, *, force: bool = False):
         conf = self.config
         title = self.state.title(docname)
@@ -546,17 +640,32 @@ class ConfluenceBuilder(Builder):
         metadata = self.metadata.get(docname, {})
         docguid = metadata.get('guid')
 
-        forced_page_id = self.events.emit_firstresult(
-            'confluence-publish-override-pageid',
-            docname,
-            {
-                'guid': docguid,
-                'title': title,
-            },
-        )
+        with self._publish_lock:
+            forced_page_id = self.events.emit_firstresult(
+                'confluence-publish-override-pageid',
+                docname,
+                {
+                    'guid': docguid,
+                    'title': title,
+                },
+            )
+
+        # if resuming a publish, check if this page has already been published
+        journal_hash = None
+        journal_entry = None
+        journal_step = 'page-forced' if force else 'page'
+        if self._journal.active:
+            journal_hash = self._publish_data_hash(title, data, parent_id)
+            journal_entry = self._journal.lookup(journal_step, docname)
+            if journal_entry and journal_entry['hash'] != journal_hash:
+                journal_entry = None
 
         is_new_page = False
-        if forced_page_id:
+        if journal_entry:
+            self.verbose(f'journal reports page already published: {title}')
+            uploaded_id = journal_entry['id']
+            is_new_page = journal_entry['new']
+        elif forced_page_id:
             uploaded_id = self.publisher.store_page_by_id(title,
                 forced_page_id, data)
         elif conf.confluence_publish_root and is_root_doc:
@@ -569,14 +678,41 @@ class ConfluenceBuilder(Builder):
                 if new_parent_id:
                     parent_id = new_parent_id
 
-            uploaded_id, is_new_page = \
-                self.publisher.store_page(title, data, parent_id, force=force)
+            # if a ledger is used, check if this page is known to be
+            # unchanged since it was last published
+            ledger_hash = None
+            if conf.confluence_publish_ledger:
+                ledger_hash = self._publish_data_hash(title, data, parent_id)
+                uploaded_id = self._ledger_check(docname, ledger_hash, force)
+            else:
+                uploaded_id = None
+
+            if uploaded_id:
+                self.verbose(f'ledger reports no changes in page: {title}')
+            else:
+                uploaded_id, is_new_page = self.publisher.store_page(
+                    title, data, parent_id, force=force)
+
+                if ledger_hash and uploaded_id:
+                    version = self.publisher.get_page_version(uploaded_id)
+                    if version:
+                        self._cache_info.track_ledger_entry(docname, {
+                            'hash': ledger_hash,
+                            'id': uploaded_id,
+                            'parent': parent_id,
+                            'version': version,
+                        })
+
+        if journal_hash and uploaded_id and not journal_entry:
+            self._journal.record(journal_step, docname,
+                hash=journal_hash, id=uploaded_id, new=is_new_page)
 
         # TMP: interim cast logic until we can cleanup all the ids to be int
         uploaded_id_int = int(uploaded_id) if uploaded_id else uploaded_id
         self.state.register_upload_id(docname, uploaded_id_int)
 
         self._cache_info.track_last_page_id(docname, uploaded_id)
+        self._cache_info.save_document(docname)
 
         if self.config.root_doc == docname:
             self.root_doc_page_id = uploaded_id
@@ -587,81 +723,34 @@ class ConfluenceBuilder(Builder):
                 root_ancestors = self.publisher.get_ancestors(int(uploaded_id))
                 self.publisher.restrict_ancestors(root_ancestors)
 
-        # if purging is enabled and we have yet to populate a list of legacy
-        # pages to cache, populate pages in our target scope now
-        if self.post_cleanup and self.legacy_pages is None:
-            # flag for newlining any note events needed for cleanup
-            extra_msg = False
+            # if cleaning up from the root document, legacy content can be
+            # discovered now that the root document's page is known
+            if conf.confluence_cleanup_from_root:
+                self._start_legacy_discovery()
 
-            if conf.confluence_publish_root:
-                baseid = conf.confluence_publish_root
-            elif conf.confluence_cleanup_from_root:
-                baseid = self.root_doc_page_id
-            else:
-                baseid = self.parent_id
-
-            # if no base identifier and dry running, ignore legacy page
-            # searching as there is no initial root document to reference
-            # against
-            if (conf.confluence_cleanup_from_root and
-                    conf.confluence_publish_dryrun and not baseid):
-                self.legacy_pages = []
-            else:
-                if not extra_msg and not self._verbose:
-                    self.note('')
+        # (publishing may be performed by multiple workers; ensure legacy
+        # tracking and event handlers are only processed one at a time)
+        with self._publish_lock:
+            # track published pages, which are reconciled against discovered
+            # legacy pages once discovery has completed
+            if self.post_cleanup:
+                if self._published_page_ids is None:
+                    self._published_page_ids = set()
 
-                self.note('querying for descendants... ',
-                    nonl=(not self._verbose))
-                self.legacy_pages = self.publisher.get_descendants(
-                    baseid, conf.confluence_cleanup_search_mode)
-                if not self._verbose:
-                    self.info('done')
+                if uploaded_id:
+                    self._published_page_ids.add(uploaded_id)
 
-                extra_msg = True
-
-            # remove any configured orphan root id from a cleanup check
-            orphan_root_id = str(conf.confluence_publish_orphan_container)
-            if conf.confluence_publish_orphan and orphan_root_id:
-                if orphan_root_id in self.legacy_pages:
-                    self.legacy_pages.remove(orphan_root_id)
-
-            # only populate a list of possible legacy assets when a user is
-            # configured to check or push assets to the target space
-            asset_override = conf.confluence_asset_override
-            if self.legacy_pages and (asset_override is None or asset_override):
-                if not extra_msg and not self._verbose:
-                    self.note('')
-
-                for legacy_page in status_iterator(
-                        sorted(self.legacy_pages),
-                        'querying for attachments... ',
-                        length=len(self.legacy_pages),
-                        verbosity=self._verbose):
-                    attachments = self.publisher.get_attachments(legacy_page)
-                    self.legacy_assets[legacy_page] = attachments
-
-                    # unknown cause but using a nested status_iterator appears
-                    # to not flush log events to users standard output without
-                    # sleeping -- not sure if its the logger, a threading/gil
-                    # situation with this implementation or more -- although
-                    # looks if we wait a moment, logging works as expected
-                    time.sleep(0.1)
-
-        if self.post_cleanup:
-            if uploaded_id in self.legacy_pages:
-                self.legacy_pages.remove(uploaded_id)
-
-        if uploaded_id:
-            self.events.emit(
-                'confluence-publish-page',
-                docname,
-                uploaded_id,
-                {
-                    'guid': docguid,
-                    'new': is_new_page,
-                    'title': title,
-                },
-            )
+            if uploaded_id:
+                self.events.emit(
+                    'confluence-publish-page',
+                    docname,
+                    uploaded_id,
+                    {
+                        'guid': docguid,
+                        'new': is_new_page,
+                        'title': title,
+                    },
+                )
 
         return is_new_page
 
@@ -702,6 +791,7 @@ class ConfluenceBuilder(Builder):
 
         return data
 
+    @track_phase('publish_asset', docname_arg=1)
     def publish_asset(self, key, docname, output, type_, hash_):
         conf = self.config
         publisher = self.publisher
@@ -723,9 +813,19 @@ class ConfluenceBuilder(Builder):
                     f'point cannot be found ({key}): {docname}')
                 return
 
+        # if resuming a publish, check if this asset has already been published
+        journal_key = f'{docname}:{key}'
+        journal_entry = self._journal.lookup('asset', journal_key)
+        if journal_entry and (journal_entry['hash'] != hash_ or
+                journal_entry['page'] != page_id):
+            journal_entry = None
+
         attachment_id = None
 
-        if conf.confluence_asset_override is None:
+        if journal_entry:
+            self.verbose(f'journal reports asset already published: {key}')
+            attachment_id = journal_entry['id']
+        elif conf.confluence_asset_override is None:
             # "automatic" management -- check if already published; if not, push
             attachment_id = publisher.store_attachment(
                 page_id, key, output, type_, hash_)
@@ -734,23 +834,27 @@ class ConfluenceBuilder(Builder):
             attachment_id = publisher.store_attachment(
                 page_id, key, output, type_, hash_, force=True)
 
-        if attachment_id and self.post_cleanup:
-            if page_id in self.legacy_assets:
-                legacy_asset_info = self.legacy_assets[page_id]
-                if attachment_id in legacy_asset_info:
-                    legacy_asset_info.pop(attachment_id, None)
-
-        if attachment_id:
-            self.events.emit(
-                'confluence-publish-attachment',
-                docname,
-                key,
-                attachment_id,
-                {
-                    'hash': hash_,
-                    'type': type_,
-                },
-            )
+        if attachment_id and not journal_entry:
+            self._journal.record('asset', journal_key,
+                hash=hash_, id=attachment_id, page=page_id)
+
+        # (publishing may be performed by multiple workers; ensure legacy
+        # tracking and event handlers are only processed one at a time)
+        with self._publish_lock:
+            if attachment_id and self.post_cleanup:
+                self._published_attachment_ids.add(attachment_id)
+
+            if attachment_id:
+                self.events.emit(
+                    'confluence-publish-attachment',
+                    docname,
+                    key,
+                    attachment_id,
+                    {
+                        'hash': hash_,
+                        'type': type_,
+                    },
+                )
 
     def publish_finalize(self):
         if self.root_doc_page_id:
@@ -784,6 +888,7 @@ class ConfluenceBuilder(Builder):
             self.info('Publish point: ' + point_url)
             self.events.emit('confluence-publish-point', point_url)
 
+    @track_phase('publish_cleanup')
     def publish_cleanup(self):
         # check if archive cleanup is enabled
         if self.config.confluence_cleanup_archive:
@@ -792,16 +897,13 @@ class ConfluenceBuilder(Builder):
                     'confluence_publish_allowlist/confluence_publish_denylist')
                 return
 
-            if self.legacy_pages:
-                if self.config.confluence_adv_bulk_archiving:
-                    print('archiving legacy pages...')
-                    self.publisher.archive_pages(self.legacy_pages)
-                else:
-                    for legacy_page_id in status_iterator(
-                            self.legacy_pages, 'archiving legacy pages... ',
-                            length=len(self.legacy_pages),
-                            verbosity=self._verbose):
-                        self.publisher.archive_page(legacy_page_id)
+            # ignore any pages already archived by an interrupted publish
+            legacy_pages = [legacy_page_id
+                for legacy_page_id in (self.legacy_pages or [])
+                if not self._journal.completed('archive-page', legacy_page_id)]
+
+            if legacy_pages:
+                self._archive_legacy_pages(legacy_pages)
 
         # check if purging is enabled
         if self.config.confluence_cleanup_purge:
@@ -810,32 +912,29 @@ class ConfluenceBuilder(Builder):
                     'confluence_publish_allowlist/confluence_publish_denylist')
                 return
 
-            if self.legacy_pages:
-                for legacy_page_id in status_iterator(
-                        self.legacy_pages, 'removing legacy pages... ',
-                        length=len(self.legacy_pages),
-                        verbosity=self._verbose):
-                    self.publisher.remove_page(legacy_page_id)
-                    # remove any pending assets to remove from the page (as they
-                    # are already been removed)
+            # ignore any pages already removed by an interrupted publish
+            legacy_pages = []
+            for legacy_page_id in self.legacy_pages or []:
+                if self._journal.completed('remove-page', legacy_page_id):
                     self.legacy_assets.pop(legacy_page_id, None)
+                else:
+                    legacy_pages.append(legacy_page_id)
+
+            # remove any pending assets to remove from pages which will be
+            # removed (as they will be removed along with the page)
+            for legacy_page_id in legacy_pages:
+                self.legacy_assets.pop(legacy_page_id, None)
 
             legacy_assets = {}
             for legacy_asset_info in self.legacy_assets.values():
                 legacy_assets.update(legacy_asset_info)
 
-            if legacy_assets:
-                def to_asset_name(attachment_id):
-                    return legacy_assets[attachment_id]
-
-                for attachment_id in status_iterator(
-                        legacy_assets.keys(),
-                        'removing legacy assets... ',
-                        length=len(legacy_assets.keys()),
-                        verbosity=self._verbose,
-                        stringify_func=to_asset_name):
+            for attachment_id in list(legacy_assets.keys()):
+                if self._journal.completed('remove-attachment', attachment_id):
+                    legacy_assets.pop(attachment_id)
 
-                    self.publisher.remove_attachment(attachment_id)
+            if legacy_pages or legacy_assets:
+                self._purge_legacy_content(legacy_pages, legacy_assets)
 
     def finish(self):
         # try to find documents that may have a risk of CONFCLOUD-78192
@@ -888,52 +987,46 @@ class ConfluenceBuilder(Builder):
         if self.publish:
             self.parent_id = self.publisher.get_base_page_id()
 
-            for docname in status_iterator(
-                    self.publish_docnames, 'publishing documents... ',
-                    length=len(self.publish_docnames),
-                    verbosity=self._verbose):
-                if self._check_publish_skip(docname):
-                    self.verbose(docname + ' skipped due to configuration')
-                    continue
-                docfile = self.out_dir / self.file_transform(docname)
-
-                try:
-                    with docfile.open(encoding='utf-8') as file:
-                        output = file.read()
-                        is_new_page = self.publish_doc(docname, output)
+            # journal each publish step, allowing an interrupted publish to
+            # be resumed by a later run
+            if not self.config.confluence_publish_dryrun:
+                resumed = self._journal.start(self._publish_build_hash(),
+                    resume=self.config.confluence_publish_resume)
+                if resumed:
+                    self.info(f'resuming publish ({resumed} completed steps)')
+
+            # discover legacy content (if cleaning up) in the background while
+            # documents are published, when the base page is already known
+            if self.publish_docnames and (self.config.confluence_publish_root
+                    or not self.config.confluence_cleanup_from_root):
+                self._start_legacy_discovery()
+
+            if self.config.confluence_publish_page_index:
+                self.info('indexing remote pages... ', nonl=(not self._verbose))
+                total = self.publisher.build_page_index()
+                if not self._verbose:
+                    self.info('done')
+                self.verbose(f'indexed {total} remote pages')
 
-                        # if we are publishing a new page, check to see if
-                        # there are any delayed anchor risks for pages that
-                        # reference this page; if so, register these pages
-                        # to be re-published
-                        if is_new_page and docname in anchor_risk_db:
-                            docs_to_force_update |= anchor_risk_db[docname]
+            new_docnames = self._publish_documents(
+                self.publish_docnames, 'publishing documents... ')
 
-                except OSError as err:
-                    self.warn(f'error reading file {docfile}: {err}')
+            # if we are publishing a new page, check to see if there are any
+            # delayed anchor risks for pages that reference this page; if so,
+            # register these pages to be re-published
+            for docname in new_docnames:
+                if docname in anchor_risk_db:
+                    docs_to_force_update |= anchor_risk_db[docname]
 
             # re-publish pages that have a risk of a broken anchor link
             if docs_to_force_update:
-                for docname in status_iterator(
-                        sorted(docs_to_force_update),
-                        're-publish documents (cloud anchor updates)... ',
-                        length=len(docs_to_force_update),
-                        verbosity=self._verbose):
-                    if self._check_publish_skip(docname):
-                        self.verbose(docname + ' skipped due to configuration')
-                        continue
-                    docfile = self.out_dir / self.file_transform(docname)
-
-                    try:
-                        with docfile.open(encoding='utf-8') as file:
-                            output = file.read()
-                            self.publish_doc(docname, output, force=True)
-
-                    except OSError as err:
-                        self.warn(f'error reading file {docfile}: {err}')
+                self._publish_documents(sorted(docs_to_force_update),
+                    're-publish documents (cloud anchor updates)... ',
+                    force=True)
 
             self.info('building intersphinx... ', nonl=(not self._verbose))
-            build_intersphinx(self)
+            with self.metrics.track('intersphinx'):
+                build_intersphinx(self)
             if not self._verbose:
                 self.info('done')
 
@@ -945,24 +1038,10 @@ class ConfluenceBuilder(Builder):
                 else:
                     self.verbose('no generated intersphinx database detected')
 
-            def to_asset_name(asset):
-                return asset[0]
-
             assets = self.assets.finalize_assets()
-            for asset in status_iterator(assets, 'publishing assets... ',
-                    length=len(assets), verbosity=self._verbose,
-                    stringify_func=to_asset_name):
-                key, abs_file, type_, hash_, docname = asset
-                if self._check_publish_skip(docname):
-                    self.verbose(f'{key}-{docname} skipped due to configuration')
-                    continue
+            self._publish_assets(assets)
 
-                try:
-                    with abs_file.open('rb') as file:
-                        output = file.read()
-                        self.publish_asset(key, docname, output, type_, hash_)
-                except OSError as err:
-                    self.warn(f'error reading asset {key}: {err}')
+            self._join_legacy_discovery()
 
             # if we have documents that were not changed (and therefore, not
             # needing to be republished), assume any cached publish page ids
@@ -977,6 +1056,7 @@ class ConfluenceBuilder(Builder):
 
             self.publish_cleanup()
             self.publish_finalize()
+            self._journal.complete()
         else:
             assets = self.assets.finalize_assets()
 
@@ -988,17 +1068,103 @@ class ConfluenceBuilder(Builder):
 
         # output the manifest into the output directory
         self.info('building manifest...', nonl=(not self._verbose))
-        self.manifest.export(self.out_dir)
+        with self.metrics.track('manifest'):
+            self.manifest.export(self.out_dir)
         if not self._verbose:
             self.info(' done')
 
+        # output any tracked metrics into the output directory
+        if PublishDebug.metrics in self.config.confluence_publish_debug:
+            self.verbose('building metrics')
+            self.metrics.export(self.out_dir)
+
+        # output any tracked trace into the output directory
+        if self.metrics.trace.enabled:
+            self.verbose('building trace')
+            self.metrics.trace.export(self.out_dir)
+
         # persist cache from this run
         self._cache_info.save_cache()
 
+        if self.publish:
+            self._report_requests()
+
     def cleanup(self):
         if self.publish:
             self.publisher.disconnect()
 
+    def _archive_legacy_pages(self, legacy_pages):
+        """
+        archive legacy pages
+
+        Requests the configured Confluence instance to archive each provided
+        legacy page. All archive requests are submitted first (in a single
+        bulk request if bulk archiving is configured, or a request per page
+        which may be submitted concurrently with multiple publish workers),
+        after which the long tasks managing each archive request are waited
+        on together, with a single deadline for the entire set of requests.
+        If archive requests have not completed in time, a warning is
+        generated and processing continues (where pages not yet archived are
+        not tracked in a publish journal).
+
+        Args:
+            legacy_pages: the legacy pages to archive
+        """
+
+        if self.config.confluence_adv_bulk_archiving:
+            batches = [tuple(legacy_pages)]
+        else:
+            batches = [(legacy_page_id,) for legacy_page_id in legacy_pages]
+
+        def to_batch_name(result):
+            return ', '.join(result[0])
+
+        longtasks = {}
+        workers = self.config.confluence_publish_workers
+        results = dependency_pool(self.publisher.submit_archive, batches,
+            workers)
+        for batch, longtask_id in status_iterator(results,
+                'archiving legacy pages... ', length=len(batches),
+                verbosity=self._verbose, stringify_func=to_batch_name):
+            if longtask_id:
+                longtasks[longtask_id] = batch
+            else:
+                for legacy_page_id in batch:
+                    self._journal.record('archive-page', legacy_page_id)
+
+        if longtasks:
+            self.note('waiting for archiving to complete... ',
+                nonl=(not self._verbose))
+            # (a single deadline applies to the entire set of long tasks)
+            completed = set()
+            try:
+                for longtask_id in self.publisher.wait_for_longtasks(
+                        longtasks, timeout=LONGTASK_TIMEOUT):
+                    completed.add(longtask_id)
+                    for legacy_page_id in longtasks[longtask_id]:
+                        self._journal.record('archive-page', legacy_page_id)
+            except ConfluenceBadApiError as ex:
+                if not self._verbose:
+                    self.info('')
+
+                pending = [legacy_page_id
+                    for longtask_id, batch in longtasks.items()
+                    if longtask_id not in completed
+                    for legacy_page_id in batch]
+                for longtask_id in longtasks.keys() - completed:
+                    self.verbose(f'outstanding archive request: {longtask_id}')
+
+                pending_desc = ', '.join(pending[:ARCHIVE_REPORT_LIMIT])
+                if len(pending) > ARCHIVE_REPORT_LIMIT:
+                    pending_desc += ', ...'
+
+                self.warn('archive requests have not completed '
+                    f'({len(pending)} pages may not be archived yet: '
+                    f'{pending_desc}): {ex}')
+            else:
+                if not self._verbose:
+                    self.info('done')
+
     def _check_publish_skip(self, docname):
         """
         check publishing should be skipped for the provided docname
@@ -1052,6 +1218,47 @@ class ConfluenceBuilder(Builder):
 
             node.parent.remove(node)
 
+    def _find_doctree_dependencies(self, docname, doctree):
+        """
+        find the documents a doctree's output depends on
+
+        Compiles a set of other documents which the output of a document may
+        depend on. This includes documents referenced (e.g. ``doc`` or
+        ``ref`` roles) and documents included in a toctree, where the title
+        or anchors of these documents are used when generating links.
+
+        Args:
+            docname: the docname of the doctree
+            doctree: the doctree to search for dependencies
+
+        Returns:
+            the set of dependent docnames
+        """
+
+        labels = self.env.domaindata['std']['labels']
+        anonlabels = self.env.domaindata['std']['anonlabels']
+
+        deps = set(self.env.toctree_includes.get(docname, []))
+
+        for node in findall(doctree, addnodes.pending_xref):
+            reftarget = node.get('reftarget')
+            if not reftarget:
+                continue
+
+            reftype = node.get('reftype')
+            if reftype == 'doc':
+                refdoc = node.get('refdoc', docname)
+                deps.add(docname_join(refdoc, reftarget))
+            elif reftype in ('numref', 'ref'):
+                label = labels.get(reftarget.lower())
+                if not label:
+                    label = anonlabels.get(reftarget.lower())
+                if label:
+                    deps.add(label[0])
+
+        deps.discard(docname)
+        return deps
+
     def _find_title_element(self, doctree):
         """
         find (if any) the title element of a document
@@ -1321,6 +1528,454 @@ class ConfluenceBuilder(Builder):
 
         return True
 
+    def _ledger_check(self, docname, ledger_hash, force):
+        """
+        check if a document is unchanged based on the publish ledger
+
+        Compares the provided data hash of a document against the entry
+        tracked in the publish ledger from the last publish. If the page is
+        known to be unchanged, the page identifier is returned. A sample of
+        matching pages (if configured) are verified against the remote page's
+        version to detect pages modified outside of this extension.
+
+        Args:
+            docname: the document
+            ledger_hash: the data hash of the page to be published
+            force: whether this document is being forced to publish
+
+        Returns:
+            the unchanged page identifier or ``None``
+        """
+
+        if force or self.config.confluence_publish_force:
+            return None
+
+        entry = self._cache_info.ledger_entry(docname)
+        if not entry or entry.get('hash') != ledger_hash:
+            return None
+
+        page_id = entry['id']
+
+        verify_rate = self.config.confluence_publish_ledger_verify
+        if verify_rate and random.random() < float(verify_rate):  # noqa: S311
+            try:
+                _, page = self.publisher.get_page_by_id(page_id)
+            except ConfluenceBadApiError as ex:
+                if ex.status_code != 404:
+                    raise
+                page = None
+
+            version = page.get('version', {}).get('number') if page else None
+            if not version or int(version) != entry['version']:
+                self.verbose(f'ledger entry outdated for page: {page_id}')
+                return None
+
+        self._cache_info.track_ledger_entry(docname, entry)
+        return page_id
+
+    def _publish_data_hash(self, title, data, parent_id):
+        """
+        generate a data hash for a page to be published
+
+        Args:
+            title: the title of the page
+            data: the page data to be published
+            parent_id: the parent identifier of the page
+
+        Returns:
+            the data hash
+        """
+
+        hash_data = json.dumps([
+            self.config.confluence_server_url,
+            self.config.confluence_space_key,
+            title,
+            str(parent_id) if parent_id else None,
+            data,
+        ], sort_keys=True)
+
+        return ConfluenceUtil.hash(hash_data)
+
+    def _publish_build_hash(self):
+        """
+        generate a hash representing the build being published
+
+        Returns:
+            the build hash
+        """
+
+        doc_hashes = {}
+        for docname in self.publish_docnames:
+            # (generated documents have no source to hash)
+            if docname in self.env.all_docs:
+                doc_hashes[docname] = self._cache_info.track_page_hash(docname)
+
+        # (publish-control options are excluded, to allow a publish to be
+        # resumed with different options, e.g. requesting a resume)
+        config_hash = build_hash(self.config, exclude=PUBLISH_CONTROL_OPTIONS)
+
+        hash_data = json.dumps([
+            config_hash,
+            doc_hashes,
+        ], sort_keys=True)
+
+        return ConfluenceUtil.hash(hash_data)
+
+    def _populate_legacy_content(self):
+        """
+        populate legacy pages/assets which may be cleaned up after publishing
+
+        When cleanup is enabled, query the configured Confluence instance for
+        any descendant pages (and their attachments) in the target scope. Any
+        content found which is not published by this run may be considered
+        legacy content to be cleaned up after publishing.
+
+        This call may be invoked on a background thread while documents are
+        being published (see ``_start_legacy_discovery``).
+        """
+        conf = self.config
+
+        # if resuming a publish, re-use any legacy content already discovered
+        journal_entry = self._journal.lookup('discovery', 'legacy')
+        if journal_entry:
+            self.legacy_pages = set(journal_entry['pages'])
+            self.legacy_assets = {
+                k: dict(v) for k, v in journal_entry['assets'].items()
+            }
+            return
+
+        if conf.confluence_publish_root:
+            baseid = conf.confluence_publish_root
+        elif conf.confluence_cleanup_from_root:
+            baseid = self.root_doc_page_id
+        else:
+            baseid = self.parent_id
+
+        # if no base identifier and dry running, ignore legacy page
+        # searching as there is no initial root document to reference
+        # against
+        if (conf.confluence_cleanup_from_root and
+                conf.confluence_publish_dryrun and not baseid):
+            self.legacy_pages = []
+        else:
+            self.verbose('querying for descendants')
+            # (parents are only needed to order the removal of pages)
+            self.legacy_pages = self.publisher.get_descendants(
+                baseid, conf.confluence_cleanup_search_mode,
+                ancestors=bool(conf.confluence_cleanup_purge))
+
+        # remove any configured orphan root id from a cleanup check
+        orphan_root_id = str(conf.confluence_publish_orphan_container)
+        if conf.confluence_publish_orphan and orphan_root_id:
+            if orphan_root_id in self.legacy_pages:
+                self.legacy_pages.remove(orphan_root_id)
+
+        # only populate a list of possible legacy assets when a user is
+        # configured to check or push assets to the target space
+        asset_override = conf.confluence_asset_override
+        if self.legacy_pages and (asset_override is None or asset_override):
+            self.verbose('querying for attachments')
+            self.legacy_assets.update(
+                self.publisher.get_attachments_bulk(self.legacy_pages,
+                    mode=conf.confluence_cleanup_search_mode))
+
+        self._journal.record('discovery', 'legacy',
+            assets=self.legacy_assets, pages=list(self.legacy_pages))
+
+    def _report_requests(self):
+        """
+        report a summary of requests made to a confluence instance
+
+        Reports the number of requests made when publishing, along with the
+        api endpoints and documents which have made the most requests. The
+        breakdown of endpoints and documents is only shown in verbose mode,
+        unless metrics are enabled with ``confluence_publish_debug``.
+        """
+
+        summary = self.metrics.requests.summary()
+        if not summary['count']:
+            return
+
+        self.info(f'publish requests: {summary["count"]} '
+            f'({summary["sent"]} bytes sent; '
+            f'{summary["received"]} bytes received; '
+            f'{summary["retries"]} retries)')
+
+        report = self.verbose
+        if PublishDebug.metrics in self.config.confluence_publish_debug:
+            report = self.info
+
+        endpoints = sorted(summary['endpoints'].items(),
+            key=lambda x: (-x[1]['count'], x[0]))
+        for endpoint, entry in endpoints[:REPORT_REQUESTS_LIMIT]:
+            latency = ', '.join(f'{k} {v * 1000:.0f}ms'
+                for k, v in entry['latency'].items())
+            report(f'  {entry["count"]:>6} {endpoint} ({latency})')
+
+        documents = sorted(summary['documents'].items(),
+            key=lambda x: (-x[1]['count'], x[0]))
+        for docname, entry in documents[:REPORT_REQUESTS_LIMIT]:
+            report(f'  {entry["count"]:>6} {docname}')
+
+    def _start_legacy_discovery(self):
+        """
+        start discovering legacy content in the background
+
+        When cleanup is enabled, starts the discovery of legacy content (see
+        ``_populate_legacy_content``) on a background thread, allowing the
+        discovery to overlap with the publishing of documents. Discovery is
+        only started once; the results are joined when legacy content is
+        needed (see ``_join_legacy_discovery``).
+        """
+
+        with self._publish_lock:
+            if not self.post_cleanup or self._legacy_discovery:
+                return
+
+            def discover():
+                with self.metrics.track('legacy_discovery'):
+                    self._populate_legacy_content()
+
+            executor = ThreadPoolExecutor(max_workers=1,
+                thread_name_prefix='scb-discovery')
+            self._legacy_discovery = executor.submit(discover)
+            executor.shutdown(wait=False)
+
+    def _publish_assets(self, assets):
+        """
+        publish a series of assets
+
+        Publishes each provided asset to its respective document's page on the
+        configured Confluence instance. When multiple asset publish workers are
+        configured, assets for different pages are published concurrently,
+        while assets targeting the same page are published in the order they
+        are provided.
+
+        Args:
+            assets: the assets to publish
+        """
+
+        def publish(asset):
+            key, abs_file, type_, hash_, docname = asset
+
+            # (asset contents are streamed from the file when uploaded)
+            try:
+                with self.metrics.requests.document(docname):
+                    self.publish_asset(key, docname, abs_file, type_, hash_)
+            except OSError as err:
+                self.warn(f'error reading asset {key}: {err}')
+
+        def to_asset_name(asset):
+            return asset[0]
+
+        workers = self.config.confluence_publish_asset_workers
+        if workers > 1:
+            candidates = []
+            for asset in assets:
+                key, _, _, _, docname = asset
+                if self._check_publish_skip(docname):
+                    self.verbose(f'{key}-{docname} skipped due to configuration')
+                    continue
+                candidates.append(asset)
+
+            # ensure uploads to the same page are performed in order, by
+            # having each asset depend on the previous asset of a page
+            asset_dependencies = {}
+            last_page_asset = {}
+            for asset in candidates:
+                docname = asset[4]
+                prev_asset = last_page_asset.get(docname)
+                asset_dependencies[asset] = [prev_asset] if prev_asset else []
+                last_page_asset[docname] = asset
+
+            def to_result_asset_name(result):
+                return to_asset_name(result[0])
+
+            results = dependency_pool(publish, candidates, workers,
+                depends=asset_dependencies.get)
+            for _ in status_iterator(results, 'publishing assets... ',
+                    length=len(candidates), verbosity=self._verbose,
+                    stringify_func=to_result_asset_name):
+                pass
+        else:
+            for asset in status_iterator(assets, 'publishing assets... ',
+                    length=len(assets), verbosity=self._verbose,
+                    stringify_func=to_asset_name):
+                key, _, _, _, docname = asset
+                if self._check_publish_skip(docname):
+                    self.verbose(f'{key}-{docname} skipped due to configuration')
+                    continue
+
+                publish(asset)
+
+    def _publish_dependencies(self, docname):
+        """
+        return the documents which need to be published before a document
+
+        Provides a list of documents which are required to be published before
+        the provided document can be published. The root document is always
+        published first (to support legacy/ancestor tracking), and when a page
+        hierarchy is used, a document's parent document is required to be
+        published before its children.
+
+        Args:
+            docname: the document
+
+        Returns:
+            the documents to be published first
+        """
+        dependencies = []
+
+        root_doc = self.config.root_doc
+        if root_doc and docname != root_doc:
+            dependencies.append(root_doc)
+
+            if self.config.confluence_page_hierarchy:
+                parent = self.state.parent_docname(docname)
+                if parent:
+                    dependencies.append(parent)
+
+        return dependencies
+
+    def _publish_documents(self, docnames, summary, *, force=False):
+        """
+        publish a series of documents
+
+        Publishes each provided document's generated output to the configured
+        Confluence instance. When multiple publish workers are configured,
+        documents are published concurrently, where a document will only be
+        published after its root/parent document has been published (to
+        ensure a parent's page identifier is known for a child document).
+
+        Args:
+            docnames: the documents to publish
+            summary: the progress message to display
+            force (optional): whether to force the publish of each document
+
+        Returns:
+            the documents which have been published as new pages
+        """
+        new_docnames = []
+
+        def publish(docname):
+            docfile = self.out_dir / self.file_transform(docname)
+
+            try:
+                with docfile.open(encoding='utf-8') as file, \
+                        self.metrics.requests.document(docname):
+                    output = file.read()
+                    if force:
+                        return self.publish_doc(docname, output, force=True)
+                    return self.publish_doc(docname, output)
+            except OSError as err:
+                self.warn(f'error reading file {docfile}: {err}')
+
+            return False
+
+        workers = self.config.confluence_publish_workers
+        if workers > 1:
+            candidates = []
+            for docname in docnames:
+                if self._check_publish_skip(docname):
+                    self.verbose(docname + ' skipped due to configuration')
+                    continue
+                candidates.append(docname)
+
+            def to_docname(result):
+                return result[0]
+
+            results = dependency_pool(publish, candidates, workers,
+                depends=self._publish_dependencies)
+            for docname, is_new_page in status_iterator(results, summary,
+                    length=len(candidates), verbosity=self._verbose,
+                    stringify_func=to_docname):
+                if is_new_page:
+                    new_docnames.append(docname)
+        else:
+            for docname in status_iterator(docnames, summary,
+                    length=len(docnames), verbosity=self._verbose):
+                if self._check_publish_skip(docname):
+                    self.verbose(docname + ' skipped due to configuration')
+                    continue
+
+                if publish(docname):
+                    new_docnames.append(docname)
+
+        return new_docnames
+
+    def _purge_legacy_content(self, legacy_pages, legacy_assets):
+        """
+        remove legacy pages and assets
+
+        Removes each provided legacy page and asset from the configured
+        Confluence instance. Pages and assets are removed concurrently when
+        multiple publish workers are configured. Pages are removed before
+        their ancestors (based on parent information observed when searching
+        for legacy pages), avoiding Confluence from moving a removed page's
+        children to its parent. Any failure to remove a page or asset is
+        reported once all other content has been processed.
+
+        Args:
+            legacy_pages: the legacy pages to remove
+            legacy_assets: the legacy assets (identifiers to names) to remove
+        """
+
+        # build a list of known legacy children for each legacy page
+        known_pages = set(legacy_pages)
+        children = defaultdict(list)
+        for legacy_page_id in legacy_pages:
+            parent_id = self.publisher.get_cached_parent(legacy_page_id)
+            if parent_id in known_pages:
+                children[parent_id].append(('page', legacy_page_id))
+
+        def depends(item):
+            type_, id_ = item
+            return children[id_] if type_ == 'page' else []
+
+        def purge(item):
+            type_, id_ = item
+
+            try:
+                if type_ == 'page':
+                    self.publisher.remove_page(id_)
+                else:
+                    self.publisher.remove_attachment(id_)
+            except ConfluenceBadApiError as ex:
+                return ex
+
+            return None
+
+        def to_name(item):
+            type_, id_ = item
+            if type_ == 'page':
+                return id_
+            return legacy_assets[id_]
+
+        def to_result_name(result):
+            return to_name(result[0])
+
+        items = [('page', page_id) for page_id in legacy_pages]
+        items.extend(('attachment', id_) for id_ in legacy_assets)
+
+        failures = []
+        workers = self.config.confluence_publish_workers
+        results = dependency_pool(purge, items, workers, depends=depends)
+        for item, err in status_iterator(results,
+                'removing legacy content... ', length=len(items),
+                verbosity=self._verbose, stringify_func=to_result_name):
+            type_, id_ = item
+            if err:
+                self.verbose(f'failed to remove {type_} {to_name(item)}: {err}')
+                failures.append(f'{type_} {to_name(item)} (id: {id_})')
+                continue
+
+            self._journal.record(f'remove-{type_}', id_)
+            if type_ == 'page':
+                self.legacy_assets.pop(id_, None)
+
+        if failures:
+            raise ConfluenceCleanupError(failures)
+
     def _register_doctree_targets(self, docname, doctree, title_track=None):
         """
         register targets for a doctree
@@ -1496,6 +2151,94 @@ class ConfluenceBuilder(Builder):
         """
         return False
 
+    def _track_dependencies(self, docnames, dependencies, write_docnames):
+        """
+        track the dependency hashes of documents
+
+        For each document, a hash is generated from the state of the
+        documents it depends on (their titles and targets). These hashes are
+        tracked in the cache, where any document which is not already being
+        written and has a hash which has changed since the last run is
+        reported.
+
+        Args:
+            docnames: the documents to track
+            dependencies: the dependencies of each document
+            write_docnames: the documents already being written
+
+        Returns:
+            the documents with outdated dependencies
+        """
+
+        # group registered targets by their respective document
+        doc_targets = defaultdict(list)
+        for refid, target in self.state.refid2target.items():
+            target_docname, sep, _ = refid.partition('/#')
+            if sep and target_docname:
+                doc_targets[target_docname].append(f'{refid}={target}')
+
+        outdated = set()
+        for docname in docnames:
+            entries = []
+            for dep in sorted(dependencies.get(docname, ())):
+                entries.append(dep)
+                entries.append(self.state.title(dep) or '')
+                entries.extend(sorted(doc_targets.get(dep, [])))
+
+            dep_hash = ConfluenceUtil.hash('\n'.join(entries))
+            self._cache_info.track_dependency_hash(docname, dep_hash)
+
+            if docname not in write_docnames and \
+                    self._cache_info.is_dependency_outdated(docname):
+                outdated.add(docname)
+
+        return outdated
+
+    def _join_legacy_discovery(self):
+        """
+        wait for the discovery of legacy content to complete
+
+        Waits for any legacy content being discovered in the background to
+        complete (or discovers legacy content now if discovery has not been
+        started). Any pages and attachments published while legacy content
+        was being discovered are then removed from the legacy content.
+        Legacy content is only tracked if a document has been published.
+        """
+
+        discovery = self._legacy_discovery
+        self._legacy_discovery = None
+
+        published_page_ids = self._published_page_ids
+        if published_page_ids is None:
+            # nothing was published; ignore any discovered legacy content
+            if discovery:
+                discovery.result()
+            self.legacy_assets = {}
+            self.legacy_pages = None
+            return
+
+        if not discovery or not discovery.done():
+            self.info('discovering legacy content... ',
+                nonl=(not self._verbose))
+
+            if discovery:
+                discovery.result()
+            else:
+                with self.metrics.track('legacy_discovery'):
+                    self._populate_legacy_content()
+
+            if not self._verbose:
+                self.info('done')
+        else:
+            discovery.result()
+
+        self.legacy_pages = [page_id for page_id in self.legacy_pages
+            if page_id not in published_page_ids]
+
+        for legacy_asset_info in self.legacy_assets.values():
+            for attachment_id in self._published_attachment_ids:
+                legacy_asset_info.pop(attachment_id, None)
+
     def _parse_doctree_title(self, docname, doctree):
         """
         parse a doctree for a raw title value
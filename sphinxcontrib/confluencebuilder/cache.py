@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from typing import Any
+from typing import NamedTuple
+import copy
+import re
+import threading
+import time
+
+
+# pattern to extract content identifiers from a request path
+CONTENT_ID_PATTERN = re.compile(r'/(\d+)(?=/|$)')
+
+# path segments which indicate a request lists children of content
+LISTING_HINTS = (
+    '/child',
+    '/children',
+    '/descendant',
+    '/descendants',
+)
+
+
+class CacheEntry(NamedTuple):
+    """
+    a cached response
+    """
+
+    data: Any
+    etag: str | None
+    expires: float
+    ids: set[str]
+    listing: bool
+
+
+class ResponseCache:
+    """
+    response cache for rest requests
+
+    Tracks the responses of GET requests made to a Confluence instance,
+    allowing repeated requests to re-use a previous response. Entries are
+    evicted after a configured time-to-live. If a response reported an
+    ``ETag``, an expired entry may be revalidated with a conditional request.
+    Concurrent requests for the same entry will wait on a single request to
+    complete.
+
+    Any request which may modify content will invalidate cached entries
+    associated with the content identifiers in the request's path, as well
+    as any cached searches or content listings.
+    """
+
+    def __init__(self, ttl):
+        self.hits = 0
+        self.misses = 0
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, key, path, request):
+        """
+        fetch a response from the cache or from a request
+
+        If no (unexpired) response exists for the provided key, the request
+        callable is invoked to acquire a new response. The callable will be
+        provided an ``ETag`` value (if any) of an expired entry, and must
+        return a tuple of the response data, the response ``ETag`` (if any)
+        and whether the response indicated the entry is not modified.
+
+        Args:
+            key: the cache key
+            path: the request path
+            request: the callable to perform the request
+
+        Returns:
+            the response data
+        """
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry.expires > time.monotonic():
+                    self.hits += 1
+                    return copy.deepcopy(entry.data)
+
+                waiter = self._inflight.get(key)
+                if not waiter:
+                    waiter = threading.Event()
+                    self._inflight[key] = waiter
+                    generation = self._generation
+                    self.misses += 1
+                    break
+
+            # another thread is performing this request; wait for it to
+            # complete and re-check the cache
+            waiter.wait()
+
+        try:
+            etag = entry.etag if entry else None
+            data, new_etag, not_modified = request(etag)
+            if not_modified:
+                data = entry.data
+
+            with self._lock:
+                # only track this response if no content was modified while
+                # the request was made
+                if generation == self._generation:
+                    self._entries[key] = CacheEntry(
+                        data=data,
+                        etag=new_etag or etag,
+                        expires=time.monotonic() + self.ttl,
+                        ids=set(CONTENT_ID_PATTERN.findall(path)),
+                        listing=any(x in path for x in LISTING_HINTS),
+                    )
+
+            return copy.deepcopy(data)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter.set()
+
+    def invalidate(self, path):
+        """
+        invalidate cached entries affected by a modification request
+
+        Args:
+            path: the request path of the modification request
+        """
+
+        ids = set(CONTENT_ID_PATTERN.findall(path))
+
+        with self._lock:
+            self._generation += 1
+
+            # if no identifiers are known (e.g. new content), it is unknown
+            # what content may be affected
+            if not ids:
+                self._entries.clear()
+                return
+
+            for key, entry in list(self._entries.items()):
+                if not entry.ids or entry.listing or entry.ids & ids:
+                    del self._entries[key]
@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+import json
+import sqlite3
+import threading
+
+
+class ConfluenceCacheDatabase:
+    """
+    sqlite-backed storage for build cache information
+
+    Stores cache information (e.g. document hashes or published page
+    identifiers) as individual rows in a single SQLite database file. Each
+    entry is keyed by the kind of cache information and a key (typically a
+    document name), allowing entries to be looked up without loading an
+    entire cache into memory and to be updated without rewriting all other
+    entries. Values are stored as JSON-encoded data.
+
+    A database may be used by multiple threads.
+
+    Args:
+        path: the path of the database file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        """
+        close the database
+        """
+
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, kind, key):
+        """
+        return the value of an entry (if any)
+
+        Args:
+            kind: the kind of entry
+            key: the key of the entry
+
+        Returns:
+            the value or ``None``
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM entries WHERE kind = ? AND key = ?',
+                (kind, key)).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def open(self):
+        """
+        open the database
+
+        Opens (or creates) the database file, preparing the tables used to
+        store cache information.
+        """
+
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS entries (
+                        kind TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        PRIMARY KEY (kind, key)
+                    ) WITHOUT ROWID
+                ''')
+        except sqlite3.Error:
+            conn.close()
+            raise
+
+        with self._lock:
+            self._conn = conn
+
+    def table(self, kind):
+        """
+        return a view of entries for a specific kind
+
+        Args:
+            kind: the kind of entry
+
+        Returns:
+            the view
+        """
+
+        return ConfluenceCacheTable(self, kind)
+
+    def update(self, entries):
+        """
+        update entries in the database
+
+        All provided entries are inserted (or replaced) in a single
+        transaction.
+
+        Args:
+            entries: iterable of kind, key and value tuples
+        """
+
+        rows = [(kind, key, json.dumps(value)) for kind, key, value in entries]
+        if not rows:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO entries (kind, key, value) '
+                'VALUES (?, ?, ?)', rows)
+
+
+class ConfluenceCacheTable:
+    """
+    view of database entries for a specific kind
+
+    Provides a dictionary-like view to lookup cache information for a
+    specific kind of entry. Entries popped from a view are only hidden from
+    the view, and are not removed from the database.
+
+    Args:
+        db: the database
+        kind: the kind of entry
+    """
+
+    def __init__(self, db, kind):
+        self.db = db
+        self.kind = kind
+        self._popped = set()
+
+    def get(self, key, default=None):
+        if key in self._popped:
+            return default
+
+        value = self.db.get(self.kind, key)
+        return default if value is None else value
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        self._popped.add(key)
+        return value
@@ -27,6 +27,8 @@ def build_main(args_parser):
 
     args_parser.add_argument('-D', action='append', default=[], dest='define')
     args_parser.add_argument('--output-dir', '-o', type=Path)
+    args_parser.add_argument('--resume', action='store_true')
+    args_parser.add_argument('--verify-ledger', action='store_true')
 
     known_args = sys.argv[1:]
     args, unknown_args = args_parser.parse_known_args(known_args)
@@ -42,6 +44,14 @@ def build_main(args_parser):
         logger.error('invalid define provided in command line')
         return 1
 
+    # resume an interrupted publish (if any)
+    if args.resume:
+        defines['confluence_publish_resume'] = '1'
+
+    # verify all pages tracked in a publish ledger (if any)
+    if args.verify_ledger:
+        defines['confluence_publish_ledger_verify'] = '1'
+
     work_dir = args.work_dir or Path.cwd()
     if args.output_dir:
         output_dir = args.output_dir
@@ -1,18 +1,34 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from collections import defaultdict
+from datetime import datetime
+from datetime import timezone
 from pathlib import Path
 from sphinx.application import Sphinx
 from sphinx.locale import __
 from sphinx.util.docutils import docutils_namespace
+from sphinxcontrib.confluencebuilder.concurrency import dependency_pool
 from sphinxcontrib.confluencebuilder.config import process_ask_configs
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
 from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
 from sphinxcontrib.confluencebuilder.util import temp_dir
+import json
 import sys
 import traceback
 
 
+# filename of a wipe plan (in the output directory)
+WIPE_PLAN_FILENAME = 'scb-wipe-plan.jsonl'
+
+# maximum number of page removal failures to report (non-verbose)
+WIPE_REPORT_LIMIT = 5
+
+# type of a wipe plan file
+WIPE_PLAN_TYPE = 'SphinxConfluenceBuilder/WipePlan'
+
+
 def wipe_main(args_parser):
     """
     wipe mainline
@@ -27,7 +43,9 @@ def wipe_main(args_parser):
     """
 
     args_parser.add_argument('--danger', action='store_true')
+    args_parser.add_argument('--output-dir', '-o', type=Path)
     args_parser.add_argument('--parent', '-P', action='store_true')
+    args_parser.add_argument('--resume', type=Path, metavar='PLAN')
 
     known_args = sys.argv[1:]
     args, unknown_args = args_parser.parse_known_args(known_args)
@@ -35,6 +53,10 @@ def wipe_main(args_parser):
         logger.warn('unknown arguments: {}'.format(' '.join(unknown_args)))
 
     work_dir = args.work_dir or Path.cwd()
+    if args.output_dir:
+        output_dir = args.output_dir
+    else:
+        output_dir = work_dir / '_build' / 'confluence'
 
     # protection warning
     if not args.danger:
@@ -73,6 +95,7 @@ To use this action, the argument '--danger' must be set.
 
             dryrun = app.config.confluence_publish_dryrun
             server_url = app.config.confluence_server_url
+            workers = app.config.confluence_publish_workers or 1
             space_key = app.config.confluence_space_key
             parent_ref = app.config.confluence_parent_page
 
@@ -100,6 +123,20 @@ To use this action, the argument '--danger' must be set.
         logger.error('parent option provided but no parent page is configured')
         return 1
 
+    # load a plan from a previous wipe attempt (if resuming)
+    plan = None
+    plan_path = output_dir / WIPE_PLAN_FILENAME
+    if args.resume:
+        plan_path = args.resume
+        plan = load_wipe_plan(plan_path)
+        if not plan:
+            logger.error(f'unable to load wipe plan: {plan_path}')
+            return 1
+
+        if (plan['server_url'], plan['space_key']) != (server_url, space_key):
+            logger.error('wipe plan does not match the configured space')
+            return 1
+
     # reminder warning
     print()
     sys.stdout.flush()
@@ -122,13 +159,33 @@ pages. Only use this action if you know what you are doing.
     # user has confirmed; start an attempt to wipe
     publisher.connect()
 
-    base_page_id = None
-    if args.parent:
-        base_page_id = publisher.get_base_page_id()
+    if plan:
+        base_page_id = plan['parent']
+    else:
+        base_page_id = None
+        if args.parent:
+            base_page_id = publisher.get_base_page_id()
+
+        # find all legacy pages, tracking them into a plan which allows an
+        # interrupted wipe to be resumed without a new discovery
+        def report_progress(searched, found):
+            print(f'\rDiscovering pages... {found} found ({searched} searched)',
+                end='', flush=True)
+
+        plan = discover_wipe_plan(publisher, base_page_id,
+            progress=report_progress)
+        print()
 
-    # find all legacy pages; always search aggressive to prevent any Confluence
-    # caching issues/delays
-    legacy_pages = publisher.get_descendants(base_page_id, 'search-aggressive')
+        # (a dry run does not remove pages, so no plan is tracked)
+        if plan['pages'] and not dryrun:
+            try:
+                write_wipe_plan(plan_path, plan)
+            except OSError as e:
+                logger.error(f'unable to write wipe plan: {e}')
+                return 1
+
+    legacy_pages = [page_id for page_id in plan['pages']
+        if page_id not in plan['removed']]
 
     print('         URL:', server_url)
     print('       Space:', space_key)
@@ -137,6 +194,10 @@ pages. Only use this action if you know what you are doing.
     else:
         logger.note('       Pages: All Pages')
     print(' Total pages:', len(legacy_pages))
+    if plan['removed']:
+        print('     Removed:', len(plan['removed']), '(from a previous wipe)')
+    if legacy_pages and not dryrun:
+        print('        Plan:', plan_path)
     if dryrun:
         print('     Dry run:', 'Enabled (no pages will be removed)')
 
@@ -147,9 +208,7 @@ pages. Only use this action if you know what you are doing.
 
     if args.verbose:
         print('-------------------------')
-        name_cache = publisher._name_cache  # noqa: SLF001
-        page_names = [name_cache[p] for p in legacy_pages]
-        sorted(page_names)
+        page_names = sorted(str(plan['pages'][p]['title']) for p in legacy_pages)
         print('\n'.join(page_names))
         print('-------------------------')
 
@@ -158,19 +217,211 @@ pages. Only use this action if you know what you are doing.
         return 0
     print()
 
-    logger.info('Removing pages...', nonl=True)
-    if dryrun:
-        logger.info('')
-    for page_id in legacy_pages:
-        publisher.remove_page(page_id)
-        if not dryrun:
-            logger.info('.', nonl=True)
+    def report_removal(removed, total):
+        print(f'\rRemoving pages... {removed}/{total}', end='', flush=True)
+
+    # removals are only tracked in a plan when pages are actually removed
+    failures = wipe_pages(publisher, plan, workers,
+        plan_path=None if dryrun else plan_path, progress=report_removal)
+    print()
+
+    if failures:
+        for idx, (page_id, err) in enumerate(failures):
+            msg = f'failed to remove page {page_id}: {err}'
+            if idx < WIPE_REPORT_LIMIT:
+                logger.warn(msg)
+            else:
+                logger.verbose(msg)
+
+        logger.error(f'unable to remove {len(failures)} page(s); '
+            f'the wipe can be resumed using: --resume {plan_path}')
+        return 1
+
+    # a completed plan is removed, to prevent resuming a stale plan
     if not dryrun:
-        logger.info(__('done'))
+        try:
+            plan_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warn(f'unable to remove wipe plan: {e}')
+
+    logger.info(__('done'))
 
     return 0
 
 
+def discover_wipe_plan(publisher, base_page_id, progress=None):
+    """
+    discover the pages to remove for a wipe
+
+    Searches for all pages in the configured space (or descendants of the
+    provided base page) and prepares a plan for a wipe. A plan tracks each
+    page to remove along with its title and parent, allowing an interrupted
+    wipe to be resumed without needing to discover pages again.
+
+    Args:
+        publisher: the publisher to search with
+        base_page_id: the page to remove descendants of (``None`` for all)
+        progress (optional): callback to report searched/found pages
+
+    Returns:
+        the wipe plan
+    """
+
+    # always search aggressive to prevent any Confluence caching
+    # issues/delays
+    legacy_pages = publisher.get_descendants(base_page_id, 'search-aggressive',
+        progress=progress, ancestors=True)
+
+    return {
+        'type': WIPE_PLAN_TYPE,
+        'spec': 1,
+        'generated': datetime.now(timezone.utc).isoformat(),
+        'server_url': publisher.server_url,
+        'space_key': publisher.space_key,
+        'parent': base_page_id,
+        'pages': {
+            page_id: {
+                'parent': publisher.get_cached_parent(page_id),
+                'title': publisher.get_cached_title(page_id),
+            } for page_id in sorted(legacy_pages)
+        },
+        'removed': set(),
+    }
+
+
+def load_wipe_plan(path):
+    """
+    load a wipe plan
+
+    Loads a plan generated from a previous wipe attempt, including any pages
+    which have already been removed.
+
+    Args:
+        path: the path of the plan file
+
+    Returns:
+        the plan; ``None`` if the plan could not be loaded
+    """
+
+    try:
+        with path.open(encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError as e:
+        logger.verbose(f'failed to load wipe plan: {e}')
+        return None
+
+    try:
+        plan = json.loads(lines[0]) if lines else {}
+    except ValueError:
+        plan = {}
+
+    if plan.get('type') != WIPE_PLAN_TYPE:
+        return None
+
+    plan['removed'] = set()
+    for line in lines[1:]:
+        # an interrupted wipe may have left a partially written entry
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+
+        plan['removed'].add(entry['removed'])
+
+    # ensure new entries are not appended onto a partially written entry
+    if not lines[-1].endswith('\n'):
+        try:
+            with path.open('a', encoding='utf-8') as f:
+                f.write('\n')
+        except OSError as e:
+            logger.warn(f'failed to update wipe plan: {e}')
+
+    return plan
+
+
+def wipe_pages(publisher, plan, workers, plan_path=None, progress=None):
+    """
+    remove the pages of a wipe plan
+
+    Removes each page in a plan which has not already been removed. Pages
+    are removed concurrently (up to the number of workers provided), where
+    a page is only removed after its children (in the plan) are removed.
+    Each removed page is appended into the plan file (if provided), to allow
+    an interrupted wipe to be resumed. A failure to remove a page does not
+    stop the removal of other pages.
+
+    Args:
+        publisher: the publisher to remove pages with
+        plan: the wipe plan
+        workers: the maximum number of concurrent removals
+        plan_path (optional): the plan file to track removed pages into
+        progress (optional): callback to report removed/total pages
+
+    Returns:
+        list of pages (and their errors) which failed to be removed
+    """
+
+    pages = plan['pages']
+    legacy_pages = [page_id for page_id in pages
+        if page_id not in plan['removed']]
+
+    children = defaultdict(list)
+    for page_id in legacy_pages:
+        children[pages[page_id]['parent']].append(page_id)
+
+    def depends(page_id):
+        return children[page_id]
+
+    def remove(page_id):
+        try:
+            publisher.remove_page(page_id)
+        except ConfluenceBadApiError as ex:
+            return ex
+
+        return None
+
+    failures = []
+    total = len(legacy_pages)
+    results = dependency_pool(remove, legacy_pages, workers, depends=depends)
+    tracker = plan_path.open('a', encoding='utf-8') if plan_path else None
+    try:
+        for count, (page_id, err) in enumerate(results, 1):
+            if err:
+                failures.append((page_id, err))
+            else:
+                plan['removed'].add(page_id)
+                if tracker:
+                    tracker.write(json.dumps({'removed': page_id}) + '\n')
+                    tracker.flush()
+
+            if progress:
+                progress(count, total)
+    finally:
+        results.close()
+        if tracker:
+            tracker.close()
+
+    return failures
+
+
+def write_wipe_plan(path, plan):
+    """
+    write a wipe plan
+
+    Writes a new plan file for a wipe. Removed pages are later appended to
+    the plan file as each page is removed.
+
+    Args:
+        path: the path of the plan file
+        plan: the wipe plan
+    """
+
+    data = {k: v for k, v in plan.items() if k != 'removed'}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', encoding='utf-8') as f:
+        f.write(json.dumps(data) + '\n')
+
+
 def ask_question(question, default='no'):
     """
     ask the user a question
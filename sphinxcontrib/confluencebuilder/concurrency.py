@@ -0,0 +1,158 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from collections import defaultdict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+def dependency_pool(func, items, workers, depends=None):
+    """
+    process items with a bounded worker pool while honoring dependencies
+
+    Each provided item is passed into ``func`` on a worker thread once every
+    item it depends on has been processed. Items without any outstanding
+    dependencies are processed concurrently (up to ``workers`` at a time).
+    Dependencies which are not part of the provided items are ignored. If a
+    dependency loop is detected, the remaining items are scheduled anyway to
+    ensure processing can complete.
+
+    Results are yielded (in the caller's thread) as items complete, allowing
+    callers to report progress or track results without any locking. If a
+    call raises an exception, no new items are scheduled, any running items
+    are waited on and the exception is re-raised to the caller. Likewise, if
+    a caller stops consuming results, any items yet to be started are
+    cancelled.
+
+    Args:
+        func: the callable to invoke for each item
+        items: the (hashable) items to process
+        workers: the maximum number of concurrent calls
+        depends (optional): callable returning the items an item depends on
+
+    Yields:
+        tuples of an item and the result of its call
+    """
+
+    items = list(dict.fromkeys(items))
+    known = set(items)
+
+    blockers = {}
+    dependents = defaultdict(list)
+    for item in items:
+        deps = set()
+        if depends:
+            deps = {dep for dep in depends(item) if dep in known and dep != item}
+        blockers[item] = deps
+        for dep in deps:
+            dependents[dep].append(item)
+
+    ready = deque(item for item in items if not blockers[item])
+    remaining = len(items)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        running = {}
+
+        # if the caller stops consuming results early (e.g. an interrupt),
+        # ensure any queued calls are not processed
+        try:
+            while remaining:
+                while ready:
+                    item = ready.popleft()
+                    running[executor.submit(func, item)] = item
+
+                # if nothing can be scheduled, a dependency loop exists;
+                # release the next (ordered) item which is still blocked
+                if not running:
+                    item = next(x for x in items if blockers.get(x))
+                    blockers[item] = set()
+                    ready.append(item)
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    blockers.pop(item, None)
+                    remaining -= 1
+
+                    try:
+                        result = future.result()
+                    except BaseException:
+                        for pending in running:
+                            pending.cancel()
+                        wait(running)
+                        raise
+
+                    for dependent in dependents[item]:
+                        deps = blockers.get(dependent)
+                        if deps and item in deps:
+                            deps.discard(item)
+                            if not deps:
+                                ready.append(dependent)
+
+                    yield item, result
+        finally:
+            for pending in running:
+                pending.cancel()
+
+
+def traverse_pool(func, roots, workers):
+    """
+    traverse items breadth-first with a bounded worker pool
+
+    Each provided root item is passed into ``func`` on a worker thread, which
+    is expected to return the items discovered from it. Each discovered item
+    which has not been seen before (shared over the entire traversal) is
+    then scheduled to be processed in the same manner, until no new items
+    are discovered. Items are processed concurrently (up to ``workers`` at a
+    time) and are scheduled in the order they are discovered.
+
+    Results are yielded (in the caller's thread) as items complete, allowing
+    callers to report progress or track results without any locking. If a
+    call raises an exception, no new items are scheduled, any running items
+    are waited on and the exception is re-raised to the caller.
+
+    Args:
+        func: the callable to invoke for each item
+        roots: the (hashable) items to start the traversal from
+        workers: the maximum number of concurrent calls
+
+    Yields:
+        tuples of an item and the items discovered from it
+    """
+
+    seen = set()
+    ready = deque()
+    for root in roots:
+        if root not in seen:
+            seen.add(root)
+            ready.append(root)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        running = {}
+
+        while ready or running:
+            while ready and len(running) < max(workers, 1):
+                item = ready.popleft()
+                running[executor.submit(func, item)] = item
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = running.pop(future)
+
+                try:
+                    discovered = future.result()
+                except BaseException:
+                    for pending in running:
+                        pending.cancel()
+                    wait(running)
+                    raise
+
+                for entry in discovered:
+                    if entry not in seen:
+                        seen.add(entry)
+                        ready.append(entry)
+
+                yield item, discovered
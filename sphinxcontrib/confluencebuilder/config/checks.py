@@ -3,6 +3,7 @@
 
 from pathlib import Path
 from sphinxcontrib.confluencebuilder.config.exceptions import ConfluenceApiModeConfigError
+from sphinxcontrib.confluencebuilder.config.exceptions import ConfluenceCacheBackendConfigError
 from sphinxcontrib.confluencebuilder.config.exceptions import ConfluenceCleanupSearchModeConfigError
 from sphinxcontrib.confluencebuilder.config.exceptions import ConfluenceClientCertBadTupleConfigError
 from sphinxcontrib.confluencebuilder.config.exceptions import ConfluenceClientCertMissingCertConfigError
@@ -147,6 +148,15 @@ def validate_configuration(builder):
 
     # ##################################################################
 
+    # confluence_cache_backend
+    try:
+        validator.conf('confluence_cache_backend') \
+                 .matching('json', 'sqlite')
+    except ConfluenceConfigError as ex:
+        raise ConfluenceCacheBackendConfigError(ex) from ex
+
+    # ##################################################################
+
     # confluence_cleanup_archive
     validator.conf('confluence_cleanup_archive') \
              .bool()
@@ -522,6 +532,18 @@ def validate_configuration(builder):
 
     # ##################################################################
 
+    # confluence_publish_asset_workers
+    validator.conf('confluence_publish_asset_workers') \
+             .int_(positive=True)
+
+    # ##################################################################
+
+    # confluence_publish_cache_ttl
+    validator.conf('confluence_publish_cache_ttl') \
+             .int_()
+
+    # ##################################################################
+
     # confluence_publish_debug
     try:
         validator.conf('confluence_publish_debug').bool()  # deprecated
@@ -550,6 +572,18 @@ def validate_configuration(builder):
 
     # ##################################################################
 
+    # confluence_publish_ledger
+    validator.conf('confluence_publish_ledger') \
+             .bool()
+
+    # ##################################################################
+
+    # confluence_publish_ledger_verify
+    validator.conf('confluence_publish_ledger_verify') \
+             .float_()
+
+    # ##################################################################
+
     # confluence_publish_onlynew
     validator.conf('confluence_publish_onlynew') \
              .bool()
@@ -574,6 +608,12 @@ def validate_configuration(builder):
 
     # ##################################################################
 
+    # confluence_publish_page_index
+    validator.conf('confluence_publish_page_index') \
+             .bool()
+
+    # ##################################################################
+
     # confluence_publish_postfix
     validator.conf('confluence_publish_postfix') \
              .string()
@@ -592,6 +632,12 @@ def validate_configuration(builder):
 
     # ##################################################################
 
+    # confluence_publish_resume
+    validator.conf('confluence_publish_resume') \
+             .bool()
+
+    # ##################################################################
+
     validator.conf('confluence_publish_retry_attempts') \
              .int_(positive=True)
 
@@ -632,6 +678,12 @@ def validate_configuration(builder):
 
     # ##################################################################
 
+    # confluence_publish_workers
+    validator.conf('confluence_publish_workers') \
+             .int_(positive=True)
+
+    # ##################################################################
+
     # confluence_remove_title
     validator.conf('confluence_remove_title') \
              .bool()
@@ -105,6 +105,9 @@ def apply_defaults(app):
     if conf.confluence_page_hierarchy is None:
         conf.confluence_page_hierarchy = True
 
+    if conf.confluence_publish_asset_workers is None:
+        conf.confluence_publish_asset_workers = 1
+
     # ensure confluence_publish_debug is set with its expected enum value
     publish_debug = conf.confluence_publish_debug
     if not isinstance(publish_debug, PublishDebug):
@@ -135,6 +138,9 @@ def apply_defaults(app):
             + str(conf.confluence_publish_root)
         )
 
+    if conf.confluence_publish_workers is None:
+        conf.confluence_publish_workers = 1
+
     if conf.confluence_remove_title is None:
         conf.confluence_remove_title = True
 
@@ -45,7 +45,7 @@ def apply_env_overrides(app):
                 conf[key] = env_val
 
 
-def build_hash(config):
+def build_hash(config, exclude=None):
     """
     builds a confluence configuration hash
 
@@ -56,11 +56,15 @@ def build_hash(config):
 
     Args:
         config: the configuration
+        exclude (optional): names of configuration options to not include
     """
 
     # extract confluence configuration options
     entries = []
     for c in sorted(config.filter(['confluence'])):
+        if exclude and c.name in exclude:
+            continue
+
         entries.append(c.name)
         entries.append(c.value)
 
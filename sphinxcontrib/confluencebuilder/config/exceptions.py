@@ -20,6 +20,17 @@ The following API modes are supported:
 ''')
 
 
+class ConfluenceCacheBackendConfigError(ConfluenceConfigError):
+    def __init__(self, msg):
+        super().__init__(f'''\
+{msg}
+
+The option 'confluence_cache_backend' has been provided to override the
+storage used for build cache information. Accepted values include 'json'
+and 'sqlite'.
+''')
+
+
 class ConfluenceCleanupSearchModeConfigError(ConfluenceConfigError):
     def __init__(self, msg):
         super().__init__(f'''\
@@ -31,8 +31,12 @@ class PublishDebug(Flag):
     headers_raw = headers | _headers_raw
     # log urllib3-supported debug messages
     urllib3 = auto()
+    # generate a metrics file with the time spent in each build phase
+    metrics = auto()
+    # generate a trace-event file with a timeline of build/publish activity
+    trace = auto()
     # enable all logging
-    all = data | headers | urllib3
+    all = data | headers | metrics | trace | urllib3
     # enable all developer logging
     developer = deprecated | all  # noqa: A003
 
@@ -2,36 +2,107 @@
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
 from pathlib import Path
+from sphinxcontrib.confluencebuilder.cachedb import ConfluenceCacheDatabase
+from sphinxcontrib.confluencebuilder.concurrency import dependency_pool
 from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
 import json
+import sqlite3
+import time
 
 
 # base filename for cache information
 ENV_CACHE_BASENAME = '.cache_confluence_'
 
+# filename for asset hashes
+ENV_CACHE_ASSETS = ENV_CACHE_BASENAME + 'assets'
+
 # filename for configuration hash
 ENV_CACHE_CONFIG = ENV_CACHE_BASENAME + 'config'
 
+# filename for the cache database (when using the sqlite backend)
+ENV_CACHE_DATABASE = ENV_CACHE_BASENAME + 'db'
+
+# filename for documentation dependency hashes
+ENV_CACHE_DEPHASH = ENV_CACHE_BASENAME + 'dephash'
+
 # filename for documentation hashes
 ENV_CACHE_DOCHASH = ENV_CACHE_BASENAME + 'dochash'
 
+# filename for the publish journal
+ENV_CACHE_JOURNAL = ENV_CACHE_BASENAME + 'journal'
+
+# filename for the publish ledger
+ENV_CACHE_LEDGER = ENV_CACHE_BASENAME + 'ledger'
+
 # filename for last publication identifiers
 ENV_CACHE_PUBLISH = ENV_CACHE_BASENAME + 'publish'
 
+# window (in nanoseconds) where a source file (or asset) modified this close
+# to when it was last hashed is always re-hashed (since a change within a file
+# system's timestamp granularity may not change a file's modification time)
+SOURCE_STAT_WINDOW = 2_000_000_000
+
 
 class ConfluenceCacheInfo:
     def __init__(self, builder):
         self.builder = builder
         self.env = builder.env
+        self._active_assets = {}
+        self._active_dephash = {}
         self._active_dochash = {}
         self._active_hash = None
+        self._active_ledger = {}
         self._active_pids = {}
+        self._cache_assets_file = builder.out_dir / ENV_CACHE_ASSETS
         self._cache_cfg_file = builder.out_dir / ENV_CACHE_CONFIG
+        self._cache_db_file = builder.out_dir / ENV_CACHE_DATABASE
+        self._cache_dephash_file = builder.out_dir / ENV_CACHE_DEPHASH
         self._cache_hash_file = builder.out_dir / ENV_CACHE_DOCHASH
+        self._cache_ledger_file = builder.out_dir / ENV_CACHE_LEDGER
         self._cache_publish_file = builder.out_dir / ENV_CACHE_PUBLISH
+        self._cached_assets = {}
+        self._cached_dephash = {}
         self._cached_dochash = {}
         self._cached_hash = None
+        self._cached_ledger = {}
         self._cached_pids = {}
+        self._db = None
+
+    def asset_entry(self, path):
+        """
+        return the last tracked entry for an asset (if any)
+
+        This call can return the hash and content type tracked for an asset
+        from a previous run, if the asset's size and modification time have
+        not changed since (and the asset was not modified close to when it
+        was last hashed). This is to help avoid re-reading assets which are
+        known to be unchanged.
+
+        Args:
+            path: the absolute path to the asset
+
+        Returns:
+            the asset entry or ``None``
+        """
+
+        key = str(path)
+        entry = self._cached_assets.get(key)
+        if not entry:
+            return None
+
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return None
+
+        if entry.get('stat') != [st.st_size, st.st_mtime_ns]:
+            return None
+
+        if st.st_mtime_ns + SOURCE_STAT_WINDOW > entry.get('checked', 0):
+            return None
+
+        self._active_assets[key] = entry
+        return entry
 
     def configure(self, hash_):
         """
@@ -84,10 +155,36 @@ class ConfluenceCacheInfo:
             return True
 
         # check if the hashes do not match; if not, this document is outdated
+        # (a source which cannot be hashed is also considered outdated)
         doc_hash = self.track_page_hash(docname)
-        old_doc_hash = self._cached_dochash.get(docname)
+        if not doc_hash:
+            return True
+
+        old_doc_hash = self._cached_dochash.get(docname, {}).get('hash')
         return doc_hash != old_doc_hash
 
+    def is_dependency_outdated(self, docname):
+        """
+        check if the dependencies of a provided document have changed
+
+        This call can return whether the dependencies of a document (see
+        ``track_dependency_hash``) have changed since the last run. A
+        document with no tracked dependencies from a previous run is not
+        considered outdated by this call.
+
+        Args:
+            docname: the name of the document
+
+        Returns:
+            whether the document's dependencies are outdated
+        """
+
+        old_dep_hash = self._cached_dephash.get(docname)
+        if old_dep_hash is None:
+            return False
+
+        return self._active_dephash.get(docname) != old_dep_hash
+
     def last_page_id(self, docname):
         """
         return the last publish page identifier for a document (if any)
@@ -115,6 +212,107 @@ class ConfluenceCacheInfo:
 
         return pid
 
+    def ledger_entry(self, docname):
+        """
+        return the last publish ledger entry for a document (if any)
+
+        This call can return the ledger entry recorded the last time a
+        specific document was published. An entry holds the data hash of the
+        published content along with the page identifier, version and parent
+        identifier it was published with.
+
+        Args:
+            docname: the name of the document
+
+        Returns:
+            the ledger entry or ``None``
+        """
+
+        entry = self._active_ledger.get(docname)
+        if entry is None:
+            entry = self._cached_ledger.get(docname)
+        return entry
+
+    def track_ledger_entry(self, docname, entry):
+        """
+        track the publish ledger entry for a document
+
+        This call can be used to track the ledger entry of a document that
+        has been published (or confirmed to be unchanged) in this run. This
+        is to help on re-runs avoid checking remote state for pages which
+        are known to be unchanged.
+
+        Args:
+            docname: the name of the document
+            entry: the ledger entry
+        """
+
+        self._active_ledger[docname] = entry
+
+    def save_document(self, docname):
+        """
+        save persisted cached information for a document
+
+        When using a cache database, this call can be used to save the
+        tracked state of a single document (e.g. after it has been
+        published), ensuring this progress is retained if a run is stopped
+        before the entire cache is saved. When not using a cache database,
+        this call has no effect.
+
+        Args:
+            docname: the name of the document
+        """
+
+        if not self._db:
+            return
+
+        try:
+            self._db.update(self._active_entries(docname))
+        except sqlite3.Error as e:
+            self.builder.warn(f'failed to save cache (database): {e}')
+
+    def track_asset_entry(self, path, hash_, type_):
+        """
+        track the hash and content type of an asset
+
+        This call can be used to track the hash and content type of an asset
+        (along with the asset's size and modification time). This is to help
+        on re-runs avoid re-reading assets which have not changed.
+
+        Args:
+            path: the absolute path to the asset
+            hash_: the hash of the asset
+            type_: the content type of the asset
+        """
+
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return
+
+        self._active_assets[str(path)] = {
+            'checked': time.time_ns(),
+            'hash': hash_,
+            'stat': [st.st_size, st.st_mtime_ns],
+            'type': type_,
+        }
+
+    def track_dependency_hash(self, docname, dep_hash):
+        """
+        track the dependency hash for a document
+
+        This call can be used to track a hash representing the state of
+        other documents a document's output depends on (e.g. the titles of
+        referenced documents). This is to help on re-runs to flag unchanged
+        documents which need to be rebuilt since a dependency has changed.
+
+        Args:
+            docname: the name of the document
+            dep_hash: the dependency hash
+        """
+
+        self._active_dephash[docname] = dep_hash
+
     def track_page_hash(self, docname):
         """
         track the last publish page hash for a document
@@ -127,24 +325,77 @@ class ConfluenceCacheInfo:
             docname: the name of the document
 
         Returns:
-            the document's hash
+            the document's hash; ``None`` if the source cannot be read
         """
 
-        doc_hash = self._active_dochash.get(docname)
-        if doc_hash:
-            return doc_hash
+        entry = self._active_dochash.get(docname)
+        if entry:
+            return entry['hash']
 
-        # determine the hash of the document based on data + config-hash
+        # if the source file's stat matches the stat tracked the last time
+        # this document was hashed, re-use the source file's hash instead of
+        # reading and hashing the file again (unless the file was modified
+        # close to when it was last hashed)
         src_file = Path(self.env.doc2path(docname))
-        src_file_hash = ConfluenceUtil.hash_asset(src_file)
+        cached_entry = self._cached_dochash.get(docname, {})
+        src_file_hash = cached_entry.get('source')
+        checked = cached_entry.get('checked', 0)
+
+        try:
+            st = src_file.stat()
+            src_stat = [st.st_size, st.st_mtime_ns, st.st_ino]
+
+            if not src_file_hash or cached_entry.get('stat') != src_stat or \
+                    st.st_mtime_ns + SOURCE_STAT_WINDOW > checked:
+                checked = time.time_ns()
+                src_file_hash = ConfluenceUtil.hash_asset(src_file)
+        except OSError:
+            return None
+
+        # determine the hash of the document based on data + config-hash
         doc_hash_data = self._active_hash + src_file_hash
         doc_hash = ConfluenceUtil.hash(doc_hash_data)
 
         # remember this document hash when we may later save
-        self._active_dochash[docname] = doc_hash
+        self._active_dochash[docname] = {
+            'checked': checked,
+            'hash': doc_hash,
+            'source': src_file_hash,
+            'stat': src_stat,
+        }
 
         return doc_hash
 
+    def track_page_hashes(self, docnames, workers=1):
+        """
+        track the last publish page hashes for a series of documents
+
+        This call can be used to track the page hashes of multiple documents
+        ahead of individual ``track_page_hash`` calls. When multiple workers
+        are provided, documents which need to be hashed are processed
+        concurrently.
+
+        Args:
+            docnames: the names of the documents
+            workers (optional): the maximum number of documents to hash at once
+        """
+
+        pending = []
+        for docname in docnames:
+            if docname in self._active_dochash:
+                continue
+
+            src_file = Path(self.env.doc2path(docname))
+            if src_file.is_file():
+                pending.append(docname)
+
+        if workers > 1 and len(pending) > 1:
+            for _ in dependency_pool(self.track_page_hash, pending, workers):
+                pass
+        else:
+            for docname in pending:
+                self.track_page_hash(docname)
+
     def track_last_page_id(self, docname, page_id):
         """
         track the last publish page identifier for a document
@@ -170,29 +421,33 @@ class ConfluenceCacheInfo:
         cache information stored from a previous run.
         """
 
-        try:
-            with self._cache_cfg_file.open(encoding='utf-8') as f:
-                self._cached_hash = json.load(f).get('hash')
-        except FileNotFoundError:
-            pass
-        except OSError as e:
-            self.builder.warn('failed to load cache (config): ' + e)
-
-        try:
-            with self._cache_hash_file.open(encoding='utf-8') as f:
-                self._cached_dochash = json.load(f)
-        except FileNotFoundError:
-            pass
-        except OSError as e:
-            self.builder.warn('failed to load cache (hashes): ' + e)
-
-        try:
-            with self._cache_publish_file.open(encoding='utf-8') as f:
-                self._cached_pids = json.load(f)
-        except FileNotFoundError:
-            pass
-        except OSError as e:
-            self.builder.warn('failed to load cache (pids): ' + e)
+        if self.builder.config.confluence_cache_backend == 'sqlite':
+            created = not self._cache_db_file.exists()
+
+            try:
+                db = ConfluenceCacheDatabase(self._cache_db_file)
+                db.open()
+
+                # when switching to a cache database, import any cache
+                # information saved by a previous run into the new database
+                if created:
+                    self._load_json_cache()
+                    db.update(self._cached_entries())
+
+                self._cached_hash = db.get('config', 'hash')
+            except sqlite3.Error as e:
+                self.builder.warn(f'failed to load cache (database): {e}')
+            else:
+                self._db = db
+                self._cached_assets = db.table('assets')
+                self._cached_dephash = db.table('dephash')
+                self._cached_dochash = db.table('dochash')
+                self._cached_pids = db.table('pids')
+                if self.builder.config.confluence_publish_ledger:
+                    self._cached_ledger = db.table('ledger')
+                return
+
+        self._load_json_cache()
 
     def save_cache(self):
         """
@@ -203,6 +458,19 @@ class ConfluenceCacheInfo:
         can be later used for re-runs tracking outdated documents.
         """
 
+        # when using a cache database, only update the entries tracked in
+        # this run (entries for assets which are no longer used are retained,
+        # but are only used if an asset's stat matches)
+        if self._db:
+            try:
+                self._db.update(self._active_entries())
+            except sqlite3.Error as e:
+                self.builder.warn(f'failed to save cache (database): {e}')
+            finally:
+                self._db.close()
+                self._db = None
+            return
+
         new_cfg = {
             'hash': self._active_hash,
         }
@@ -210,9 +478,20 @@ class ConfluenceCacheInfo:
         new_dochashs = dict(self._cached_dochash)
         new_dochashs.update(self._active_dochash)
 
+        new_dephashs = dict(self._cached_dephash)
+        new_dephashs.update(self._active_dephash)
+
         new_pids = dict(self._cached_pids)
         new_pids.update(self._active_pids)
 
+        # only assets tracked in this run are saved, to avoid retaining
+        # entries for assets which are no longer used
+        try:
+            with self._cache_assets_file.open('w', encoding='utf-8') as f:
+                json.dump(self._active_assets, f)
+        except OSError as e:
+            self.builder.warn(f'failed to save cache (assets): {e}')
+
         try:
             with self._cache_cfg_file.open('w', encoding='utf-8') as f:
                 json.dump(new_cfg, f)
@@ -225,8 +504,143 @@ class ConfluenceCacheInfo:
         except OSError as e:
             self.builder.warn('failed to save cache (hashes): ' + e)
 
+        try:
+            with self._cache_dephash_file.open('w', encoding='utf-8') as f:
+                json.dump(new_dephashs, f)
+        except OSError as e:
+            self.builder.warn(f'failed to save cache (dependencies): {e}')
+
         try:
             with self._cache_publish_file.open('w', encoding='utf-8') as f:
                 json.dump(new_pids, f)
         except OSError as e:
             self.builder.warn('failed to save cache (pids): ' + e)
+
+        if self.builder.config.confluence_publish_ledger:
+            new_ledger = dict(self._cached_ledger)
+            new_ledger.update(self._active_ledger)
+
+            try:
+                with self._cache_ledger_file.open('w', encoding='utf-8') as f:
+                    json.dump(new_ledger, f)
+            except OSError as e:
+                self.builder.warn(f'failed to save cache (ledger): {e}')
+
+    def _cached_entries(self):
+        """
+        return the cache entries loaded from a previous run
+
+        Yields:
+            tuples of kind, key and value for each entry
+        """
+
+        if self._cached_hash is not None:
+            yield 'config', 'hash', self._cached_hash
+
+        tracked = [
+            ('assets', self._cached_assets),
+            ('dephash', self._cached_dephash),
+            ('dochash', self._cached_dochash),
+            ('pids', self._cached_pids),
+        ]
+
+        if self.builder.config.confluence_publish_ledger:
+            tracked.append(('ledger', self._cached_ledger))
+
+        for kind, entries in tracked:
+            for key, value in entries.items():
+                yield kind, key, value
+
+    def _active_entries(self, docname=None):
+        """
+        return the cache entries tracked in this run
+
+        Args:
+            docname (optional): only return entries for this document
+
+        Yields:
+            tuples of kind, key and value for each entry
+        """
+
+        yield 'config', 'hash', self._active_hash
+
+        tracked = [
+            ('dephash', self._active_dephash),
+            ('dochash', self._active_dochash),
+            ('pids', self._active_pids),
+        ]
+
+        if self.builder.config.confluence_publish_ledger:
+            tracked.append(('ledger', self._active_ledger))
+
+        if docname is None:
+            tracked.append(('assets', self._active_assets))
+
+            for kind, entries in tracked:
+                for key, value in list(entries.items()):
+                    yield kind, key, value
+        else:
+            for kind, entries in tracked:
+                value = entries.get(docname)
+                if value is not None:
+                    yield kind, docname, value
+
+    def _load_json_cache(self):
+        """
+        load persisted cached information from json cache files (if any)
+        """
+
+        try:
+            with self._cache_assets_file.open(encoding='utf-8') as f:
+                self._cached_assets = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.builder.warn(f'failed to load cache (assets): {e}')
+
+        try:
+            with self._cache_cfg_file.open(encoding='utf-8') as f:
+                self._cached_hash = json.load(f).get('hash')
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.builder.warn('failed to load cache (config): ' + e)
+
+        try:
+            with self._cache_hash_file.open(encoding='utf-8') as f:
+                cached_dochash = json.load(f)
+
+            # entries from older caches only track a document's hash
+            self._cached_dochash = {
+                k: v if isinstance(v, dict) else {'hash': v}
+                for k, v in cached_dochash.items()
+            }
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.builder.warn('failed to load cache (hashes): ' + e)
+
+        try:
+            with self._cache_dephash_file.open(encoding='utf-8') as f:
+                self._cached_dephash = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.builder.warn(f'failed to load cache (dependencies): {e}')
+
+        try:
+            with self._cache_publish_file.open(encoding='utf-8') as f:
+                self._cached_pids = json.load(f)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.builder.warn('failed to load cache (pids): ' + e)
+
+        if self.builder.config.confluence_publish_ledger:
+            try:
+                with self._cache_ledger_file.open(encoding='utf-8') as f:
+                    self._cached_ledger = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                self.builder.warn(f'failed to load cache (ledger): {e}')
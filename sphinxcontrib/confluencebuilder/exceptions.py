@@ -70,6 +70,22 @@ certificates.
 ''')
 
 
+class ConfluenceCleanupError(ConfluenceError):
+    def __init__(self, failures):
+        details = '\n'.join(f'   {entry}' for entry in failures)
+        super().__init__(f'''
+---
+Unable to remove legacy content
+
+One or more legacy pages/attachments could not be removed from the
+configured Confluence instance. Any other legacy content has been
+removed. Publishing again will re-attempt to remove the following:
+
+{details}
+---
+''')
+
+
 class ConfluenceMissingPageIdError(ConfluenceError):
     def __init__(self, space_key, page_id):
         super().__init__(f'''
@@ -0,0 +1,179 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+import json
+import threading
+
+
+class ConfluencePublishJournal:
+    """
+    publish journal for resuming interrupted publish attempts
+
+    A journal tracks each step completed during a publish (published pages,
+    published attachments, discovered legacy content and cleanup actions)
+    into an append-only file. If a publish is interrupted, a later run for
+    the same build may resume from the journal, skipping any steps which
+    have already been completed. A journal is removed once a publish has
+    completed.
+
+    Args:
+        path: the path of the journal file
+    """
+
+    def __init__(self, path):
+        self.active = False
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def complete(self):
+        """
+        complete a journaled publish
+
+        Flags the publish as completed, removing the journal file.
+        """
+
+        with self._lock:
+            self.active = False
+            self._entries = {}
+
+            try:
+                self.path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warn(f'failed to remove publish journal: {e}')
+
+    def completed(self, step, key):
+        """
+        check if a step has been completed in the journal
+
+        Args:
+            step: the type of step
+            key: the key of the step
+
+        Returns:
+            whether the step is journaled
+        """
+
+        with self._lock:
+            return (step, str(key)) in self._entries
+
+    def lookup(self, step, key):
+        """
+        lookup a completed step in the journal
+
+        Args:
+            step: the type of step
+            key: the key of the step
+
+        Returns:
+            the step's data or ``None`` if the step is not journaled
+        """
+
+        with self._lock:
+            return self._entries.get((step, str(key)))
+
+    def record(self, step, key, **data):
+        """
+        record a completed step in the journal
+
+        Args:
+            step: the type of step
+            key: the key of the step
+            **data: details to track for the step
+        """
+
+        if not self.active:
+            return
+
+        entry = {
+            'step': step,
+            'key': str(key),
+            'data': data,
+        }
+
+        with self._lock:
+            self._entries[(step, str(key))] = data
+            self._write(entry)
+
+    def start(self, build_hash, *, resume=False):
+        """
+        start journaling a publish
+
+        Prepares the journal to track steps for a new publish. If resuming
+        and an existing journal was generated for the same build hash, the
+        journal's steps are loaded and new steps are appended to it.
+        Otherwise, any existing journal is replaced.
+
+        Args:
+            build_hash: the hash of the build being published
+            resume (optional): whether to resume from an existing journal
+
+        Returns:
+            the number of completed steps loaded
+        """
+
+        with self._lock:
+            self.active = True
+            self._entries = {}
+
+            if resume and self._load(build_hash):
+                return len(self._entries)
+
+            try:
+                self.path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warn(f'failed to reset publish journal: {e}')
+
+            self._write({
+                'build': build_hash,
+            })
+
+        return 0
+
+    def _load(self, build_hash):
+        # load steps from an existing journal with a matching build hash
+        try:
+            with self.path.open(encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warn(f'failed to load publish journal: {e}')
+            return False
+
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+
+        if header.get('build') != build_hash:
+            logger.verbose('publish journal does not match build; ignoring')
+            return False
+
+        for line in lines[1:]:
+            # an interrupted run may have left a partially written step
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            self._entries[(entry['step'], entry['key'])] = entry['data']
+
+        # ensure new steps are not appended onto a partially written step
+        if not lines[-1].endswith('\n'):
+            try:
+                with self.path.open('a', encoding='utf-8') as f:
+                    f.write('\n')
+            except OSError as e:
+                logger.warn(f'failed to update publish journal: {e}')
+
+        return True
+
+    def _write(self, entry):
+        # append an entry into the journal file
+        try:
+            with self.path.open('a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        except OSError as e:
+            logger.warn(f'failed to update publish journal: {e}')
@@ -0,0 +1,437 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+from functools import wraps
+from multiprocessing import Manager
+from sphinxcontrib.confluencebuilder.trace import ConfluenceTrace
+import json
+import math
+import os
+import re
+import threading
+import time
+
+
+# path segments which are followed by a (non-numeric) key in an api endpoint
+KEYED_SEGMENTS = [
+    'label',
+    'longtask',
+    'property',
+    'space',
+]
+
+# latency percentiles to report for api requests
+PERCENTILES = [50, 90, 99]
+
+
+class ConfluenceMetrics:
+    def __init__(self):
+        """
+        confluence builder metrics
+
+        Tracks the time spent in each phase of a build (e.g. translating
+        documents or publishing pages). For each phase, the number of calls,
+        the total and maximum time of a call as well as the wall time (the
+        time where at least one call for a phase is active) are tracked. The
+        wall time helps report phases which are processed concurrently,
+        where the total time of all calls may exceed the build's runtime.
+        Requests made to a Confluence instance are also tracked (see
+        ``ConfluenceRequestMetrics``). Phases and requests can also be
+        tracked as spans in a trace (see ``ConfluenceTrace``).
+
+        Metrics can be exported into a ``scb-metrics.json`` file in a
+        project's output directory.
+        """
+
+        self.phases = {}
+        self.trace = ConfluenceTrace()
+        self.requests = ConfluenceRequestMetrics(self.trace)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._shared = None
+
+    def export(self, out_dir):
+        """
+        export the tracked metrics
+
+        When an export is requested, the metrics will be published into
+        a ``scb-metrics.json`` file into the project's output directory.
+
+        Args:
+            out_dir: the folder to output the metrics into
+        """
+
+        with self._lock:
+            phases = {}
+            for name, phase in self.phases.items():
+                phases[name] = {
+                    'calls': phase['calls'],
+                    'total': round(phase['total'], 6),
+                    'max': round(phase['max'], 6),
+                    'wall': round(phase['wall'], 6),
+                }
+
+        data = {
+            'type': 'SphinxConfluenceBuilder/Metrics',
+            'spec': 1,
+            'generated': datetime.now(timezone.utc).isoformat(),
+            'phases': phases,
+            'requests': self.requests.summary(),
+        }
+
+        metrics_path = out_dir / 'scb-metrics.json'
+        with metrics_path.open('w', encoding='utf-8') as fp:
+            json.dump(data, fp, indent=4)
+            fp.write('\n')
+
+    @contextmanager
+    def multiprocessing_tracking(self):
+        """
+        setup a context to help track phases when using multiprocessing
+
+        Provides a context where phases (and traced spans) tracked in other
+        processes (e.g. a parallel write of documents) are populated into a
+        multiprocessing Manager's list. Once the context is completed, the
+        phases tracked by other processes are merged into these metrics.
+        """
+
+        manager = Manager()
+        try:
+            self._shared = manager.list()
+            with self.trace.multiprocessing_tracking(manager.list()):
+                yield
+
+            shared = list(self._shared)
+            self._shared = None
+            self._merge_phases(shared)
+        finally:
+            self._shared = None
+            manager.shutdown()
+
+    @contextmanager
+    def track(self, name, **args):
+        """
+        track the time spent for a phase
+
+        Args:
+            name: the name of the phase
+            **args: additional details to include with a traced phase
+        """
+
+        start = time.perf_counter()
+
+        # phases tracked from another process are shared with this process
+        if os.getpid() != self._pid and self._shared is not None:
+            try:
+                yield
+            finally:
+                elapsed = time.perf_counter() - start
+                self._shared.append((name, start, elapsed))
+                self.trace.add(name, 'phase', start, elapsed, **args)
+            return
+
+        with self._lock:
+            phase = self._phase(name)
+            phase['calls'] += 1
+            phase['active'] += 1
+            if phase['active'] == 1:
+                phase['start'] = start
+
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            elapsed = end - start
+
+            with self._lock:
+                phase['active'] -= 1
+                phase['total'] += elapsed
+                phase['max'] = max(phase['max'], elapsed)
+                if phase['active'] == 0:
+                    phase['wall'] += end - phase['start']
+
+            self.trace.add(name, 'phase', start, elapsed, **args)
+
+    def _merge_phases(self, shared):
+        """
+        merge phases tracked by other processes
+
+        Args:
+            shared: list of phase name, start and elapsed time tuples
+        """
+
+        spans = {}
+        for name, start, elapsed in shared:
+            spans.setdefault(name, []).append((start, start + elapsed))
+
+        with self._lock:
+            for name, entries in spans.items():
+                phase = self._phase(name)
+                phase['calls'] += len(entries)
+
+                # (calls from multiple processes may overlap; only the time
+                # where at least one call is active counts as wall time)
+                wall_end = None
+                for start, end in sorted(entries):
+                    phase['total'] += end - start
+                    phase['max'] = max(phase['max'], end - start)
+
+                    if wall_end is None or start > wall_end:
+                        phase['wall'] += end - start
+                        wall_end = end
+                    elif end > wall_end:
+                        phase['wall'] += end - wall_end
+                        wall_end = end
+
+    def _phase(self, name):
+        """
+        return the tracked state of a phase (creating it if needed)
+
+        Args:
+            name: the name of the phase
+
+        Returns:
+            the phase
+        """
+
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = {
+                'active': 0,
+                'calls': 0,
+                'max': 0.,
+                'start': 0.,
+                'total': 0.,
+                'wall': 0.,
+            }
+
+        return phase
+
+
+class ConfluenceRequestMetrics:
+    def __init__(self, trace=None):
+        """
+        confluence request metrics
+
+        Tracks the requests made to a Confluence instance. For each request,
+        the number of bytes sent/received, the response's status code and
+        the request's latency are grouped by the (normalized) api endpoint
+        and the document being published when the request was made (if any).
+        Retried requests are also tracked against the endpoint being retried.
+
+        Args:
+            trace (optional): the trace to track request/wait spans into
+        """
+
+        self.documents = {}
+        self.endpoints = {}
+        self.trace = trace or ConfluenceTrace()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def document(self, docname):
+        """
+        track requests made on this thread against a document
+
+        Args:
+            docname: the name of the document
+        """
+
+        previous = getattr(self._local, 'docname', None)
+        self._local.docname = docname
+        try:
+            yield
+        finally:
+            self._local.docname = previous
+
+    def record(self, method, path, status, sent, received, latency):
+        """
+        record a request made to a confluence instance
+
+        Args:
+            method: the method of the request
+            path: the path of the request
+            status: the status code of the response (or ``None`` on error)
+            sent: the number of bytes sent
+            received: the number of bytes received
+            latency: the duration of the request (in seconds)
+        """
+
+        endpoint = f'{method} {normalize_endpoint(path)}'
+        docname = getattr(self._local, 'docname', None)
+        self._local.endpoint = endpoint
+
+        with self._lock:
+            entry = self.endpoints.get(endpoint)
+            if entry is None:
+                entry = self.endpoints[endpoint] = {
+                    'count': 0,
+                    'latencies': [],
+                    'received': 0,
+                    'retries': 0,
+                    'sent': 0,
+                    'status': Counter(),
+                }
+
+            entry['count'] += 1
+            entry['latencies'].append(latency)
+            entry['received'] += received
+            entry['sent'] += sent
+            entry['status'][str(status) if status else 'error'] += 1
+
+            if docname:
+                doc_entry = self.documents.setdefault(docname, {
+                    'count': 0,
+                    'received': 0,
+                    'sent': 0,
+                })
+                doc_entry['count'] += 1
+                doc_entry['received'] += received
+                doc_entry['sent'] += sent
+
+        args = {
+            'path': path,
+            'status': status or 'error',
+        }
+
+        if docname:
+            args['docname'] = docname
+
+        self.trace.add(endpoint, 'request',
+            time.perf_counter() - latency, latency, **args)
+
+    def retry(self):
+        """
+        record a retry of the last request made on this thread
+        """
+
+        endpoint = getattr(self._local, 'endpoint', None)
+        if not endpoint:
+            return
+
+        with self._lock:
+            self.endpoints[endpoint]['retries'] += 1
+
+    def wait(self, name, start, duration):
+        """
+        record a period where requests were delayed
+
+        Args:
+            name: the name of the wait (e.g. a rate-limit or retry delay)
+            start: the start of the wait (``time.perf_counter``)
+            duration: the duration of the wait (in seconds)
+        """
+
+        self.trace.add(name, 'wait', start, duration)
+
+    def summary(self):
+        """
+        build a summary of all tracked requests
+
+        Returns:
+            the summary
+        """
+
+        with self._lock:
+            endpoints = {}
+            for endpoint, entry in sorted(self.endpoints.items()):
+                latencies = sorted(entry['latencies'])
+                endpoints[endpoint] = {
+                    'count': entry['count'],
+                    'latency': {
+                        f'p{pct}': round(percentile(latencies, pct), 6)
+                        for pct in PERCENTILES
+                    },
+                    'received': entry['received'],
+                    'retries': entry['retries'],
+                    'sent': entry['sent'],
+                    'status': dict(sorted(entry['status'].items())),
+                }
+
+            documents = {k: dict(v) for k, v in sorted(self.documents.items())}
+
+        return {
+            'count': sum(v['count'] for v in endpoints.values()),
+            'received': sum(v['received'] for v in endpoints.values()),
+            'retries': sum(v['retries'] for v in endpoints.values()),
+            'sent': sum(v['sent'] for v in endpoints.values()),
+            'documents': documents,
+            'endpoints': endpoints,
+        }
+
+
+def normalize_endpoint(path):
+    """
+    normalize an api path into an endpoint
+
+    Converts an api path into an endpoint which can be used to group
+    similar requests. For example, the path ``content/123/property/key``
+    will be normalized to ``content/{id}/property/{key}``.
+
+    Args:
+        path: the path to normalize
+
+    Returns:
+        the endpoint
+    """
+
+    segments = path.split('?', 1)[0].strip('/').split('/')
+
+    normalized = []
+    for idx, segment in enumerate(segments):
+        if re.fullmatch(r'(att)?\d+', segment):
+            normalized.append('{id}')
+        elif idx and segments[idx - 1] in KEYED_SEGMENTS:
+            normalized.append('{key}')
+        else:
+            normalized.append(segment)
+
+    return '/'.join(normalized)
+
+
+def percentile(values, pct):
+    """
+    calculate a percentile of sorted values (nearest-rank)
+
+    Args:
+        values: the sorted values
+        pct: the percentile to calculate
+
+    Returns:
+        the percentile value
+    """
+
+    if not values:
+        return 0.
+
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def track_phase(name, docname_arg=None):
+    """
+    decorator to track the time spent in a builder's call as a phase
+
+    Args:
+        name: the name of the phase
+        docname_arg (optional): index of the call's document name argument
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            details = {}
+            if docname_arg is not None:
+                details['docname'] = args[docname_arg]
+
+            with self.metrics.track(name, **details):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
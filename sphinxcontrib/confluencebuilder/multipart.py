@@ -0,0 +1,134 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from pathlib import Path
+from urllib3.fields import RequestField
+import secrets
+
+
+# size of chunks read when streaming content from a file
+CHUNK_SIZE = 65536
+
+
+class MultipartStream:
+    """
+    streaming multipart form-data body
+
+    Provides a ``multipart/form-data`` request body which streams any file
+    content from disk as the body is read, instead of holding the entire
+    contents of a file in memory. The encoded body matches the encoding
+    performed by Requests for form data and files.
+
+    File entries are defined as a tuple of a filename, the content (either
+    bytes or a path to stream from) and a content type.
+
+    Args:
+        fields: form fields to include in the body
+        files: files to include in the body
+    """
+
+    def __init__(self, fields=None, files=None):
+        self.boundary = secrets.token_hex(16)
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+
+        self._parts = []
+        self._active = None
+        self._buffer = b''
+
+        for name, value in (fields or {}).items():
+            if value is None:
+                continue
+
+            data = value
+            if not isinstance(data, bytes):
+                data = str(data).encode('utf-8')
+
+            field = RequestField(name=name, data=data)
+            field.make_multipart()
+            self._add_field(field, data)
+
+        for name, (filename, content, mimetype) in (files or {}).items():
+            field = RequestField(name=name, data=content, filename=filename)
+            field.make_multipart(content_type=mimetype)
+            self._add_field(field, content)
+
+        self._parts.append(f'--{self.boundary}--\r\n'.encode('latin-1'))
+
+        self.len = sum(
+            part.stat().st_size if isinstance(part, Path) else len(part)
+            for part in self._parts
+        )
+
+        self._parts.reverse()
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def __len__(self):
+        return self.len
+
+    def close(self):
+        """
+        close any file being streamed
+        """
+
+        if self._active:
+            self._active.close()
+            self._active = None
+
+    def read(self, size=-1):
+        """
+        read a chunk of the body
+
+        Args:
+            size (optional): the maximum size of data to read
+
+        Returns:
+            the data
+        """
+
+        chunks = [self._buffer]
+        total = len(self._buffer)
+        self._buffer = b''
+
+        while size < 0 or total < size:
+            if self._active:
+                want = CHUNK_SIZE if size < 0 else size - total
+                chunk = self._active.read(want)
+                if chunk:
+                    chunks.append(chunk)
+                    total += len(chunk)
+                    continue
+
+                self.close()
+
+            if not self._parts:
+                break
+
+            part = self._parts.pop()
+            if isinstance(part, Path):
+                self._active = part.open('rb')
+            else:
+                chunks.append(part)
+                total += len(part)
+
+        data = b''.join(chunks)
+        if size >= 0 and len(data) > size:
+            self._buffer = data[size:]
+            data = data[:size]
+
+        return data
+
+    def _add_field(self, field, content):
+        header = f'--{self.boundary}\r\n'.encode('latin-1')
+        header += field.render_headers().encode('utf-8')
+
+        self._parts.append(header)
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        self._parts.append(content)
+        self._parts.append(b'\r\n')
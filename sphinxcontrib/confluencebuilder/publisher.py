@@ -7,7 +7,10 @@ See also:
     https://docs.atlassian.com/confluence/REST/latest/
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from sphinxcontrib.confluencebuilder.config.exceptions import ConfluenceConfigError
+from sphinxcontrib.confluencebuilder.concurrency import dependency_pool
+from sphinxcontrib.confluencebuilder.concurrency import traverse_pool
 from sphinxcontrib.confluencebuilder.debug import PublishDebug
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadServerUrlError
@@ -27,7 +30,7 @@ from sphinxcontrib.confluencebuilder.std.confluence import API_REST_V1
 from sphinxcontrib.confluencebuilder.std.confluence import API_REST_V2
 from sphinxcontrib.confluencebuilder.state import ConfluenceState
 from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
-from urllib.parse import parse_qsl
+from urllib.parse import parse_qs
 from urllib.parse import urlparse
 import contextlib
 import json
@@ -39,17 +42,31 @@ import time
 # (Confluence v2 APIs indicate a max of 250; a good enough number as any)
 BULK_LIMIT = 250
 
+# maximum number of identifiers to include in a single cql "in" clause
+CQL_IN_LIMIT = 100
+
+# interval (in seconds) between checks on the state of long tasks
+LONGTASK_POLL_INTERVAL = 0.5
+
+# maximum time (in seconds) to wait on a set of long tasks to complete
+LONGTASK_TIMEOUT = 10
+
 # key used for managing this extension's properties on a Confluence instance
 CB_PROP_KEY = 'sphinxcontrib.confluencebuilder'
 
 
 class ConfluencePublisher:
     def __init__(self):
+        self.request_metrics = None
         self.space_display_name = None
         self.space_id = None
         self.space_type = None
         self._ancestors_cache: set[int] = set()
+        self._attachment_index = {}
         self._name_cache = {}
+        self._page_index = None
+        self._page_versions = {}
+        self._parent_cache = {}
 
     def init(self, config):
         self.config = config
@@ -93,7 +110,7 @@ class ConfluencePublisher:
             rlog.setLevel(logging.DEBUG)
 
     def connect(self):
-        self.rest = Rest(self.config)
+        self.rest = Rest(self.config, metrics=self.request_metrics)
         server_url = self.config.confluence_server_url
 
         # if we have a scoped API token and are not used the newer API endpoint
@@ -190,71 +207,92 @@ class ConfluencePublisher:
             self.rest.close()
 
     def archive_page(self, page_id):
-        if self.dryrun:
-            self._dryrun('archive page', page_id)
-            return
+        longtask_id = self.submit_archive([page_id])
+        if longtask_id:
+            # wait for the archiving of the page to complete
+            for _ in self.wait_for_longtasks([longtask_id]):
+                pass
 
-        if self.onlynew:
-            self._onlynew('page archive restricted', page_id)
-            return
+    def archive_pages(self, page_ids):
+        # Note, multi-page archive can result in Confluence reporting the
+        # following message:
+        #  Cannot use bulk archive feature for non premium edition
+        self.submit_archive(page_ids)
 
-        try:
-            data = {
-                'pages': [{'id': page_id}],
-            }
+    def build_page_index(self):
+        """
+        build an index of all pages in the configured space
 
-            rsp = self.rest.post(f'{self.APIV1}content/archive', data)
-            longtask_id = rsp['id']
+        Queries the configured Confluence instance for all pages (current and
+        archived) in the configured space, building an index of page titles to
+        various page information (identifier, version, parent identifier and
+        status). Once an index has been built, page lookups by title will
+        first consult this index, where a page not found in the index will
+        be considered as not existing (avoiding a lookup request per page).
 
-            # wait for the archiving of the page to complete
-            MAX_WAIT_FOR_PAGE_ARCHIVE = 4  # ~2 seconds
-            attempt = 1
-            while attempt <= MAX_WAIT_FOR_PAGE_ARCHIVE:
-                time.sleep(0.5)
+        Returns:
+            the number of pages indexed
+        """
 
-                rsp = self.rest.get(f'{self.APIV1}longtask/{longtask_id}')
-                if rsp['finished']:
-                    break
+        page_index = {
+            'archived': {},
+            'current': {},
+        }
 
-                attempt += 1
-                if attempt > MAX_WAIT_FOR_PAGE_ARCHIVE:
-                    msg = 'timeout waiting for archive completion'
-                    raise ConfluenceBadApiError(-1, msg)
-        except ConfluencePermissionError as ex:
-            msg = (
-                'Publish user does not have permission to archive '
-                'from the configured space.'
-            )
-            raise ConfluencePermissionError(msg) from ex
+        search_fields = {}
+        if self.api_mode == 'v2':
+            api_endpoint = f'{self.APIV2}pages'
+            search_fields['space-id'] = self.space_id
+            search_fields['status'] = ['current', 'archived']
+        else:
+            api_endpoint = f'{self.APIV1}content/search'
+            search_fields['cql'] = f'space="{self.space_key}" and type=page'
+            search_fields['cqlcontext'] = json.dumps({
+                'contentStatuses': [
+                    'archived',
+                    'current',
+                ],
+            })
+            search_fields['expand'] = 'ancestors,version'
 
-    def archive_pages(self, page_ids):
-        if self.dryrun:
-            self._dryrun('archiving pages', ', '.join(page_ids))
-            return
+        # Configure a larger limit value than the default (no provided
+        # limit defaults to 25). This should reduce the number of queries
+        # needed to fetch a complete page set (for larger sets).
+        search_fields['limit'] = BULK_LIMIT
 
-        if self.onlynew:
-            self._onlynew('page archiving restricted', ', '.join(page_ids))
-            return
+        rsp = self.rest.get(api_endpoint, search_fields)
+        idx = 0
+        while rsp['results']:
+            for result in rsp['results']:
+                if self.api_mode == 'v2':
+                    parent_id = result.get('parentId')
+                else:
+                    ancestors = result.get('ancestors') or [{}]
+                    parent_id = ancestors[-1].get('id')
+
+                status = result.get('status', 'current')
+                page_index.setdefault(status, {})[result['title']] = {
+                    'id': result['id'],
+                    'parent': str(parent_id) if parent_id else None,
+                    'status': status,
+                    'version': result.get('version', {}).get('number'),
+                }
+                self._name_cache[result['id']] = result['title']
+                if parent_id:
+                    self._parent_cache[str(result['id'])] = str(parent_id)
 
-        try:
-            data = {
-                'pages': [],
-            }
+            # (an instance may return less than the requested limit for a
+            # page of results; rely on a next link/total to stop paging)
+            idx += len(rsp['results'])
+            next_fields = self._next_page_fields(rsp, search_fields, idx)
+            if not next_fields:
+                break
 
-            for page_id in page_ids:
-                data['pages'].append({'id': page_id})
+            rsp = self.rest.get(api_endpoint, next_fields)
 
-            # Note, multi-page archive can result in Confluence reporting the
-            # following message:
-            #  Cannot use bulk archive feature for non premium edition
-            self.rest.post(f'{self.APIV1}content/archive', data)
+        self._page_index = page_index
 
-        except ConfluencePermissionError as ex:
-            msg = (
-                'Publish user does not have permission to archive '
-                'from the configured space.'
-            )
-            raise ConfluencePermissionError(msg) from ex
+        return sum(len(entries) for entries in page_index.values())
 
     def delete_page_property(self, page_id, id_):
         """
@@ -333,7 +371,43 @@ class ConfluencePublisher:
 
         return base_page_id
 
-    def get_descendants(self, page_id, mode):
+    def get_cached_parent(self, page_id):
+        """
+        get the parent of a page from previously queried page information
+
+        Provides the parent identifier of a page which has been observed from
+        earlier requests (e.g. when searching for descendants with ancestors
+        or building a page index). No request is made to a Confluence
+        instance.
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            the parent page identifier; ``None`` if unknown
+        """
+
+        return self._parent_cache.get(str(page_id))
+
+    def get_cached_title(self, page_id):
+        """
+        get the title of a page from previously queried page information
+
+        Provides the title of a page which has been observed from earlier
+        requests (e.g. when searching for descendants). No request is made to
+        a Confluence instance.
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            the page title; ``None`` if unknown
+        """
+
+        return self._name_cache.get(page_id)
+
+    def get_descendants(self, page_id, mode, progress=None, *,
+            ancestors=False):
         """
         generate a list of descendants
 
@@ -371,19 +445,24 @@ class ConfluencePublisher:
         Args:
             page_id: the ancestor to search on (if not `None`)
             mode: the mode to search for descendants
+            progress (optional): callback to report progress on (aggressive)
+            ancestors (optional): whether to track the parent of each
+                                   descendant (see ``get_cached_parent``)
 
         Returns:
             the descendants
         """
 
         if 'aggressive' in mode:
-            descendants = self._get_descendants_aggressive(page_id, mode)
+            descendants = self._get_descendants_aggressive(
+                page_id, mode, progress=progress, ancestors=ancestors)
         else:
-            descendants = self._get_descendants(page_id, mode)
+            descendants = self._get_descendants(
+                page_id, mode, ancestors=ancestors)
 
         return descendants
 
-    def _get_descendants(self, page_id, mode):
+    def _get_descendants(self, page_id, mode, *, ancestors=False):
         """
         generate a list of descendants
 
@@ -393,6 +472,8 @@ class ConfluencePublisher:
         Args:
             page_id: the ancestor to search on (if not `None`)
             mode: the mode to search for descendants
+            ancestors (optional): whether to track the parent of each
+                                   descendant
 
         Returns:
             the descendants
@@ -416,6 +497,12 @@ class ConfluencePublisher:
         # needed to fetch a complete descendants set (for larger sets).
         search_fields['limit'] = BULK_LIMIT
 
+        # if requested, track the ancestors of each descendant to help cache
+        # the parent of each page (e.g. used to order the removal of legacy
+        # pages)
+        if ancestors:
+            search_fields['expand'] = 'ancestors'
+
         rsp = self.rest.get(api_endpoint, search_fields)
         idx = 0
         while rsp['results']:
@@ -423,11 +510,14 @@ class ConfluencePublisher:
                 descendants.add(result['id'])
                 self._name_cache[result['id']] = result['title']
 
-            count = len(rsp['results'])
-            if count != BULK_LIMIT:
-                break
+                result_ancestors = result.get('ancestors')
+                if result_ancestors:
+                    self._parent_cache[str(result['id'])] = \
+                        str(result_ancestors[-1]['id'])
 
-            idx += count
+            # (an instance may return less than the requested limit for a
+            # page of results; rely on a next link/total to stop paging)
+            idx += len(rsp['results'])
             next_fields = self._next_page_fields(rsp, search_fields, idx)
             if not next_fields:
                 break
@@ -436,7 +526,8 @@ class ConfluencePublisher:
 
         return descendants
 
-    def _get_descendants_aggressive(self, page_id, mode):
+    def _get_descendants_aggressive(self, page_id, mode, progress=None, *,
+            ancestors=False):
         """
         generate a list of descendants (aggressive)
 
@@ -450,23 +541,33 @@ class ConfluencePublisher:
         cache corruption). This search can be extremely slow for large document
         sets.
 
+        Pages are searched on breadth-first, where searches for multiple
+        pages can be performed concurrently when more than one publish
+        worker is configured (see ``confluence_publish_workers``).
+
         Args:
             page_id: the ancestor to search on (if not `None`)
             mode: the mode to search for descendants
+            progress (optional): callback to report searches/pages found
+            ancestors (optional): whether to track the parent of each
+                                   descendant
 
         Returns:
             the descendants
         """
         visited_pages = set()
+        workers = self.config.confluence_publish_workers or 1
 
-        def find_legacy_pages(page_id, pages):
-            descendants = self._get_descendants(page_id, mode)
-            for descendant in descendants:
-                if descendant not in pages:
-                    pages.add(descendant)
-                    find_legacy_pages(descendant, pages)
+        def search(target_id):
+            return self._get_descendants(target_id, mode, ancestors=ancestors)
+
+        results = traverse_pool(search, [page_id], workers)
+        for searched, (_, descendants) in enumerate(results, 1):
+            visited_pages.update(descendants)
+
+            if progress:
+                progress(searched, len(visited_pages))
 
-        find_legacy_pages(page_id, visited_pages)
         return visited_pages
 
     def get_attachment(self, page_id, name):
@@ -518,38 +619,88 @@ class ConfluencePublisher:
             dictionary of attachment identifiers to their respective names
         """
         attachment_info = {}
+        page_attachments = {}
 
-        if self.api_mode == 'v2':
-            url = f'{self.APIV2}pages/{page_id}/attachments'
-        else:
-            url = f'{self.APIV1}content/{page_id}/child/attachment'
+        for attachment in self._list_attachments(page_id):
+            attachment_info[attachment['id']] = attachment['title']
+            page_attachments[attachment['title']] = attachment
 
-        search_fields = {}
+        # track the listing to help avoid re-querying for this page's
+        # attachments when publishing attachments
+        self._attachment_index[str(page_id)] = page_attachments
 
-        # Configure a larger limit value than the default (no provided
-        # limit defaults to 25). This should reduce the number of queries
-        # needed to fetch a complete attachment set (for larger sets).
-        search_fields['limit'] = BULK_LIMIT
+        return attachment_info
 
-        rsp = self.rest.get(url, search_fields)
-        idx = 0
-        while rsp['results']:
-            for result in rsp['results']:
-                attachment_info[result['id']] = result['title']
-                self._name_cache[result['id']] = result['title']
+    def get_attachments_bulk(self, page_ids, mode='search'):
+        """
+        get all known attachments for a series of page ids
 
-            count = len(rsp['results'])
-            if count != BULK_LIMIT:
-                break
+        Query the configured Confluence instance for all attachments held by
+        the provided pages. Instead of listing attachments for each page, this
+        call will search for attachments contained in groups of pages; which
+        can reduce the number of requests needed to discover attachments for
+        a large set of pages.
 
-            idx += count
-            next_fields = self._next_page_fields(rsp, search_fields, idx)
-            if not next_fields:
-                break
+        Note that attachments found using a search are not tracked for the
+        publishing of attachments (unlike ``get_attachments``), since a search
+        index may not yet reflect recent changes made to a page. When using a
+        ``direct`` mode, the attachments of each page are listed instead of
+        being searched for (avoiding results from a stale search index).
 
-            rsp = self.rest.get(url, next_fields)
+        Args:
+            page_ids: the page identifiers
+            mode (optional): the mode to search for attachments
 
-        return attachment_info
+        Returns:
+            dictionary of page identifiers to a dictionary of attachment
+            identifiers to their respective names
+        """
+
+        page_ids = sorted({str(page_id) for page_id in page_ids})
+        attachments = {page_id: {} for page_id in page_ids}
+
+        if 'direct' in mode:
+            for page_id in page_ids:
+                for attachment in self._list_attachments(page_id):
+                    attachments[page_id][attachment['id']] = \
+                        attachment['title']
+
+            return attachments
+
+        api_endpoint = f'{self.APIV1}content/search'
+
+        for offset in range(0, len(page_ids), CQL_IN_LIMIT):
+            chunk = page_ids[offset:offset + CQL_IN_LIMIT]
+
+            search_fields = {
+                'cql': f'type=attachment and container in ({",".join(chunk)})',
+                'expand': 'container',
+                # Configure a larger limit value than the default (no provided
+                # limit defaults to 25). This should reduce the number of
+                # queries needed to fetch a complete attachment set.
+                'limit': BULK_LIMIT,
+            }
+
+            rsp = self.rest.get(api_endpoint, search_fields)
+            idx = 0
+            while rsp['results']:
+                for result in rsp['results']:
+                    container_id = str(result['container']['id'])
+                    if container_id in attachments:
+                        attachments[container_id][result['id']] = \
+                            result['title']
+                    self._name_cache[result['id']] = result['title']
+
+                # (an instance may return less than the requested limit for a
+                # page of results; rely on a next link/total to stop paging)
+                idx += len(rsp['results'])
+                next_fields = self._next_page_fields(rsp, search_fields, idx)
+                if not next_fields:
+                    break
+
+                rsp = self.rest.get(api_endpoint, next_fields)
+
+        return attachments
 
     def get_page(self, page_name, expand='version', status='current'):
         """
@@ -571,6 +722,12 @@ class ConfluencePublisher:
         page = None
         page_id = None
 
+        # if a page index is available and the page is not known to exist,
+        # there is no need to query the instance for the page
+        if self._page_index is not None:
+            if page_name not in self._page_index.get(status, {}):
+                return page_id, page
+
         if self.api_mode == 'v2':
             rsp = self.rest.get(f'{self.APIV2}pages', {
                 'body-format': 'storage',
@@ -616,19 +773,30 @@ class ConfluencePublisher:
             metadata = page.setdefault('metadata', {})
             meta_props = metadata.setdefault('properties', {})
 
-            if 'ancestors' in opts:
+            def fetch_ancestors():
                 rsp = self.rest.get(f'{self.APIV2}pages/{page_id}/ancestors', {
                     'limit': BULK_LIMIT,
                 })
                 page['ancestors'] = rsp['results']
 
-            if 'metadata.labels' in opts:
+            def fetch_labels():
                 rsp = self.rest.get(f'{self.APIV2}pages/{page_id}/labels', {
                     'limit': BULK_LIMIT,
                 })
 
                 metadata['labels'] = rsp
 
+            def fetch_properties():
+                props = self._get_page_properties(page_id, props_to_fetch)
+                meta_props.update(props)
+
+            fetch_requests = []
+            if 'ancestors' in opts:
+                fetch_requests.append(fetch_ancestors)
+
+            if 'metadata.labels' in opts:
+                fetch_requests.append(fetch_labels)
+
             props_to_fetch = []
 
             # if certain properties are request, ensure we generate a
@@ -641,9 +809,21 @@ class ConfluencePublisher:
             if 'metadata.properties.editor' in opts:
                 props_to_fetch.append('editor')
 
-            for prop_key in props_to_fetch:
-                prop_entry = self.get_page_property(page_id, prop_key)
-                meta_props[prop_key] = prop_entry
+            if f'metadata.properties.{CB_PROP_KEY}' in opts:
+                props_to_fetch.append(CB_PROP_KEY)
+
+            if props_to_fetch:
+                fetch_requests.append(fetch_properties)
+
+            # perform any emulated expansion requests concurrently
+            if len(fetch_requests) > 1:
+                with ThreadPoolExecutor(len(fetch_requests)) as executor:
+                    futures = [executor.submit(req) for req in fetch_requests]
+                    for future in futures:
+                        future.result()
+            else:
+                for req in fetch_requests:
+                    req()
 
         self._crude_publish_point_track(page)
         return page_id, page
@@ -679,6 +859,22 @@ class ConfluencePublisher:
 
         return page_id, page
 
+    def get_page_version(self, page_id):
+        """
+        get the known version of a page stored by this publisher
+
+        Returns the version of a page last stored (or confirmed unchanged)
+        by this publisher instance. No request is made to the Confluence
+        instance.
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            the page version or ``None``
+        """
+        return self._page_versions.get(page_id)
+
     def get_page_case_insensitive(self, page_name):
         """
         get page information with the provided page name (case-insensitive)
@@ -688,7 +884,7 @@ class ConfluencePublisher:
         off a provided name since the exact casing is not known. This call will
         perform a CQL search for similar pages (using the `~` hint), which each
         will be cycled through for a matching instance to the provided page
-        name.
+        name. If a page index has been built, only the index is consulted.
 
         Args:
             page_name: the page name
@@ -700,6 +896,16 @@ class ConfluencePublisher:
         page_id = None
 
         page_name = page_name.lower()
+
+        # if a page index is available, check for a matching page title (where
+        # a page not found in the index is considered as not existing)
+        if self._page_index is not None:
+            for title in self._page_index['current']:
+                if page_name == title.lower():
+                    return self.get_page(title)
+
+            return page_id, page
+
         search_fields = {'cql': 'space="' + self.space_key +
             '" and type=page and title~"' + page_name + '"'}
         search_fields['limit'] = BULK_LIMIT
@@ -787,7 +993,7 @@ class ConfluencePublisher:
         Args:
             page_id: the identifier of the page to attach to
             name: the attachment name
-            data: the attachment data
+            data: the attachment data (or a path to stream the data from)
             mimetype: the mime type of this attachment
             hash_: the hash of the attachment
             force (optional): force publishing if exists (defaults to False)
@@ -801,7 +1007,16 @@ class ConfluencePublisher:
         if self.dryrun:
             attachment = None
         else:
-            _, attachment = self.get_attachment(page_id, name)
+            # fetch all attachments for this page once, to avoid querying
+            # for each individual attachment being published
+            page_attachments = self._attachment_index.get(str(page_id))
+            if page_attachments is None:
+                page_attachments = {
+                    v['title']: v for v in self._list_attachments(page_id)
+                }
+                self._attachment_index[str(page_id)] = page_attachments
+
+            attachment = page_attachments.get(name)
 
         # check if attachment (of same hash) is already published to this page
         comment = None
@@ -860,6 +1075,7 @@ class ConfluencePublisher:
                     rsp = self.rest.post(
                         url, None, form_data=form_data, files=files)
                     uploaded_attachment_id = rsp['results'][0]['id']
+                    page_attachments[name] = rsp['results'][0]
                 except ConfluenceBadApiError as ex:
                     # file type restricted? generate a warning
                     #
@@ -898,6 +1114,8 @@ class ConfluencePublisher:
                     logger.info('attachment failure (503); retrying...')
                     time.sleep(0.5)
                     _, attachment = self.get_attachment(page_id, name)
+                    if attachment:
+                        page_attachments[name] = attachment
 
             if attachment:
                 url = '{}content/{}/child/attachment/{}/data'.format(
@@ -905,6 +1123,7 @@ class ConfluencePublisher:
                 rsp = self.rest.post(
                     url, None, form_data=form_data, files=files)
                 uploaded_attachment_id = rsp['id']
+                page_attachments[name] = rsp
 
             if not self.watch:
                 self.rest.delete(f'{self.APIV1}user/watch/content',
@@ -967,6 +1186,8 @@ class ConfluencePublisher:
             expand += ',metadata.properties.content_appearance_published'
         if data.get('editor'):
             expand += ',metadata.properties.editor'
+        if self.api_mode == 'v2':
+            expand += f',metadata.properties.{CB_PROP_KEY}'
 
         _, page = self.get_page(page_name, expand=expand)
 
@@ -981,6 +1202,9 @@ class ConfluencePublisher:
                     self.remove_page(page['id'])
                 except ConfluenceError as ex:
                     logger.warn(f'failed archive clean ("{page_name}"): {ex}')
+                else:
+                    if self._page_index is not None:
+                        self._page_index['archived'].pop(page_name, None)
                 page = None
 
         # if a page was found, verify we are allowed to publish
@@ -988,8 +1212,14 @@ class ConfluencePublisher:
             return page['id'], False
 
         # fetch known properties (associated with this extension) from the page
+        # (if not already fetched with the page)
         page_id = page['id'] if page else None
-        cb_props = self.get_page_property(page_id, CB_PROP_KEY, default={})
+        meta_props = page.get('metadata', {}).get('properties', {}) if page else {}
+        cb_props = meta_props.get(CB_PROP_KEY)
+        if cb_props is None:
+            cb_props = self.get_page_property(page_id, CB_PROP_KEY, default={})
+        elif cb_props['value'] is None:
+            cb_props['value'] = {}
 
         # determine current/next page versions
         if page:
@@ -1058,6 +1288,7 @@ class ConfluencePublisher:
             remote_hash = cb_props['value'].get('hash')
             if current_page_hash == remote_hash:
                 logger.verbose(f'no changes in page: {page_name}')
+                self._page_versions[page['id']] = current_page_version
                 return page['id'], False
 
         # check for inlined comments
@@ -1200,6 +1431,17 @@ class ConfluencePublisher:
 
         # perform any required post-page update actions
         self._post_page_actions(uploaded_page_id, cb_props)
+        self._page_versions[uploaded_page_id] = next_page_version
+
+        # track this page in the page index (if any), to ensure future lookups
+        # for this page are still performed
+        if self._page_index is not None:
+            self._page_index['current'][page_name] = {
+                'id': uploaded_page_id,
+                'parent': str(parent_id) if parent_id else None,
+                'status': 'current',
+                'version': next_page_version,
+            }
 
         return uploaded_page_id, not bool(page)
 
@@ -1428,6 +1670,12 @@ class ConfluencePublisher:
             )
             raise ConfluencePermissionError(msg) from ex
 
+        # drop any indexed entry for the removed attachment
+        for page_attachments in self._attachment_index.values():
+            for name, attachment in list(page_attachments.items()):
+                if str(attachment['id']) == str(id_):
+                    del page_attachments[name]
+
     def remove_page(self, page_id):
         if self.dryrun:
             self._dryrun('removing page', page_id)
@@ -1460,6 +1708,8 @@ class ConfluencePublisher:
             )
             raise ConfluencePermissionError(msg) from ex
 
+        self._attachment_index.pop(str(page_id), None)
+
     def restrict_ancestors(self, ancestors: set[int]):
         """
         restrict the provided ancestors from being changed
@@ -1475,6 +1725,45 @@ class ConfluencePublisher:
         """
         self._ancestors_cache = ancestors
 
+    def submit_archive(self, page_ids):
+        """
+        request to archive a series of pages
+
+        Makes a request to a Confluence instance to archive the provided
+        pages. Confluence will archive the pages in a long task, where
+        the returned long task identifier can be used to wait for the
+        archiving to complete (see ``wait_for_longtasks``).
+
+        Args:
+            page_ids: the pages to archive
+
+        Returns:
+            the long task identifier; ``None`` if no request was made
+        """
+
+        if self.dryrun:
+            self._dryrun('archiving pages', ', '.join(page_ids))
+            return None
+
+        if self.onlynew:
+            self._onlynew('page archiving restricted', ', '.join(page_ids))
+            return None
+
+        try:
+            data = {
+                'pages': [{'id': page_id} for page_id in page_ids],
+            }
+
+            rsp = self.rest.post(f'{self.APIV1}content/archive', data)
+        except ConfluencePermissionError as ex:
+            msg = (
+                'Publish user does not have permission to archive '
+                'from the configured space.'
+            )
+            raise ConfluencePermissionError(msg) from ex
+
+        return rsp.get('id')
+
     def update_space_home(self, page_id):
         if not page_id:
             return
@@ -1505,6 +1794,53 @@ class ConfluencePublisher:
             )
             raise ConfluencePermissionError(msg) from ex
 
+    def wait_for_longtasks(self, longtask_ids, timeout=None):
+        """
+        wait for a series of long tasks to complete
+
+        Polls the configured Confluence instance for the state of each
+        provided long task, until all long tasks have finished. Outstanding
+        long tasks are checked together (concurrently, when more than one
+        publish worker is configured), where the timeout applies to the
+        entire set of long tasks (i.e. waiting on many long tasks takes
+        roughly as long as the slowest long task).
+
+        Args:
+            longtask_ids: the long tasks to wait on
+            timeout (optional): the maximum time to wait (in seconds)
+
+        Yields:
+            each long task identifier, as each long task finishes
+        """
+
+        outstanding = list(dict.fromkeys(longtask_ids))
+        workers = self.config.confluence_publish_workers or 1
+
+        if timeout is None:
+            timeout = LONGTASK_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        def check(longtask_id):
+            rsp = self.rest.get(f'{self.APIV1}longtask/{longtask_id}',
+                cache=False)
+            return rsp['finished']
+
+        while outstanding:
+            time.sleep(LONGTASK_POLL_INTERVAL)
+
+            pending = []
+            for longtask_id, finished in dependency_pool(
+                    check, outstanding, workers):
+                if finished:
+                    yield longtask_id
+                else:
+                    pending.append(longtask_id)
+
+            outstanding = [v for v in outstanding if v in pending]
+            if outstanding and time.monotonic() >= deadline:
+                msg = 'timeout waiting for long task completion'
+                raise ConfluenceBadApiError(-1, msg)
+
     def _build_page(self, page_name, data):
         """
         build a page entity used for a new or updated page event
@@ -1639,6 +1975,101 @@ class ConfluencePublisher:
 
         return True
 
+    def _get_page_properties(self, page_id, keys):
+        """
+        get multiple properties from the provided page id
+
+        Performs a (v2) API call to acquire all properties held on a specific
+        page, returning the entries for each requested key. Properties that do
+        not exist will be populated with a value of ``None``.
+
+        Args:
+            page_id: the page identifier
+            keys: the property keys
+
+        Returns:
+            dictionary of property keys to property entries
+        """
+
+        props = {key: {'key': key, 'value': None} for key in keys}
+        if props:
+            prop_path = f'{self.APIV2}pages/{page_id}/properties'
+
+            search_fields = {
+                'limit': BULK_LIMIT,
+            }
+
+            # if only a single property is needed, let the instance filter it
+            if len(props) == 1:
+                search_fields['key'] = next(iter(props))
+
+            rsp = self.rest.get(prop_path, search_fields)
+            idx = 0
+            found = set()
+            while rsp['results']:
+                for result in rsp['results']:
+                    key = result.get('key')
+                    if key in props and key not in found:
+                        props[key] = result
+                        found.add(key)
+
+                # stop once all properties are found; otherwise, rely on a
+                # next link/total to stop paging (since an instance may return
+                # less than the requested limit for a page of results)
+                if len(found) == len(props):
+                    break
+
+                idx += len(rsp['results'])
+                next_fields = self._next_page_fields(rsp, search_fields, idx)
+                if not next_fields:
+                    break
+
+                rsp = self.rest.get(prop_path, next_fields)
+
+        return props
+
+    def _list_attachments(self, page_id):
+        """
+        list all attachments (and their metadata) for a provided page id
+
+        Args:
+            page_id: the page identifier
+
+        Returns:
+            list of attachment objects
+        """
+        attachments = []
+
+        if self.api_mode == 'v2':
+            url = f'{self.APIV2}pages/{page_id}/attachments'
+        else:
+            url = f'{self.APIV1}content/{page_id}/child/attachment'
+
+        search_fields = {}
+
+        # Configure a larger limit value than the default (no provided
+        # limit defaults to 25). This should reduce the number of queries
+        # needed to fetch a complete attachment set (for larger sets).
+        search_fields['limit'] = BULK_LIMIT
+
+        rsp = self.rest.get(url, search_fields)
+        idx = 0
+        while rsp['results']:
+            for result in rsp['results']:
+                attachments.append(result)
+                self._name_cache[result['id']] = result['title']
+
+            # (an instance may return less than the requested limit for a
+            # page of results; rely on a next link/total to stop paging)
+            idx += len(rsp['results'])
+            next_fields = self._next_page_fields(rsp, search_fields, idx)
+            if not next_fields:
+                break
+
+            rsp = self.rest.get(url, next_fields)
+
+        return attachments
+
     def _manage_inlined_comments(self, page, page_name, data):
         """
         manage inlined comments for a page update
@@ -1738,7 +2169,9 @@ class ConfluencePublisher:
             if next_query:
                 try:
                     parsed = urlparse(next_query)
-                    return dict(parse_qsl(parsed.query))
+                    # (retain all values of any repeated parameter)
+                    return {k: v if len(v) > 1 else v[-1]
+                        for k, v in parse_qs(parsed.query).items()}
                 except ValueError:
                     return None
 
@@ -0,0 +1,244 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from collections import deque
+from contextlib import suppress
+from datetime import datetime
+from datetime import timezone
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_LIMIT
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_NEAR_LIMIT
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_REMAINING
+from sphinxcontrib.confluencebuilder.std.confluence import RSP_HEADER_RATELIMIT_RESET
+import threading
+import time
+
+
+# the minimum rate (requests per second) a governor will throttle down to
+MIN_RATE = 0.2
+
+# the rate (requests per second) where a governor will stop throttling
+MAX_RATE = 50
+
+# the factor to apply to a rate when a request has been rate limited
+THROTTLE_FACTOR = 0.5
+
+# the factor to apply to a rate when a near-limit state has been reported
+NEAR_LIMIT_FACTOR = 0.8
+
+# the ratio of remaining requests (from a limit) to consider being near a limit
+NEAR_LIMIT_RATIO = 0.2
+
+# the rate increase (requests per second) to apply after a successful request
+RECOVER_STEP = 0.05
+
+# the duration (in seconds) to measure an observed request rate over
+RATE_WINDOW = 10
+
+
+class RateGovernor:
+    """
+    rate governor for rest requests
+
+    A governor is used to pace requests made to a Confluence instance. It
+    is shared by every request made by a REST client (including requests
+    made from multiple threads). A governor starts in an unlimited state.
+    When an instance reports a client is being (or near being) rate limited,
+    the governor will apply a token bucket limit derived from the observed
+    request rate and any rate limit details reported by an instance. The
+    rate is slowly increased for each successful request, until the
+    governor returns to an unlimited state.
+    """
+
+    def __init__(self):
+        self._history = deque()
+        self._lock = threading.Lock()
+        self._paused_until = 0
+        self._rate = None
+        self._tokens = 0
+        self._updated = 0
+
+    @property
+    def rate(self):
+        """
+        the active rate (requests per second) or ``None`` if unlimited
+        """
+        return self._rate
+
+    def acquire(self):
+        """
+        wait until a request is permitted to be made
+
+        Returns:
+            the duration (in seconds) waited
+        """
+
+        waited = 0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+
+                if delay <= 0 and self._rate:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                    else:
+                        delay = (1 - self._tokens) / self._rate
+
+                if delay <= 0:
+                    self._history.append(now)
+                    while self._history[0] < now - RATE_WINDOW:
+                        self._history.popleft()
+                    return waited
+
+            time.sleep(delay)
+            waited += delay
+
+    def observe(self, headers):
+        """
+        observe rate limit details reported by an instance
+
+        Args:
+            headers: the response headers
+        """
+
+        near_limit = headers.get(RSP_HEADER_RATELIMIT_NEAR_LIMIT)
+        near_limit = str(near_limit).lower() == 'true'
+
+        limit = None
+        remaining = None
+        with suppress(TypeError, ValueError):
+            limit = int(headers.get(RSP_HEADER_RATELIMIT_LIMIT))
+        with suppress(TypeError, ValueError):
+            remaining = int(headers.get(RSP_HEADER_RATELIMIT_REMAINING))
+
+        if remaining is not None and limit:
+            near_limit |= remaining < limit * NEAR_LIMIT_RATIO
+
+        if not near_limit:
+            return
+
+        # if we know when limits reset, spread the remaining requests over
+        # the remaining window; otherwise, just ease off the active rate
+        window = _parse_reset(headers.get(RSP_HEADER_RATELIMIT_RESET))
+        if remaining is not None and window and window > 0:
+            self._update(max(remaining, 1) / window, 'near limit')
+        else:
+            with self._lock:
+                rate = (self._rate or self._measured()) * NEAR_LIMIT_FACTOR
+            self._update(rate, 'near limit')
+
+    def pause(self, delay):
+        """
+        pause all requests for a given duration
+
+        Args:
+            delay: the duration (in seconds) to pause for
+        """
+
+        with self._lock:
+            target = time.monotonic() + delay
+            self._paused_until = max(self._paused_until, target)
+
+    def pending(self):
+        """
+        return the remaining duration of an active pause (if any)
+
+        Returns:
+            the duration (in seconds)
+        """
+
+        with self._lock:
+            return max(self._paused_until - time.monotonic(), 0)
+
+    def recover(self):
+        """
+        notify the governor that a request has succeeded
+        """
+
+        with self._lock:
+            if not self._rate:
+                return
+
+            self._refill(time.monotonic())
+            self._rate += RECOVER_STEP
+            if self._rate < MAX_RATE:
+                return
+
+            self._rate = None
+
+        logger.verbose('rate-limit governor: unlimited')
+
+    def throttle(self):
+        """
+        notify the governor that a request has been rate limited
+        """
+
+        with self._lock:
+            rate = (self._rate or self._measured()) * THROTTLE_FACTOR
+        self._update(rate, 'rate limited')
+
+    def _measured(self):
+        # the observed rate of requests over the most recent window
+        if len(self._history) < 2:
+            return 1
+
+        span = max(self._history[-1] - self._history[0], 1)
+        return len(self._history) / span
+
+    def _refill(self, now):
+        # add tokens accumulated since the last update
+        burst = max(self._rate, 1)
+        elapsed = now - self._updated
+        self._tokens = min(self._tokens + elapsed * self._rate, burst)
+        self._updated = now
+
+    def _update(self, rate, reason):
+        # apply a new (lower) rate limit
+        with self._lock:
+            rate = max(rate, MIN_RATE)
+            if self._rate and rate >= self._rate:
+                return
+
+            now = time.monotonic()
+            if self._rate:
+                self._refill(now)
+            else:
+                self._tokens = 1
+                self._updated = now
+            self._rate = rate
+
+        logger.verbose(f'rate-limit governor ({reason}): '
+                       f'{rate:.2f} requests/second')
+
+
+def _parse_reset(value):
+    """
+    parse a rate limit reset value into a duration
+
+    Args:
+        value: the header value
+
+    Returns:
+        the duration (in seconds) until a reset, or ``None``
+    """
+
+    if not value:
+        return None
+
+    # either a number of seconds until a reset or an epoch timestamp
+    with suppress(ValueError):
+        reset = float(value)
+        if reset > time.time() / 2:
+            return reset - time.time()
+        return reset
+
+    # or an iso-8601 timestamp
+    with suppress(ValueError):
+        reset = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if not reset.tzinfo:
+            reset = reset.replace(tzinfo=timezone.utc)
+        return (reset - datetime.now(timezone.utc)).total_seconds()
+
+    return None
@@ -4,7 +4,9 @@
 from email.utils import mktime_tz
 from email.utils import parsedate_tz
 from functools import wraps
+from pathlib import Path
 from requests.adapters import HTTPAdapter
+from sphinxcontrib.confluencebuilder.cache import ResponseCache
 from sphinxcontrib.confluencebuilder.debug import FILTERED_HEADERS
 from sphinxcontrib.confluencebuilder.debug import PublishDebug
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceAuthenticationFailedUrlError
@@ -18,6 +20,8 @@ from sphinxcontrib.confluencebuilder.exceptions import ConfluenceSeraphAuthentic
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceSslError
 from sphinxcontrib.confluencebuilder.exceptions import ConfluenceTimeoutError
 from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger as logger
+from sphinxcontrib.confluencebuilder.multipart import MultipartStream
+from sphinxcontrib.confluencebuilder.ratelimit import RateGovernor
 from sphinxcontrib.confluencebuilder.retry import API_NORETRY_ERRORS
 from sphinxcontrib.confluencebuilder.retry import API_RETRY_ERRORS
 from sphinxcontrib.confluencebuilder.std.confluence import NOCHECK
@@ -144,9 +148,14 @@ def confluence_error_retries():
 
                     # wait the calculated delay before retrying again
                     reported_delay = math.ceil(delay)
+                    if self.metrics:
+                        self.metrics.retry()
                     logger.info('unexpected rest response detected; '
                                 f'retrying in {reported_delay} seconds...')
+                    start = time.perf_counter()
                     time.sleep(delay)
+                    if self.metrics:
+                        self.metrics.wait('retry wait', start, delay)
                     attempt += 1
 
         return _wrapper
@@ -168,38 +177,42 @@ def rate_limited_retries():
                 delay = self.config.confluence_publish_delay
                 logger.verbose('user-set api delay set; '
                                f'waiting {math.ceil(delay)} seconds...')
+                start = time.perf_counter()
                 time.sleep(delay)
-
-            # if confluence asked us to wait so many seconds before a next
-            # api request, wait a moment
-            if self.next_delay:
-                delay = self.next_delay
-                logger.verbose('rate-limit header detected; '
-                               f'waiting {math.ceil(delay)} seconds...')
-                time.sleep(delay)
-                self.next_delay = None
-
-            # if we have imposed some rate-limiting requests where confluence
-            # did not provide retry information, slowly decrease our tracked
-            # delay if requests are going through
-            self.last_retry = max(self.last_retry / 2, 1)
+                if self.metrics:
+                    self.metrics.wait('publish delay', start, delay)
 
             attempt = 1
+            last_retry = 1
             while True:
+                # wait until the governor permits a request to be made; this
+                # is shared with all requests (including other threads), which
+                # may be paced/paused if confluence is limiting requests
+                start = time.perf_counter()
+                delay = self.governor.acquire()
+                if delay and self.metrics:
+                    # (waits after being rate limited are retry waits)
+                    name = 'retry wait' if attempt > 1 else 'rate-limit wait'
+                    self.metrics.wait(name, start, delay)
+                if delay >= 1:
+                    logger.verbose('rate-limit governor delayed request; '
+                                   f'waited {math.ceil(delay)} seconds')
+
                 try:
-                    return func(self, *args, **kwargs)
-                except ConfluenceRateLimitedError:  # noqa: PERF203
+                    rv = func(self, *args, **kwargs)
+                except ConfluenceRateLimitedError:
                     # if max attempts have been reached, stop any more attempts
                     if attempt > RATE_LIMITED_MAX_RETRIES:
                         raise
 
+                    # slow down the rate of all requests being made
+                    self.governor.throttle()
+
                     # determine the amount of delay to wait again -- either
                     # from the provided delay (if any) or exponential backoff
-                    if self.next_delay:
-                        delay = self.next_delay
-                        self.next_delay = None
-                    else:
-                        delay = 2 * self.last_retry
+                    delay = self.governor.pending()
+                    if not delay:
+                        delay = 2 * last_retry
 
                     # cap delay to a maximum
                     delay = min(delay, RATE_LIMITED_MAX_RETRY_DURATION)
@@ -208,11 +221,16 @@ def rate_limited_retries():
                     delay += random.uniform(0.3, 1.3)  # noqa: S311
 
                     # wait the calculated delay before retrying again
+                    if self.metrics:
+                        self.metrics.retry()
                     logger.info('rate-limit response detected; '
                                 f'waiting {math.ceil(delay)} seconds...')
-                    time.sleep(delay)
-                    self.last_retry = delay
+                    self.governor.pause(delay)
+                    last_retry = delay
                     attempt += 1
+                else:
+                    self.governor.recover()
+                    return rv
 
         return _wrapper
     return _decorator
@@ -244,17 +262,21 @@ def requests_exception_wrappers():
 class Rest:
     CONFLUENCE_DEFAULT_ENCODING = 'utf-8'
 
-    def __init__(self, config):
+    def __init__(self, config, metrics=None):
         self.config = config
-        self.last_retry = 1
-        self.next_delay = None
+        self.governor = RateGovernor()
+        self.metrics = metrics
         self.url = config.confluence_server_url
         self.scb_version = sphinxcontrib.confluencebuilder.__version__
         self.session = None
         self.timeout = config.confluence_timeout
         self.verbosity = config.sphinx_verbosity
+        self._cache = None
         self._reported_large_delay = False
 
+        if config.confluence_publish_cache_ttl:
+            self._cache = ResponseCache(config.confluence_publish_cache_ttl)
+
         self.session = self._setup_session(config)
 
     def __del__(self):
@@ -318,11 +340,36 @@ class Rest:
 
         return session
 
+    def get(self, path, params=None, *, url=None, cache=True):
+        if not self._cache or not cache:
+            json_data, _, _ = self._get(path, params=params, url=url)
+            return json_data
+
+        base_url = url or self.url
+        key = (base_url, path, tuple(sorted(
+            (k, str(v)) for k, v in (params or {}).items())))
+
+        def request(etag):
+            return self._get(path, params=params, url=url, etag=etag)
+
+        return self._cache.fetch(key, path, request)
+
     @confluence_error_retries()
     @rate_limited_retries()
     @requests_exception_wrappers()
-    def get(self, path, params=None, *, url=None):
-        rsp = self._process_request('GET', path, params=params, url=url)
+    def _get(self, path, params=None, *, url=None, etag=None):
+        headers = None
+        if etag:
+            headers = {
+                'If-None-Match': etag,
+            }
+
+        rsp = self._process_request(
+            'GET', path, params=params, headers=headers, url=url)
+
+        # if a conditional request reports no changes, there is no content
+        if rsp.status_code == 304 and etag:
+            return None, etag, True
 
         if not rsp.ok:
             errdata = self._format_error(rsp, path)
@@ -337,14 +384,27 @@ class Rest:
             msg = 'REST reply did not provide valid JSON data.'
             raise ConfluenceBadServerUrlError(self.url, msg) from ex
 
-        return json_data
+        return json_data, rsp.headers.get('ETag'), False
 
     @confluence_error_retries()
     @rate_limited_retries()
     @requests_exception_wrappers()
     def post(self, path, data, form_data=None, files=None, *, url=None):
-        rsp = self._process_request(
-            'POST', path, json=data, data=form_data, files=files, url=url)
+        if self._cache:
+            self._cache.invalidate(path)
+
+        # if any files are provided as paths, stream the multipart body
+        # from disk (instead of loading each file's contents into memory)
+        if files and any(isinstance(v[1], Path) for v in files.values()):
+            stream = MultipartStream(form_data, files)
+            try:
+                rsp = self._process_request('POST', path, data=stream,
+                    headers={'Content-Type': stream.content_type}, url=url)
+            finally:
+                stream.close()
+        else:
+            rsp = self._process_request(
+                'POST', path, json=data, data=form_data, files=files, url=url)
 
         if not rsp.ok:
             errdata = self._format_error(rsp, path)
@@ -368,6 +428,9 @@ class Rest:
     @rate_limited_retries()
     @requests_exception_wrappers()
     def put(self, path, value, data=None, *, url=None):
+        if self._cache:
+            self._cache.invalidate(f'{path}/{value}')
+
         rsp = self._process_request(
             'PUT', f'{path}/{value}', json=data, url=url)
 
@@ -395,6 +458,9 @@ class Rest:
     @rate_limited_retries()
     @requests_exception_wrappers()
     def delete(self, path, value, *, url=None):
+        if self._cache:
+            self._cache.invalidate(f'{path}/{value}')
+
         rsp = self._process_request('DELETE', f'{path}/{value}', url=url)
 
         if not rsp.ok:
@@ -402,6 +468,11 @@ class Rest:
             raise ConfluenceBadApiError(rsp.status_code, errdata)
 
     def close(self):
+        if self._cache:
+            logger.verbose('response cache: '
+                           f'{self._cache.hits} hits, '
+                           f'{self._cache.misses} misses')
+
         self.session.close()
 
     def _format_error(self, rsp, path):
@@ -464,7 +535,19 @@ class Rest:
                 print(flush=True)
 
         # perform the rest request
-        rsp = self.session.send(req, timeout=self.timeout)
+        start = time.perf_counter()
+        try:
+            rsp = self.session.send(req, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            if self.metrics:
+                self.metrics.record(method, path, None, _body_size(req.body),
+                    0, time.perf_counter() - start)
+            raise
+
+        if self.metrics:
+            self.metrics.record(method, path, rsp.status_code,
+                _body_size(req.body), len(rsp.content),
+                time.perf_counter() - start)
 
         # debug logging
         if dump:
@@ -505,9 +588,7 @@ class Rest:
                     target_datetime = mktime_tz(parsed_dtz)
                     delay = target_datetime - time.time()
 
-            if delay > 0:
-                self.next_delay = delay
-
+            if delay and delay > 0:
                 # if this delay is over a minute, provide a notice to a client
                 # that requests are being delayed -- but we'll only notify a
                 # user once
@@ -517,6 +598,18 @@ class Rest:
                                 f'({math.ceil(delay)} seconds)')
                     self._reported_large_delay = True
 
+                # (rate-limited requests have their retry delay capped)
+                if rsp.status_code == 429:
+                    delay = min(delay, RATE_LIMITED_MAX_RETRY_DURATION)
+
+                # pause all requests (shared over all threads) until the
+                # requested delay has passed
+                self.governor.pause(delay)
+
+        # track any rate limit details reported by confluence, to help pace
+        # requests before confluence starts limiting requests
+        self.governor.observe(rsp.headers)
+
         # check if Confluence reports a `Deprecation` header in the response;
         # if so, log a message is we have the debug message enabled to help
         # inform developers that this api call may required updating
@@ -535,3 +628,14 @@ class Rest:
             raise ConfluenceRateLimitedError
 
         return rsp
+
+
+def _body_size(body):
+    # determine the size of a prepared request's body
+    if body is None:
+        return 0
+
+    try:
+        return len(body)
+    except TypeError:
+        return 0
@@ -133,7 +133,8 @@ class SingleConfluenceBuilder(ConfluenceBuilder):
             if self._verbose:
                 print()
 
-            self.assets.preprocess_doctree(doctree, self.config.root_doc)
+            with self.metrics.track('preprocess_doctree'):
+                self.assets.preprocess_doctree(doctree, self.config.root_doc)
 
         with progress_message(C('writing single confluence document')):
             if self._verbose:
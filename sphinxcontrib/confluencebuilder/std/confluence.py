@@ -473,6 +473,19 @@ else:
 # (see also: https://developer.atlassian.com/cloud/confluence/rate-limiting/)
 RSP_HEADER_RETRY_AFTER = 'Retry-After'
 
+# confluence api rate limit header entries
+#
+# Confluence Cloud may report the state of rate limits applied to a client
+# on API responses. This includes the maximum number of requests permitted,
+# the remaining number of requests permitted and when these limits are reset.
+# A flag may also be reported when a client is nearing its rate limit.
+#
+# (see also: https://developer.atlassian.com/cloud/confluence/rate-limiting/)
+RSP_HEADER_RATELIMIT_LIMIT = 'X-RateLimit-Limit'
+RSP_HEADER_RATELIMIT_NEAR_LIMIT = 'X-RateLimit-NearLimit'
+RSP_HEADER_RATELIMIT_REMAINING = 'X-RateLimit-Remaining'
+RSP_HEADER_RATELIMIT_RESET = 'X-RateLimit-Reset'
+
 # default code block theme
 DEFAULT_THEME_STYLE = 'default'
 
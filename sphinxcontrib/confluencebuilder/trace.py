@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+
+class ConfluenceTrace:
+    def __init__(self):
+        """
+        confluence builder trace
+
+        Tracks a timeline of spans (e.g. build phases, translated documents
+        or requests made to a Confluence instance) which can be exported
+        into a trace-event file. Trace files can be loaded into tools such
+        as Chrome's ``about:tracing`` or Perfetto, to help review where time
+        was spent during a build and how concurrent requests were made.
+
+        Tracing is disabled by default. Spans are only tracked when the
+        trace is enabled.
+        """
+
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._shared = None
+        self._threads = {}
+
+    def add(self, name, category, start, duration, **args):
+        """
+        add a span which has already completed
+
+        Args:
+            name: the name of the span
+            category: the category of the span
+            start: the start of the span (``time.perf_counter``)
+            duration: the duration of the span (in seconds)
+            **args: additional details to include with the span
+        """
+
+        if not self.enabled:
+            return
+
+        pid = os.getpid()
+        thread = threading.current_thread()
+
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 3),
+            'dur': round(duration * 1e6, 3),
+            'pid': pid,
+            'tid': thread.ident,
+        }
+
+        if args:
+            event['args'] = args
+
+        # spans added from another process are shared with this process
+        if pid != self._pid and self._shared is not None:
+            self._shared.append((event, thread.name))
+            return
+
+        with self._lock:
+            self.events.append(event)
+            self._threads.setdefault((pid, thread.ident), thread.name)
+
+    def export(self, out_dir):
+        """
+        export the tracked spans
+
+        When an export is requested, the spans will be published into
+        a ``scb-trace.json`` file into the project's output directory.
+
+        Args:
+            out_dir: the folder to output the trace into
+        """
+
+        with self._lock:
+            events = [{
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': tid,
+                'args': {
+                    'name': name,
+                },
+            } for (pid, tid), name in self._threads.items()]
+            events.extend(self.events)
+
+        data = {
+            'displayTimeUnit': 'ms',
+            'traceEvents': events,
+        }
+
+        trace_path = out_dir / 'scb-trace.json'
+        with trace_path.open('w', encoding='utf-8') as fp:
+            json.dump(data, fp)
+            fp.write('\n')
+
+    @contextmanager
+    def multiprocessing_tracking(self, shared):
+        """
+        setup a context to help track spans when using multiprocessing
+
+        Provides a context where spans added from other processes (e.g. a
+        parallel write of documents) are populated into a provided list
+        shared between processes (e.g. from a multiprocessing Manager). Once
+        the context is completed, the shared spans are merged into this
+        trace.
+
+        Args:
+            shared: the list to share spans from other processes with
+        """
+
+        self._shared = shared
+        try:
+            yield
+        finally:
+            self._shared = None
+
+            with self._lock:
+                for event, thread_name in list(shared):
+                    self.events.append(event)
+                    self._threads.setdefault(
+                        (event['pid'], event['tid']), thread_name)
@@ -14,6 +14,7 @@ from hashlib import sha256
 from urllib.parse import quote
 from urllib.parse import urlparse
 import getpass
+import mmap
 import os
 import re
 import shutil
@@ -62,10 +63,17 @@ class ConfluenceUtil:
         BLOCKSIZE = 65536
         sha = sha256()
         with asset.open('rb') as file:
-            buff = file.read(BLOCKSIZE)
-            while len(buff) > 0:
-                sha.update(buff)
+            # hash over a memory-mapped view of the file, to avoid copying
+            # the file's contents into memory; empty files (or files which
+            # cannot be mapped) fallback to reading the file in blocks
+            try:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    sha.update(mm)
+            except (OSError, ValueError):
                 buff = file.read(BLOCKSIZE)
+                while len(buff) > 0:
+                    sha.update(buff)
+                    buff = file.read(BLOCKSIZE)
 
         return sha.hexdigest()
 
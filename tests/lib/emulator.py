@@ -0,0 +1,1225 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from collections import Counter
+from collections import deque
+from contextlib import contextmanager
+from copy import deepcopy
+from email.parser import BytesParser
+from threading import RLock
+from threading import Thread
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+import email.policy
+import http.server as http_server
+import json
+import random
+import re
+import socketserver as server_socket
+import time
+
+
+# default number of results returned for a listing/search request
+DEFAULT_LIMIT = 25
+
+# maximum number of results returned for a listing/search request
+MAX_LIMIT = 250
+
+# path prefix for (v1) api requests
+V1_PREFIX = '/rest/api/'
+
+# path prefix for (v2) api requests
+V2_PREFIX = '/api/v2/'
+
+# supported (v1) api routes
+V1_ROUTES = [
+    ('GET', 'space/{key}', 'v1_get_space'),
+    ('PUT', 'space/{key}', 'v1_put_space'),
+    ('GET', 'content', 'v1_get_content'),
+    ('POST', 'content', 'v1_post_content'),
+    ('GET', 'content/search', 'v1_search'),
+    ('POST', 'content/archive', 'v1_archive'),
+    ('GET', 'content/{id}', 'v1_get_content_id'),
+    ('PUT', 'content/{id}', 'v1_put_content'),
+    ('DELETE', 'content/{id}', 'delete_content'),
+    ('GET', 'content/{id}/child/attachment', 'v1_get_attachments'),
+    ('POST', 'content/{id}/child/attachment', 'v1_post_attachment'),
+    ('POST', 'content/{id}/child/attachment/{aid}/data', 'v1_post_data'),
+    ('GET', 'content/{id}/descendant/page', 'v1_get_descendants'),
+    ('POST', 'content/{id}/label', 'v1_post_labels'),
+    ('GET', 'content/{id}/property/{key}', 'v1_get_property'),
+    ('PUT', 'content/{id}/property/{key}', 'v1_put_property'),
+    ('DELETE', 'content/{id}/property/{key}', 'v1_delete_property'),
+    ('GET', 'longtask/{key}', 'v1_get_longtask'),
+    ('DELETE', 'user/watch/content/{id}', 'v1_unwatch'),
+]
+
+# supported (v2) api routes
+V2_ROUTES = [
+    ('DELETE', 'attachments/{id}', 'delete_content'),
+    ('GET', 'pages', 'v2_get_pages'),
+    ('POST', 'pages', 'v2_post_page'),
+    ('GET', 'pages/{id}', 'v2_get_page'),
+    ('PUT', 'pages/{id}', 'v2_put_page'),
+    ('DELETE', 'pages/{id}', 'delete_content'),
+    ('GET', 'pages/{id}/ancestors', 'v2_get_ancestors'),
+    ('GET', 'pages/{id}/attachments', 'v2_get_attachments'),
+    ('GET', 'pages/{id}/children', 'v2_get_children'),
+    ('GET', 'pages/{id}/inline-comments', 'v2_get_inline_comments'),
+    ('GET', 'pages/{id}/labels', 'v2_get_labels'),
+    ('GET', 'pages/{id}/properties', 'v2_get_properties'),
+    ('POST', 'pages/{id}/properties', 'v2_post_property'),
+    ('PUT', 'pages/{id}/properties/{pid}', 'v2_put_property'),
+    ('DELETE', 'pages/{id}/properties/{pid}', 'v2_delete_property'),
+    ('GET', 'spaces', 'v2_get_spaces'),
+]
+
+# pattern to extract a term from a cql query
+CQL_TERM = re.compile(r'''
+    \s*(?P<field>\w+)\s*
+    (?P<op>!=|=|~|\bin\b)\s*
+    (?P<value>"(?:[^"\\]|\\.)*"|\([^)]*\)|[^\s)]+)\s*
+    (?:\band\b|$)
+''', re.IGNORECASE | re.VERBOSE)
+
+
+class ConfluenceEmulatorError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class ConfluenceEmulator(server_socket.ThreadingMixIn, server_socket.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, space_key='MOCK', *, error_rate=0, jitter=0,
+            latency=0, longtask_delay=0, rate_limit=0, retry_after=1,
+            seed=None):
+        """
+        confluence emulator
+
+        Spawns a TCP server on a random local port which emulates a stateful
+        Confluence instance. Unlike ``ConfluenceInstanceServer`` (which only
+        replays registered responses), the emulator tracks spaces, pages,
+        versions, ancestors, content properties, labels and attachments for
+        requests made through both the v1 and v2 APIs. This allows a publish
+        to be performed end-to-end against a local instance (e.g. to
+        benchmark the number of requests made and the time spent publishing).
+
+        The emulator can also inject latency and failures into responses,
+        to help emulate the behavior of a remote instance.
+
+        Args:
+            space_key (optional): the key of the space to host
+            error_rate (optional): probability of an injected 5xx response
+            jitter (optional): maximum random latency added to a response
+            latency (optional): latency (in seconds) added to each response
+            longtask_delay (optional): duration before a long task completes
+            rate_limit (optional): probability of an injected 429 response
+            retry_after (optional): ``Retry-After`` value for 429 responses
+            seed (optional): seed for random latency/failure injection
+
+        Attributes:
+            faults: the number of injected failure responses
+            requests: counts of requests made for each api route
+        """
+
+        LOCAL_RANDOM_PORT = ('127.0.0.1', 0)
+        server_socket.TCPServer.__init__(self,
+            LOCAL_RANDOM_PORT, ConfluenceEmulatorRequestHandler)
+
+        host, port = self.server_address
+        self.url = f'http://{host}:{port}/'
+
+        self.error_rate = error_rate
+        self.faults = 0
+        self.jitter = jitter
+        self.latency = latency
+        self.longtask_delay = longtask_delay
+        self.mtx = RLock()
+        self.rate_limit = rate_limit
+        self.requests = Counter()
+        self.retry_after = retry_after
+        self.space_key = space_key
+
+        self._content = {}
+        self._injected = deque()
+        self._longtasks = {}
+        self._next_id = 1000
+        self._rng = random.Random(seed)  # noqa: S311
+        self._routes = []
+        self._space = {
+            'homepage': None,
+            'id': 1,
+            'key': space_key,
+            'name': f'{space_key} Space',
+            'type': 'global',
+        }
+
+        for prefix, routes in ((V1_PREFIX, V1_ROUTES), (V2_PREFIX, V2_ROUTES)):
+            for method, route, handler in routes:
+                pattern = re.escape(route)
+                pattern = pattern.replace(r'\{id\}', r'(?P<cid>\d+)')
+                pattern = pattern.replace(r'\{aid\}', r'(?P<aid>\d+)')
+                pattern = pattern.replace(r'\{pid\}', r'(?P<pid>\d+)')
+                pattern = pattern.replace(r'\{key\}', r'(?P<key>[^/]+)')
+                self._routes.append((
+                    method,
+                    re.compile(re.escape(prefix) + pattern + '$'),
+                    f'{prefix}{route}',
+                    handler,
+                ))
+
+    @property
+    def total_requests(self):
+        """
+        the total number of requests made to the emulator
+        """
+        with self.mtx:
+            return sum(self.requests.values())
+
+    def add_attachment(self, page_id, title, data=b'', *, comment=None,
+            media_type='application/octet-stream'):
+        """
+        add an attachment to a page in the emulated instance
+
+        Args:
+            page_id: the identifier of the page to attach to
+            title: the name of the attachment
+            data (optional): the attachment data
+            comment (optional): the attachment's comment
+            media_type (optional): the attachment's media type
+
+        Returns:
+            the attachment identifier
+        """
+
+        with self.mtx:
+            attachment = self._new_content('attachment', title)
+            attachment['comment'] = comment or ''
+            attachment['container'] = str(page_id)
+            attachment['data'] = data
+            attachment['media_type'] = media_type
+            return attachment['id']
+
+    def add_page(self, title, body='', *, labels=None, parent=None,
+            properties=None, status='current'):
+        """
+        add a page in the emulated instance
+
+        Args:
+            title: the title of the page
+            body (optional): the storage-format body of the page
+            labels (optional): the labels for the page
+            parent (optional): the identifier of the parent page
+            properties (optional): dictionary of properties for the page
+            status (optional): the status of the page
+
+        Returns:
+            the page identifier
+        """
+
+        with self.mtx:
+            page = self._new_content('page', title)
+            page['body'] = body
+            page['labels'] = list(labels or [])
+            page['parent'] = str(parent) if parent else None
+            page['status'] = status
+
+            for key, value in (properties or {}).items():
+                self._set_property(page, key, value)
+
+            return page['id']
+
+    def attachments(self, page_id):
+        """
+        return the names of attachments on a page in the emulated instance
+
+        Args:
+            page_id: the identifier of the page
+
+        Returns:
+            the attachment names
+        """
+
+        with self.mtx:
+            return sorted(v['title'] for v in self._attachments(page_id))
+
+    def find_page(self, title, status='current'):
+        """
+        find a page in the emulated instance with a matching title
+
+        Args:
+            title: the title of the page
+            status (optional): the status of the page
+
+        Returns:
+            a copy of the page's state or ``None``
+        """
+
+        with self.mtx:
+            for entry in self._content.values():
+                if entry['type'] == 'page' and entry['title'] == title and \
+                        entry['status'] == status:
+                    return deepcopy(entry)
+
+        return None
+
+    def inject(self, code, count=1):
+        """
+        inject failure responses for the next requests made
+
+        Args:
+            code: the response code to respond with
+            count (optional): the number of requests to fail
+        """
+
+        with self.mtx:
+            self._injected.extend([code] * count)
+
+    def pages(self, status='current'):
+        """
+        return the titles of pages in the emulated instance
+
+        Args:
+            status (optional): the status of pages to return
+
+        Returns:
+            the page titles
+        """
+
+        with self.mtx:
+            return sorted(entry['title'] for entry in self._content.values()
+                if entry['type'] == 'page' and entry['status'] == status)
+
+    def reset_stats(self):
+        """
+        reset any tracked request statistics
+        """
+
+        with self.mtx:
+            self.faults = 0
+            self.requests.clear()
+
+    # ##################################################################
+    # (request processing)
+
+    def handle_request_data(self, method, path, headers, body):
+        """
+        process a request made to the emulator
+
+        Args:
+            method: the request method
+            path: the request path (including any query)
+            headers: the request headers
+            body: the request body
+
+        Returns:
+            tuple of the response code, headers and data
+        """
+
+        parsed = urlsplit(path)
+        # (repeated query parameters are tracked as a list of values)
+        query = {
+            k: v if len(v) > 1 else v[-1]
+            for k, v in parse_qs(parsed.query).items()
+        }
+
+        delay = self.latency
+        if self.jitter:
+            with self.mtx:
+                delay += self._rng.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        matched = None
+        for route_method, pattern, route, handler in self._routes:
+            if route_method != method:
+                continue
+
+            match = pattern.match(parsed.path)
+            if match:
+                matched = (route, handler, match)
+                break
+
+        if not matched:
+            return 404, {}, {
+                'statusCode': 404,
+                'message': f'unsupported emulator request: {method} {path}',
+            }
+
+        route, handler, match = matched
+
+        with self.mtx:
+            self.requests[(method, route)] += 1
+
+            # inject a failure (if any)
+            fault = None
+            if self._injected:
+                fault = self._injected.popleft()
+            elif self.rate_limit and self._rng.random() < self.rate_limit:
+                fault = 429
+            elif self.error_rate and self._rng.random() < self.error_rate:
+                fault = self._rng.choice([500, 502, 503])
+
+            if fault:
+                self.faults += 1
+
+                rsp_headers = {}
+                if fault == 429:
+                    rsp_headers['Retry-After'] = str(self.retry_after)
+
+                return fault, rsp_headers, {
+                    'statusCode': fault,
+                    'message': 'emulated failure',
+                }
+
+            content_type = headers.get('Content-Type') or ''
+            if body and 'application/json' in content_type:
+                data = json.loads(body)
+            else:
+                data = body
+
+            args = match.groupdict()
+            try:
+                code, rsp = getattr(self, handler)(query, data,
+                    content_type=content_type, path=parsed.path, **args)
+            except ConfluenceEmulatorError as ex:
+                return ex.code, {}, {
+                    'statusCode': ex.code,
+                    'message': ex.message,
+                }
+
+        return code, {}, rsp
+
+    # ##################################################################
+    # (v1 api)
+
+    def v1_archive(self, query, data, **kwargs):
+        pages = [self._lookup(v['id'], 'page') for v in data.get('pages', [])]
+        for page in pages:
+            page['status'] = 'archived'
+
+        task_id = str(len(self._longtasks) + 1)
+        self._longtasks[task_id] = time.monotonic() + self.longtask_delay
+
+        return 202, {
+            'id': task_id,
+            'links': {
+                'status': f'{V1_PREFIX}longtask/{task_id}',
+            },
+        }
+
+    def v1_delete_property(self, query, data, cid, key, **kwargs):
+        page = self._lookup(cid, 'page')
+        for prop_key, prop in list(page['properties'].items()):
+            if key in (prop_key, prop['id']):
+                del page['properties'][prop_key]
+                return 204, None
+
+        raise ConfluenceEmulatorError(404, f'No property found: {key}')
+
+    def v1_get_attachments(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page')
+        filename = query.get('filename')
+
+        attachments = [self._v1_content(entry, 'version')
+            for entry in self._attachments(page['id'])
+            if not filename or entry['title'] == filename]
+
+        return 200, self._paginate(attachments, query, kwargs['path'])
+
+    def v1_get_content(self, query, data, **kwargs):
+        statuses = self._query_values(query, 'status', 'current')
+
+        results = []
+        for entry in self._sorted():
+            if query.get('type') and entry['type'] != query['type']:
+                continue
+            if entry['status'] not in statuses:
+                continue
+            if query.get('title') and entry['title'] != query['title']:
+                continue
+            results.append(self._v1_content(entry, query.get('expand')))
+
+        return 200, self._paginate(results, query, kwargs['path'])
+
+    def v1_get_content_id(self, query, data, cid, **kwargs):
+        entry = self._lookup(cid)
+        return 200, self._v1_content(entry, query.get('expand'))
+
+    def v1_get_descendants(self, query, data, cid, **kwargs):
+        self._lookup(cid, 'page')
+
+        results = [self._v1_content(self._content[descendant_id],
+                query.get('expand'))
+            for descendant_id in self._descendants(cid)]
+
+        return 200, self._paginate(results, query, kwargs['path'])
+
+    def v1_get_longtask(self, query, data, key, **kwargs):
+        if key not in self._longtasks:
+            raise ConfluenceEmulatorError(404, f'No long task found: {key}')
+
+        finished = time.monotonic() >= self._longtasks[key]
+        return 200, {
+            'id': key,
+            'finished': finished,
+            'percentageComplete': 100 if finished else 50,
+            'successful': finished,
+        }
+
+    def v1_get_property(self, query, data, cid, key, **kwargs):
+        page = self._lookup(cid, 'page')
+        prop = page['properties'].get(key)
+        if not prop:
+            raise ConfluenceEmulatorError(404, f'No property found: {key}')
+
+        return 200, prop
+
+    def v1_get_space(self, query, data, key, **kwargs):
+        return 200, self._space_data(key)
+
+    def v1_post_attachment(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page')
+        fields, files = self._parse_multipart(data, kwargs['content_type'])
+
+        results = []
+        for filename, media_type, content in files:
+            if any(entry['title'] == filename
+                    for entry in self._attachments(page['id'])):
+                msg = ('Cannot add a new attachment with same file name as '
+                    f'an existing attachment: {filename}')
+                raise ConfluenceEmulatorError(400, msg)
+
+            attachment = self._new_content('attachment', filename)
+            attachment['comment'] = fields.get('comment', '')
+            attachment['container'] = page['id']
+            attachment['data'] = content
+            attachment['media_type'] = media_type
+            results.append(self._v1_content(attachment, 'version'))
+
+        return 200, {
+            'results': results,
+            'size': len(results),
+        }
+
+    def v1_post_content(self, query, data, **kwargs):
+        page = self._create_page(data, parent_id=(
+            data.get('ancestors') or [{}])[-1].get('id'))
+
+        return 200, self._v1_content(page, None)
+
+    def v1_post_data(self, query, data, cid, aid, **kwargs):
+        self._lookup(cid, 'page')
+        attachment = self._lookup(aid, 'attachment')
+        fields, files = self._parse_multipart(data, kwargs['content_type'])
+
+        for _, media_type, content in files:
+            attachment['comment'] = fields.get('comment', '')
+            attachment['data'] = content
+            attachment['media_type'] = media_type
+            attachment['version'] += 1
+
+        return 200, self._v1_content(attachment, 'version')
+
+    def v1_post_labels(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page')
+        for label in data:
+            if label['name'] not in page['labels']:
+                page['labels'].append(label['name'])
+
+        return 200, self._labels_data(page)
+
+    def v1_put_content(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page', statuses=('current', 'archived'))
+
+        parent_id = page['parent']
+        if 'ancestors' in data:
+            parent_id = (data['ancestors'] or [{}])[-1].get('id')
+
+        self._update_page(page, data, parent_id)
+        return 200, self._v1_content(page, None)
+
+    def v1_put_property(self, query, data, cid, key, **kwargs):
+        page = self._lookup(cid, 'page')
+        version = data.get('version', {}).get('number', 1)
+
+        prop = page['properties'].get(key)
+        if prop and version != prop['version']['number'] + 1:
+            msg = f'Version must be incremented on update of property: {key}'
+            raise ConfluenceEmulatorError(409, msg)
+
+        return 200, self._set_property(page, key, data.get('value'))
+
+    def v1_put_space(self, query, data, key, **kwargs):
+        self._space_data(key)
+
+        homepage = data.get('homepage') or {}
+        if homepage.get('id'):
+            self._lookup(homepage['id'], 'page')
+            self._space['homepage'] = str(homepage['id'])
+
+        return 200, self._space_data(key)
+
+    def v1_search(self, query, data, **kwargs):
+        terms = self._parse_cql(query.get('cql', ''))
+
+        statuses = ['current']
+        if query.get('cqlcontext'):
+            context = json.loads(query['cqlcontext'])
+            statuses = context.get('contentStatuses', statuses)
+
+        results = [self._v1_content(entry, query.get('expand'))
+            for entry in self._sorted()
+            if entry['status'] in statuses and self._match_cql(entry, terms)]
+
+        return 200, self._paginate(results, query, kwargs['path'])
+
+    def v1_unwatch(self, query, data, cid, **kwargs):
+        self._lookup(cid)
+        return 204, None
+
+    # ##################################################################
+    # (v2 api)
+
+    def v2_delete_property(self, query, data, cid, pid, **kwargs):
+        return self.v1_delete_property(query, data, cid, pid, **kwargs)
+
+    def v2_get_ancestors(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page', statuses=('current', 'archived'))
+        results = [{
+            'id': entry['id'],
+            'type': 'page',
+        } for entry in self._ancestors(page)]
+
+        return 200, self._paginate(results, query, kwargs['path'])
+
+    def v2_get_attachments(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page')
+        filename = query.get('filename')
+
+        attachments = [self._v2_attachment(entry)
+            for entry in self._attachments(page['id'])
+            if not filename or entry['title'] == filename]
+
+        return 200, self._paginate(attachments, query, kwargs['path'],
+            cursor=True)
+
+    def v2_get_children(self, query, data, cid, **kwargs):
+        self._lookup(cid, 'page')
+
+        results = [self._v2_page(entry, None) for entry in self._sorted()
+            if entry['type'] == 'page' and entry['status'] == 'current' and
+                entry['parent'] == cid]
+
+        return 200, self._paginate(results, query, kwargs['path'],
+            cursor=True)
+
+    def v2_get_inline_comments(self, query, data, cid, **kwargs):
+        self._lookup(cid, 'page')
+        return 200, {
+            'results': [],
+        }
+
+    def v2_get_labels(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page', statuses=('current', 'archived'))
+        results = self._labels_data(page)['results']
+        return 200, self._paginate(results, query, kwargs['path'],
+            cursor=True)
+
+    def v2_get_page(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page', statuses=('current', 'archived'))
+        return 200, self._v2_page(page, query.get('body-format'))
+
+    def v2_get_pages(self, query, data, **kwargs):
+        statuses = self._query_values(query, 'status', 'current')
+
+        results = []
+        for entry in self._sorted():
+            if entry['type'] != 'page' or entry['status'] not in statuses:
+                continue
+            if query.get('space-id') and \
+                    str(query['space-id']) != str(self._space['id']):
+                continue
+            if query.get('title') and entry['title'] != query['title']:
+                continue
+            results.append(self._v2_page(entry, query.get('body-format')))
+
+        return 200, self._paginate(results, query, kwargs['path'],
+            cursor=True)
+
+    def v2_get_properties(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page', statuses=('current', 'archived'))
+        results = [prop for key, prop in sorted(page['properties'].items())
+            if not query.get('key') or key == query['key']]
+
+        return 200, self._paginate(results, query, kwargs['path'],
+            cursor=True)
+
+    def v2_get_spaces(self, query, data, **kwargs):
+        results = []
+        keys = query.get('keys', self.space_key).split(',')
+        if self.space_key in keys:
+            space = self._space_data(self.space_key)
+            space['id'] = str(space['id'])
+            results.append(space)
+
+        return 200, {
+            'results': results,
+        }
+
+    def v2_post_page(self, query, data, **kwargs):
+        if str(data.get('spaceId')) != str(self._space['id']):
+            raise ConfluenceEmulatorError(400, 'unknown space identifier')
+
+        page = self._create_page(data, parent_id=data.get('parentId'))
+        return 200, self._v2_page(page, None)
+
+    def v2_post_property(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page')
+
+        key = data.get('key')
+        if key in page['properties']:
+            msg = f'A property with key already exists: {key}'
+            raise ConfluenceEmulatorError(409, msg)
+
+        return 200, self._set_property(page, key, data.get('value'))
+
+    def v2_put_page(self, query, data, cid, **kwargs):
+        page = self._lookup(cid, 'page', statuses=('current', 'archived'))
+        parent_id = data.get('parentId', page['parent'])
+
+        self._update_page(page, data, parent_id)
+        return 200, self._v2_page(page, None)
+
+    def v2_put_property(self, query, data, cid, pid, **kwargs):
+        page = self._lookup(cid, 'page')
+        version = data.get('version', {}).get('number', 1)
+
+        prop = next((v for v in page['properties'].values()
+            if v['id'] == pid), None)
+        if not prop:
+            raise ConfluenceEmulatorError(404, f'No property found: {pid}')
+
+        if version != prop['version']['number'] + 1:
+            msg = f'Version must be incremented on update of property: {pid}'
+            raise ConfluenceEmulatorError(409, msg)
+
+        return 200, self._set_property(page, prop['key'], data.get('value'))
+
+    # ##################################################################
+    # (common api)
+
+    def delete_content(self, query, data, cid, **kwargs):
+        entry = self._lookup(cid, statuses=('current', 'archived'))
+
+        if entry['type'] == 'page':
+            # child pages are moved to the removed page's parent
+            for other in self._content.values():
+                if other['type'] == 'page' and other['parent'] == cid:
+                    other['parent'] = entry['parent']
+
+            for attachment in self._attachments(cid):
+                del self._content[attachment['id']]
+
+            if self._space['homepage'] == cid:
+                self._space['homepage'] = None
+
+        del self._content[cid]
+        return 204, None
+
+    # ##################################################################
+    # (state helpers)
+
+    def _ancestors(self, entry):
+        ancestors = []
+        parent_id = entry.get('parent')
+        while parent_id and parent_id in self._content:
+            parent = self._content[parent_id]
+            ancestors.insert(0, parent)
+            parent_id = parent['parent']
+
+        return ancestors
+
+    def _attachments(self, page_id):
+        return [entry for entry in self._sorted()
+            if entry['type'] == 'attachment' and
+                entry['container'] == str(page_id)]
+
+    def _create_page(self, data, parent_id):
+        title = data.get('title')
+        self._check_title(title)
+
+        if parent_id:
+            parent_id = str(parent_id)
+            self._lookup(parent_id, 'page')
+
+        page = self._new_content('page', title)
+        page['body'] = self._extract_body(data)
+        page['labels'] = []
+        page['parent'] = parent_id
+
+        metadata = data.get('metadata') or {}
+        for label in metadata.get('labels') or []:
+            if label['name'] not in page['labels']:
+                page['labels'].append(label['name'])
+
+        for key, entry in (metadata.get('properties') or {}).items():
+            self._set_property(page, key, entry.get('value'))
+
+        return page
+
+    def _check_title(self, title, page_id=None):
+        for entry in self._content.values():
+            if entry['type'] == 'page' and entry['title'] == title and \
+                    entry['id'] != page_id:
+                msg = ('A page with this title already exists: A page '
+                    f'already exists with the title {title} in this space')
+                raise ConfluenceEmulatorError(400, msg)
+
+    def _descendants(self, page_id):
+        descendants = []
+        pending = [str(page_id)]
+        while pending:
+            current = pending.pop(0)
+            for entry in self._sorted():
+                if entry['type'] == 'page' and entry['status'] == 'current' \
+                        and entry['parent'] == current:
+                    descendants.append(entry['id'])
+                    pending.append(entry['id'])
+
+        return descendants
+
+    def _extract_body(self, data):
+        body = data.get('body') or {}
+        storage = body.get('storage') or body
+        return storage.get('value') or ''
+
+    def _lookup(self, id_, type_=None, statuses=('current',)):
+        entry = self._content.get(str(id_))
+        if not entry or entry['status'] not in statuses or \
+                (type_ and entry['type'] != type_):
+            msg = f'No content found with id: ContentId{{id={id_}}}'
+            raise ConfluenceEmulatorError(404, msg)
+
+        return entry
+
+    def _new_content(self, type_, title):
+        self._next_id += 1
+        entry = {
+            'id': str(self._next_id),
+            'properties': {},
+            'status': 'current',
+            'title': title,
+            'type': type_,
+            'version': 1,
+        }
+        self._content[entry['id']] = entry
+        return entry
+
+    def _set_property(self, page, key, value):
+        prop = page['properties'].get(key)
+        if prop:
+            prop['value'] = value
+            prop['version']['number'] += 1
+        else:
+            self._next_id += 1
+            prop = {
+                'id': str(self._next_id),
+                'key': key,
+                'value': value,
+                'version': {
+                    'number': 1,
+                },
+            }
+            page['properties'][key] = prop
+
+        return json.loads(json.dumps(prop))
+
+    def _sorted(self):
+        return sorted(self._content.values(), key=lambda x: int(x['id']))
+
+    def _update_page(self, page, data, parent_id):
+        version = data.get('version', {}).get('number')
+        if version != page['version'] + 1:
+            msg = ('Version must be incremented on update. '
+                f'Current version is: {page["version"]}')
+            raise ConfluenceEmulatorError(409, msg)
+
+        title = data.get('title', page['title'])
+        self._check_title(title, page['id'])
+
+        # an unknown parent (e.g. an identifier of "1") clears the parent
+        parent_id = str(parent_id) if parent_id else None
+        if parent_id and parent_id not in self._content:
+            parent_id = None
+
+        if parent_id and (parent_id == page['id'] or
+                any(v['id'] == page['id']
+                    for v in self._ancestors(self._content[parent_id]))):
+            msg = 'Cannot move a page to be a descendant of itself'
+            raise ConfluenceEmulatorError(400, msg)
+
+        page['body'] = self._extract_body(data)
+        page['parent'] = parent_id
+        page['status'] = data.get('status', 'current')
+        page['title'] = title
+        page['version'] = version
+
+        metadata = data.get('metadata') or {}
+        if 'labels' in metadata:
+            page['labels'] = []
+            for label in metadata['labels'] or []:
+                if label['name'] not in page['labels']:
+                    page['labels'].append(label['name'])
+
+        for key, entry in (metadata.get('properties') or {}).items():
+            self._set_property(page, key, entry.get('value'))
+
+    # ##################################################################
+    # (query helpers)
+
+    def _match_cql(self, entry, terms):
+        for field, op, value in terms:
+            values = value if isinstance(value, list) else [value]
+
+            if field == 'ancestor':
+                candidate = [v['id'] for v in self._ancestors(entry)]
+                matched = any(v in candidate for v in values)
+            elif field == 'container':
+                matched = entry.get('container') in values
+            elif field == 'id':
+                matched = entry['id'] in values
+            elif field == 'parent':
+                matched = entry.get('parent') in values
+            elif field == 'space':
+                matched = self.space_key in values
+            elif field == 'title' and op == '~':
+                matched = value.lower() in entry['title'].lower()
+            elif field == 'title':
+                matched = entry['title'] in values
+            elif field == 'type':
+                matched = entry['type'] in values
+            else:
+                msg = f'unsupported emulator cql field: {field}'
+                raise ConfluenceEmulatorError(400, msg)
+
+            if op == '!=':
+                matched = not matched
+
+            if not matched:
+                return False
+
+        return True
+
+    def _paginate(self, results, query, path, *, cursor=False):
+        limit = min(int(query.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        offset_key = 'cursor' if cursor else 'start'
+        start = int(query.get(offset_key, 0))
+
+        chunk = results[start:start + limit]
+        rsp = {
+            'results': chunk,
+            '_links': {},
+        }
+
+        if not cursor:
+            rsp['limit'] = limit
+            rsp['size'] = len(chunk)
+            rsp['start'] = start
+            rsp['totalSize'] = len(results)
+
+        if start + limit < len(results):
+            next_query = dict(query)
+            next_query[offset_key] = start + limit
+            rsp['_links']['next'] = \
+                f'{path}?{urlencode(next_query, doseq=True)}'
+
+        return rsp
+
+    def _query_values(self, query, key, default):
+        # values may be provided as a repeated or a comma-separated parameter
+        value = query.get(key, default)
+        if isinstance(value, list):
+            return value
+
+        return value.split(',')
+
+    def _parse_cql(self, cql):
+        terms = []
+
+        idx = 0
+        while idx < len(cql):
+            match = CQL_TERM.match(cql, idx)
+            if not match:
+                msg = f'unsupported emulator cql query: {cql}'
+                raise ConfluenceEmulatorError(400, msg)
+
+            op = match.group('op').lower()
+            value = match.group('value')
+            if value.startswith('('):
+                value = [v.strip().strip('"')
+                    for v in value[1:-1].split(',') if v.strip()]
+            elif value.startswith('"'):
+                value = value[1:-1].replace('\\"', '"')
+
+            terms.append((match.group('field').lower(), op, value))
+            idx = match.end()
+
+        return terms
+
+    def _parse_multipart(self, data, content_type):
+        message = BytesParser(policy=email.policy.HTTP).parsebytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + data)
+
+        fields = {}
+        files = []
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True)
+
+            filename = part.get_filename()
+            if filename:
+                files.append((filename, part.get_content_type(), payload))
+            else:
+                fields[name] = payload.decode('utf-8')
+
+        return fields, files
+
+    # ##################################################################
+    # (response helpers)
+
+    def _labels_data(self, page):
+        results = [{
+            'id': str(idx + 1),
+            'name': name,
+            'prefix': 'global',
+        } for idx, name in enumerate(page['labels'])]
+
+        return {
+            'results': results,
+            'size': len(results),
+        }
+
+    def _space_data(self, key):
+        if key != self.space_key:
+            msg = f'No space with key : {key}'
+            raise ConfluenceEmulatorError(404, msg)
+
+        return {
+            'id': self._space['id'],
+            'key': self._space['key'],
+            'name': self._space['name'],
+            'type': self._space['type'],
+        }
+
+    def _v1_content(self, entry, expand):
+        opts = (expand or '').split(',')
+
+        data = {
+            'id': entry['id'],
+            'status': entry['status'],
+            'title': entry['title'],
+            'type': entry['type'],
+            'version': {
+                'number': entry['version'],
+            },
+        }
+
+        if entry['type'] == 'attachment':
+            data['container'] = {
+                'id': entry['container'],
+            }
+            data['extensions'] = {
+                'comment': entry['comment'],
+                'fileSize': len(entry['data']),
+                'mediaType': entry['media_type'],
+            }
+            data['metadata'] = {
+                'comment': entry['comment'],
+                'mediaType': entry['media_type'],
+            }
+            return data
+
+        data['space'] = {
+            'key': self.space_key,
+        }
+        data['_links'] = {
+            'webui': f'/spaces/{self.space_key}/pages/{entry["id"]}',
+        }
+
+        if 'ancestors' in opts:
+            data['ancestors'] = [{
+                'id': ancestor['id'],
+                'title': ancestor['title'],
+                'type': 'page',
+            } for ancestor in self._ancestors(entry)]
+
+        if 'body.storage' in opts:
+            data['body'] = {
+                'storage': {
+                    'representation': 'storage',
+                    'value': entry['body'],
+                },
+            }
+
+        metadata = {}
+        if 'metadata.labels' in opts:
+            metadata['labels'] = self._labels_data(entry)
+
+        for opt in opts:
+            if not opt.startswith('metadata.properties.'):
+                continue
+
+            # expanded keys may use underscores in place of dashes
+            opt_key = opt.removeprefix('metadata.properties.')
+            for key in (opt_key, opt_key.replace('_', '-')):
+                if key in entry['properties']:
+                    props = metadata.setdefault('properties', {})
+                    props[key] = entry['properties'][key]
+
+        if metadata:
+            data['metadata'] = metadata
+
+        return data
+
+    def _v2_attachment(self, entry):
+        return {
+            'comment': entry['comment'],
+            'fileSize': len(entry['data']),
+            'id': entry['id'],
+            'mediaType': entry['media_type'],
+            'pageId': entry['container'],
+            'status': entry['status'],
+            'title': entry['title'],
+            'version': {
+                'number': entry['version'],
+            },
+        }
+
+    def _v2_page(self, entry, body_format):
+        data = {
+            'id': entry['id'],
+            'parentId': entry['parent'],
+            'parentType': 'page' if entry['parent'] else None,
+            'spaceId': str(self._space['id']),
+            'status': entry['status'],
+            'title': entry['title'],
+            'version': {
+                'number': entry['version'],
+            },
+            '_links': {
+                'webui': f'/spaces/{self.space_key}/pages/{entry["id"]}',
+            },
+        }
+
+        if body_format == 'storage':
+            data['body'] = {
+                'storage': {
+                    'representation': 'storage',
+                    'value': entry['body'],
+                },
+            }
+
+        return data
+
+
+class ConfluenceEmulatorRequestHandler(http_server.BaseHTTPRequestHandler):
+    """
+    confluence emulator request handler
+
+    Provides the handler implementation when a Confluence emulator wishes to
+    serve an HTTP request. Requests are forwarded to the emulator to process.
+    """
+
+    # keep-alive connections with split header/body writes would otherwise
+    # stall on delayed acknowledgements
+    disable_nagle_algorithm = True
+    protocol_version = 'HTTP/1.1'
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method):
+        body = self._read_body()
+
+        code, headers, data = self.server.handle_request_data(
+            method, self.path, self.headers, body)
+
+        payload = json.dumps(data).encode('utf-8') if data else b''
+
+        self.send_response(code)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            return body
+
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+
+@contextmanager
+def mock_confluence_emulator(config=None, **kwargs):
+    """
+    spawns a confluence emulator which publishing attempts can be made against
+
+    The following spawns a stateful emulated Confluence instance, which will
+    create a local HTTP server to serve API requests from a publisher
+    instance.
+
+    Args:
+        config (optional): the configuration to populate a publisher url on
+        **kwargs: options to forward to the emulator
+
+    Yields:
+        the emulator
+    """
+
+    emulator = ConfluenceEmulator(**kwargs)
+    serve_thread = Thread(target=emulator.serve_forever)
+
+    try:
+        serve_thread.start()
+
+        if config is not None:
+            config.confluence_server_url = emulator.url
+            config.confluence_space_key = emulator.space_key
+
+        yield emulator
+
+    finally:
+        emulator.shutdown()
+        serve_thread.join()
+        emulator.server_close()
@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+import random
+import struct
+import zlib
+
+
+def generate_project(src_dir, pages=100, *, code_blocks=1, depth=None,
+        fanout=10, images=1, refs=2, seed=0, tables=1):
+    """
+    generate a synthetic sphinx project
+
+    Generates a Sphinx project of a given number of documents into the
+    provided source directory. Documents are laid out breadth-first into a
+    toctree hierarchy, where each document holds up to ``fanout`` child
+    documents. If a ``depth`` is provided, the fan-out used is the smallest
+    one which fits all documents within the requested depth.
+
+    Each document can be populated with a number of (unique) images, code
+    blocks, tables and references to other documents, to help control the
+    shape of the project being generated.
+
+    Args:
+        src_dir: the directory to generate the project into
+        pages (optional): the number of documents to generate
+        code_blocks (optional): the number of code blocks per document
+        depth (optional): the maximum depth of the toctree hierarchy
+        fanout (optional): the maximum number of children per document
+        images (optional): the number of images per document
+        refs (optional): the number of references per document
+        seed (optional): the seed used for selecting reference targets
+        tables (optional): the number of tables per document
+
+    Returns:
+        the generated document names
+    """
+
+    rng = random.Random(seed)  # noqa: S311
+
+    if depth:
+        fanout = _fanout_for_depth(pages, depth)
+
+    docnames = ['index'] + [f'doc-{idx:05d}' for idx in range(1, pages)]
+
+    children = {}
+    for idx, docname in enumerate(docnames[1:], 1):
+        parent = docnames[(idx - 1) // max(fanout, 1)]
+        children.setdefault(parent, []).append(docname)
+
+    (src_dir / 'conf.py').write_text('', encoding='utf-8')
+
+    images_dir = src_dir / 'images'
+    if images:
+        images_dir.mkdir(parents=True, exist_ok=True)
+
+    for idx, docname in enumerate(docnames):
+        lines = [
+            f'.. _{docname}:',
+            '',
+            docname,
+            '=' * len(docname),
+            '',
+            f'Generated document {idx} with some body text to translate.',
+            '',
+        ]
+
+        for section in range(max(code_blocks, images, tables, 1)):
+            title = f'section {section}'
+            lines.extend([
+                f'.. _{docname}-{section}:',
+                '',
+                title,
+                '-' * len(title),
+                '',
+                ('Lorem ipsum dolor sit amet, consectetur adipiscing elit, '
+                    '*sed do eiusmod* tempor **incididunt** ut labore.'),
+                '',
+            ])
+
+            if section < code_blocks:
+                lines.extend([
+                    '.. code-block:: python',
+                    '',
+                    f'    def func_{section}(value):',
+                    f'        return value * {section}',
+                    '',
+                ])
+
+            if section < images:
+                image = f'{docname}-{section}.png'
+                (images_dir / image).write_bytes(_png(idx * images + section))
+                lines.extend([
+                    f'.. image:: images/{image}',
+                    '',
+                ])
+
+            if section < tables:
+                lines.extend([
+                    '+--------+--------+',
+                    '| key    | value  |',
+                    '+========+========+',
+                    f'| {section:<6} | {idx:<6} |',
+                    '+--------+--------+',
+                    '',
+                ])
+
+        if len(docnames) > 1:
+            for _ in range(refs):
+                # pick any other document (skipping this document)
+                offset = rng.randrange(len(docnames) - 1)
+                target = docnames[offset + (offset >= idx)]
+                lines.extend([
+                    f'See :ref:`{target}` and :doc:`{target}`.',
+                    '',
+                ])
+
+        if docname in children:
+            lines.extend([
+                '.. toctree::',
+                '',
+            ])
+            lines.extend(f'    {child}' for child in children[docname])
+            lines.append('')
+
+        (src_dir / f'{docname}.rst').write_text(
+            '\n'.join(lines), encoding='utf-8')
+
+    return docnames
+
+
+def _fanout_for_depth(pages, depth):
+    # find the smallest fan-out which holds all pages within a given depth
+    fanout = 1
+    while True:
+        capacity = sum(fanout ** level for level in range(depth + 1))
+        if capacity >= pages:
+            return fanout
+        fanout += 1
+
+
+def _png(value):
+    # generate a unique 1x1 png image for a provided value
+    def chunk(type_, data):
+        body = type_ + data
+        return struct.pack('>I', len(data)) + body + \
+            struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    rgb = struct.pack('>I', value & 0xffffff)[1:]
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(b'\x00' + rgb)),
+        chunk(b'IEND', b''),
+    ])
@@ -0,0 +1,209 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from contextlib import ExitStack
+from pathlib import Path
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import build_sphinx
+from tests.lib import enable_sphinx_info
+from tests.lib import prepare_conf
+from tests.lib import prepare_dirs
+from tests.lib.emulator import mock_confluence_emulator
+from tests.lib.generator import generate_project
+from unittest.mock import patch
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# default document counts to benchmark
+DEFAULT_PAGES = '100,1000,10000'
+
+# builder calls tracked for each benchmark phase
+PHASES = {
+    'prepare': 'prepare_writing',
+    'write': 'write_doc',
+    'publish-pages': 'publish_doc',
+    'publish-assets': 'publish_asset',
+    'cleanup': 'publish_cleanup',
+}
+
+
+class PhaseTimer:
+    """
+    track the wall time spent in a phase
+
+    Tracks the wall time where at least one call for a phase is active. This
+    ensures phases which are processed concurrently (e.g. publishing pages
+    over a worker pool) do not report the sum of each individual call.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.elapsed = 0.
+        self._active = 0
+        self._lock = threading.Lock()
+        self._start = None
+
+    def wrap(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+                self._active += 1
+                if self._active == 1:
+                    self._start = time.perf_counter()
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    if self._active == 0:
+                        self.elapsed += time.perf_counter() - self._start
+
+        return wrapper
+
+
+def benchmark(pages, args):
+    """
+    benchmark a build/publish of a generated project
+
+    Args:
+        pages: the number of documents to generate
+        args: the benchmark options
+
+    Returns:
+        the benchmark results
+    """
+
+    config = prepare_conf()
+    config['confluence_api_mode'] = args.api_mode
+    config['confluence_cleanup_purge'] = True
+    config['confluence_parent_page'] = 'Benchmark'
+    config['confluence_publish'] = True
+    config['confluence_timeout'] = 30
+
+    timers = {phase: PhaseTimer() for phase in PHASES}
+
+    emulator_opts = {
+        'jitter': args.jitter,
+        'latency': args.latency,
+        'seed': 0,
+    }
+
+    with temp_dir() as src_dir, ExitStack() as stack:
+        generate_project(src_dir, pages,
+            code_blocks=args.code_blocks,
+            depth=args.depth,
+            fanout=args.fanout,
+            images=args.images,
+            refs=args.refs,
+            tables=args.tables,
+        )
+
+        emulator = stack.enter_context(
+            mock_confluence_emulator(config, **emulator_opts))
+        emulator.add_page('Benchmark')
+
+        for phase, method in PHASES.items():
+            func = getattr(ConfluenceBuilder, method)
+            stack.enter_context(patch.object(
+                ConfluenceBuilder, method, timers[phase].wrap(func)))
+
+        out_dir = prepare_dirs('benchmark', postfix=f'-{pages}')
+
+        start = time.perf_counter()
+        build_sphinx(src_dir, config=config, out_dir=out_dir)
+        total = time.perf_counter() - start
+
+    results = {
+        'pages': pages,
+        'total': total,
+        'requests': emulator.total_requests,
+        'phases': {},
+    }
+
+    for phase, timer in timers.items():
+        results['phases'][phase] = {
+            'calls': timer.calls,
+            'elapsed': timer.elapsed,
+        }
+
+    return results
+
+
+def report(results):
+    """
+    print a summary of benchmark results
+
+    Args:
+        results: the results of each benchmark
+    """
+
+    header = f'{"pages":>8} {"total":>9} {"requests":>9}'
+    for phase in PHASES:
+        header += f' {phase:>15}'
+    print(header)
+
+    for result in results:
+        line = (f'{result["pages"]:>8} {result["total"]:>8.2f}s '
+            f'{result["requests"]:>9}')
+        for phase in PHASES:
+            elapsed = result['phases'][phase]['elapsed']
+            line += f' {elapsed:>14.2f}s'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog=__name__,
+        description='Atlassian Confluence Sphinx Extension Benchmark')
+    parser.add_argument('--api-mode', default='v2', choices=['v1', 'v2'])
+    parser.add_argument('--code-blocks', default=1, type=int)
+    parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--depth', type=int)
+    parser.add_argument('--fanout', default=10, type=int)
+    parser.add_argument('--images', default=1, type=int)
+    parser.add_argument('--jitter', default=0., type=float)
+    parser.add_argument('--json')
+    parser.add_argument('--latency', default=0., type=float)
+    parser.add_argument('--pages', default=DEFAULT_PAGES)
+    parser.add_argument('--refs', default=2, type=int)
+    parser.add_argument('--tables', default=1, type=int)
+    parser.add_argument('--verbose', '-v', action='store_true')
+
+    args = parser.parse_args()
+
+    try:
+        counts = [int(v) for v in args.pages.split(',') if v.strip()]
+    except ValueError:
+        print('[benchmark] invalid page counts provided:', args.pages)
+        return 1
+
+    if args.debug or args.verbose:
+        enable_sphinx_info()
+
+        if 'SPHINX_VERBOSITY' not in os.environ:
+            os.environ['SPHINX_VERBOSITY'] = '2'
+
+    results = []
+    for pages in counts:
+        print(f'[benchmark] building and publishing {pages} pages...')
+        results.append(benchmark(pages, args))
+
+    print()
+    report(results)
+
+    if args.json:
+        with Path(args.json).open('w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
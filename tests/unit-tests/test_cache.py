@@ -1,9 +1,23 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from sphinxcontrib.confluencebuilder.assets import ConfluenceAssetManager
+from sphinxcontrib.confluencebuilder.cachedb import ConfluenceCacheDatabase
+from sphinxcontrib.confluencebuilder.env import ENV_CACHE_ASSETS
+from sphinxcontrib.confluencebuilder.env import ENV_CACHE_DATABASE
+from sphinxcontrib.confluencebuilder.env import ENV_CACHE_DOCHASH
+from sphinxcontrib.confluencebuilder.env import ConfluenceCacheInfo
+from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
 from sphinxcontrib.confluencebuilder.util import temp_dir
 from tests.lib import prepare_dirs
+from tests.lib.emulator import mock_confluence_emulator
+from tests.lib.generator import generate_project
 from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+import json
+import os
+import time
 
 
 class TestCache(ConfluenceTestCase):
@@ -162,3 +176,389 @@ changed content
             self.assertListEqual(changed_docs, [
                 'second',
             ])
+
+    def test_cache_outdated_dependencies(self):
+        """validate handling documents with outdated dependencies"""
+        #
+        # Ensures an unchanged document will be rebuilt if a document it
+        # references has changed its title, while other unchanged documents
+        # are not rebuilt.
+
+        out_dir = prepare_dirs()
+        src_docs = []
+
+        def doctree_resolved_handler(app, doctree, docname):
+            src_docs.append(docname)
+
+        def write_doc(file, data):
+            with file.open('w') as f:
+                f.write(data)
+
+        with temp_dir() as src_dir:
+            write_doc(src_dir / 'index.rst', '''\
+index
+=====
+
+.. toctree::
+
+    first
+    second
+    third
+''')
+
+            write_doc(src_dir / 'first.rst', '''\
+first
+=====
+
+see :doc:`second`
+''')
+
+            second_file = src_dir / 'second.rst'
+            write_doc(second_file, '''\
+second
+======
+
+content
+''')
+
+            write_doc(src_dir / 'third.rst', '''\
+third
+=====
+
+content
+''')
+
+            with self.prepare(src_dir, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertCountEqual(src_docs, [
+                'first',
+                'index',
+                'second',
+                'third',
+            ])
+
+            # re-run with a change to a document's content -- only the
+            # changed document (and its toctree parent) will be rebuilt
+            src_docs.clear()
+            write_doc(second_file, '''\
+second
+======
+
+changed content
+''')
+
+            with self.prepare(src_dir, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertCountEqual(src_docs, [
+                'index',
+                'second',
+            ])
+
+            # re-run with a change to a document's title -- the document
+            # referencing the changed document is also rebuilt
+            src_docs.clear()
+            write_doc(second_file, '''\
+second (updated)
+================
+
+changed content
+''')
+
+            with self.prepare(src_dir, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertCountEqual(src_docs, [
+                'first',
+                'index',
+                'second',
+            ])
+
+    def test_cache_source_stat(self):
+        """validate source documents are only hashed when changed"""
+        #
+        # Ensures source documents which have the same stat as the last run
+        # are not re-hashed when checking for outdated documents.
+
+        out_dir = prepare_dirs()
+        hashed = []
+        hash_asset = ConfluenceUtil.hash_asset
+
+        def tracked_hash_asset(asset):
+            hashed.append(asset.name)
+            return hash_asset(asset)
+
+        config = self.config.clone()
+        config['confluence_publish_workers'] = 2
+
+        # (sources are last modified well before being hashed, since a
+        # recently modified source is always re-hashed)
+        past = time.time() - 60
+
+        with temp_dir() as src_dir:
+            for name in ('index', 'first', 'second'):
+                src_file = src_dir / f'{name}.rst'
+                with src_file.open('w') as f:
+                    f.write(f':orphan:\n\n{name}\n======\n\ncontent\n')
+                os.utime(src_file, (past, past))
+
+            with patch.object(ConfluenceUtil, 'hash_asset', tracked_hash_asset):
+                self.build(src_dir, config=config, out_dir=out_dir)
+
+                self.assertCountEqual(hashed, [
+                    'first.rst',
+                    'index.rst',
+                    'second.rst',
+                ])
+
+                # re-run with no changes -- no documents are hashed
+                hashed.clear()
+                self.build(src_dir, config=config, out_dir=out_dir)
+                self.assertListEqual(hashed, [])
+
+                # re-run with a changed document -- only it is hashed
+                hashed.clear()
+                with (src_dir / 'second.rst').open('a') as f:
+                    f.write('\nchanged content\n')
+
+                self.build(src_dir, config=config, out_dir=out_dir)
+                self.assertListEqual(hashed, [
+                    'second.rst',
+                ])
+
+                # re-run with a document changed shortly after it was last
+                # hashed, where its stat has not changed (e.g. a file system
+                # with a coarse timestamp granularity) -- it is hashed again
+                hashed.clear()
+                src_file = src_dir / 'second.rst'
+                st = src_file.stat()
+                src_file.write_text(src_file.read_text().replace(
+                    'changed', 'CHANGED'))
+                os.utime(src_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+                self.build(src_dir, config=config, out_dir=out_dir)
+                self.assertListEqual(hashed, [
+                    'second.rst',
+                ])
+
+    def test_cache_assets(self):
+        """validate assets are only hashed when changed"""
+        #
+        # Ensures assets which have the same size and modification time as
+        # the last run are not re-hashed when processing documents, unless
+        # an asset was modified close to when it was last hashed.
+
+        out_dir = prepare_dirs()
+        hashed = []
+        hash_asset = ConfluenceUtil.hash_asset
+
+        def tracked_hash_asset(asset):
+            hashed.append(asset.name)
+            return hash_asset(asset)
+
+        # (the source is last modified well before being hashed, since a
+        # recently modified source is always re-hashed)
+        past = time.time() - 60
+
+        with temp_dir() as src_dir:
+            asset = src_dir / 'image03.png'
+            asset.write_bytes((self.assets_dir / 'image03.png').read_bytes())
+
+            index = src_dir / 'index.rst'
+            with index.open('w', encoding='utf-8') as f:
+                f.write('index\n=====\n\n.. image:: image03.png\n')
+            os.utime(index, (past, past))
+
+            with patch.object(ConfluenceUtil, 'hash_asset', tracked_hash_asset):
+                self.build(src_dir, out_dir=out_dir)
+                self.assertIn('image03.png', hashed)
+
+                with (out_dir / ENV_CACHE_ASSETS).open(encoding='utf-8') as f:
+                    cached_assets = json.load(f)
+
+                self.assertEqual(len(cached_assets), 1)
+                entry = next(iter(cached_assets.values()))
+                self.assertEqual(entry['type'], 'image/png')
+
+                # re-run with an asset modified close to when it was last
+                # hashed -- the asset is re-hashed even with a matching stat
+                hashed.clear()
+                self.build(src_dir, out_dir=out_dir)
+                self.assertIn('image03.png', hashed)
+
+                # re-run with an asset last modified well before being hashed
+                os.utime(asset, (past, past))
+
+                hashed.clear()
+                self.build(src_dir, out_dir=out_dir)
+                self.assertIn('image03.png', hashed)
+
+                # re-run with no changes -- no assets are hashed
+                hashed.clear()
+                self.build(src_dir, out_dir=out_dir)
+                self.assertListEqual(hashed, [])
+
+    def test_cache_assets_delayed(self):
+        """validate delayed assets are tracked into the cache"""
+        #
+        # Ensures assets only registered while writing a document (which,
+        # for parallel writes, happens in another process) are tracked into
+        # the cache when assets are finalized.
+
+        cache_info = MagicMock()
+
+        with temp_dir() as work_dir:
+            asset = work_dir / 'asset.png'
+            asset.write_bytes(b'dummy')
+
+            assets = ConfluenceAssetManager(None, work_dir,
+                cache_info=cache_info)
+            assets._delayed_assets.extend([  # noqa: SLF001
+                ('doc-a', 'asset.png', asset, 'hash', 'image/png'),
+                ('doc-b', 'asset.png', asset, 'hash', 'image/png'),
+            ])
+
+            data = assets.finalize_assets()
+
+        self.assertEqual(len(data), 2)
+        cache_info.track_asset_entry.assert_called_once_with(
+            asset, 'hash', 'image/png')
+
+    def test_cache_sqlite(self):
+        """validate handling outdated content with a cache database"""
+        #
+        # Ensures cache information is tracked in a cache database when
+        # configured to use the sqlite backend, where the information of
+        # each published document is retained even if a run is stopped
+        # before the entire cache is saved.
+
+        config = self.config.clone()
+        config['confluence_cache_backend'] = 'sqlite'
+        config['confluence_parent_page'] = 'Docs'
+        config['confluence_publish'] = True
+        out_dir = prepare_dirs()
+        src_docs = []
+
+        def doctree_resolved_handler(app, doctree, docname):
+            src_docs.append(docname)
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            emulator.add_page('Docs')
+            generate_project(src_dir, 3)
+
+            # emulate a run which is stopped before the cache is saved
+            def interrupted_save_cache(cache_info):
+                cache_info._db.close()  # noqa: SLF001
+
+            with self.prepare(src_dir, config=config, out_dir=out_dir) as app, \
+                    patch.object(ConfluenceCacheInfo, 'save_cache',
+                        interrupted_save_cache):
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertCountEqual(src_docs, [
+                'doc-00001',
+                'doc-00002',
+                'index',
+            ])
+
+            self.assertTrue((out_dir / ENV_CACHE_DATABASE).is_file())
+            self.assertFalse((out_dir / ENV_CACHE_DOCHASH).exists())
+
+            db = ConfluenceCacheDatabase(out_dir / ENV_CACHE_DATABASE)
+            db.open()
+            try:
+                self.assertIsNotNone(db.get('config', 'hash'))
+                self.assertIsNotNone(db.get('dochash', 'doc-00001'))
+                self.assertIsNotNone(db.get('pids', 'doc-00001'))
+            finally:
+                db.close()
+
+            # re-run with no changes -- since each document's information
+            # was saved once published, no document will be outdated
+            src_docs.clear()
+
+            with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertListEqual(src_docs, [])
+
+    def test_cache_sqlite_import(self):
+        """validate a new cache database imports an existing cache"""
+        #
+        # Ensures cache information saved by a previous run (using the json
+        # backend) is used when switching to the sqlite backend.
+
+        config = self.config.clone()
+        out_dir = prepare_dirs()
+        src_docs = []
+
+        def doctree_resolved_handler(app, doctree, docname):
+            src_docs.append(docname)
+
+        with temp_dir() as src_dir:
+            generate_project(src_dir, 3)
+
+            with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertEqual(len(src_docs), 3)
+            self.assertTrue((out_dir / ENV_CACHE_DOCHASH).is_file())
+            self.assertFalse((out_dir / ENV_CACHE_DATABASE).exists())
+
+            # re-run with a cache database -- no document will be outdated
+            config['confluence_cache_backend'] = 'sqlite'
+            src_docs.clear()
+
+            with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertListEqual(src_docs, [])
+            self.assertTrue((out_dir / ENV_CACHE_DATABASE).is_file())
+
+    def test_cache_sqlite_write(self):
+        """validate written documents are saved into a cache database"""
+        #
+        # Ensures the information of each written document is retained in
+        # a cache database even if a (non-publishing) run is stopped before
+        # the entire cache is saved.
+
+        config = self.config.clone()
+        config['confluence_cache_backend'] = 'sqlite'
+        out_dir = prepare_dirs()
+        src_docs = []
+
+        def doctree_resolved_handler(app, doctree, docname):
+            src_docs.append(docname)
+
+        # emulate a run which is stopped before the cache is saved
+        def interrupted_save_cache(cache_info):
+            cache_info._db.close()  # noqa: SLF001
+
+        with temp_dir() as src_dir:
+            generate_project(src_dir, 3)
+
+            with self.prepare(src_dir, config=config, out_dir=out_dir) as app, \
+                    patch.object(ConfluenceCacheInfo, 'save_cache',
+                        interrupted_save_cache):
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertEqual(len(src_docs), 3)
+
+            # re-run with no changes -- no document will be outdated
+            src_docs.clear()
+
+            with self.prepare(src_dir, config=config, out_dir=out_dir) as app:
+                app.connect('doctree-resolved', doctree_resolved_handler)
+                app.build()
+
+            self.assertListEqual(src_docs, [])
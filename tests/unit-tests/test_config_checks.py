@@ -276,6 +276,17 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigError):
             self._try_config()
 
+    def test_config_check_cache_backend(self):
+        self.config['confluence_cache_backend'] = 'json'
+        self._try_config()
+
+        self.config['confluence_cache_backend'] = 'sqlite'
+        self._try_config()
+
+        self.config['confluence_cache_backend'] = 'invalid'
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
     def test_config_check_cert_pass(self):
         self.config['confluence_client_cert_pass'] = 'dummy'  # noqa: S105
         self._try_config()
@@ -711,6 +722,35 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigError):
             self._try_config()
 
+    def test_config_check_publish_asset_workers(self):
+        self.config['confluence_publish_asset_workers'] = 1
+        self._try_config()
+
+        self.config['confluence_publish_asset_workers'] = 8
+        self._try_config()
+
+        self.config['confluence_publish_asset_workers'] = '8'
+        self._try_config()
+
+        self.config['confluence_publish_asset_workers'] = 0
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
+    def test_config_check_publish_cache_ttl(self):
+        self.config['confluence_publish_cache_ttl'] = 0
+        self._try_config()
+
+        self.config['confluence_publish_cache_ttl'] = 300
+        self._try_config()
+
+        self.config['confluence_publish_cache_ttl'] = -1
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
+        self.config['confluence_publish_cache_ttl'] = 'dummy'
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
     def test_config_check_publish_debug(self):
         self.config['confluence_publish_debug'] = ''
         self._try_config()
@@ -718,6 +758,12 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         self.config['confluence_publish_debug'] = 'urllib3'
         self._try_config()
 
+        self.config['confluence_publish_debug'] = 'metrics'
+        self._try_config()
+
+        self.config['confluence_publish_debug'] = 'trace'
+        self._try_config()
+
         self.config['confluence_publish_debug'] = 'unknown-entry'
         with self.assertRaises(ConfluenceConfigError):
             self._try_config()
@@ -770,6 +816,35 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigError):
             self._try_config()
 
+    def test_config_check_publish_ledger(self):
+        self.config['confluence_publish_ledger'] = True
+        self._try_config()
+
+        self.config['confluence_publish_ledger'] = False
+        self._try_config()
+
+        self.config['confluence_publish_ledger'] = 'dummy'
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
+    def test_config_check_publish_ledger_verify(self):
+        self.config['confluence_publish_ledger_verify'] = 0
+        self._try_config()
+
+        self.config['confluence_publish_ledger_verify'] = 0.25
+        self._try_config()
+
+        self.config['confluence_publish_ledger_verify'] = '1'
+        self._try_config()
+
+        self.config['confluence_publish_ledger_verify'] = -0.5
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
+        self.config['confluence_publish_ledger_verify'] = 'sometimes'
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
     def test_config_check_publish_list(self):
         dataset = self.test_dir / 'datasets' / 'publish-set'
         assets_dir = self.test_dir / 'assets'
@@ -899,6 +974,17 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         with self.assertRaises(ConfluenceConfigError):
             self._try_config()
 
+    def test_config_check_publish_page_index(self):
+        self.config['confluence_publish_page_index'] = True
+        self._try_config()
+
+        self.config['confluence_publish_page_index'] = False
+        self._try_config()
+
+        self.config['confluence_publish_page_index'] = 'dummy'
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
     def test_config_check_publish_postfix(self):
         self.config['confluence_publish_postfix'] = ''
         self._try_config()
@@ -913,6 +999,17 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         self.config['confluence_publish_prefix'] = 'dummy'
         self._try_config()
 
+    def test_config_check_publish_resume(self):
+        self.config['confluence_publish_resume'] = True
+        self._try_config()
+
+        self.config['confluence_publish_resume'] = False
+        self._try_config()
+
+        self.config['confluence_publish_resume'] = 'dummy'
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
     def test_config_check_publish_retry_attempts(self):
         self.config['confluence_publish_retry_attempts'] = 10
         self._try_config()
@@ -974,6 +1071,24 @@ class TestConfluenceConfigChecks(unittest.TestCase):
         self.config['confluence_publish_token'] = 'dummy'  # noqa: S105
         self._try_config()
 
+    def test_config_check_publish_workers(self):
+        self.config['confluence_publish_workers'] = 1
+        self._try_config()
+
+        self.config['confluence_publish_workers'] = 4
+        self._try_config()
+
+        self.config['confluence_publish_workers'] = '4'
+        self._try_config()
+
+        self.config['confluence_publish_workers'] = 0
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
+        self.config['confluence_publish_workers'] = -1
+        with self.assertRaises(ConfluenceConfigError):
+            self._try_config()
+
     def test_config_check_quote_wrapped_auth(self):
         self.config['confluence_api_token'] = '"test"'  # noqa: S105
         with self.assertRaises(SphinxWarning):
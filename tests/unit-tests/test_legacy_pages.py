@@ -125,7 +125,7 @@ class MockedPublisher:
     def get_base_page_id(self):
         return 1
 
-    def get_descendants(self, page_id, mode):
+    def get_descendants(self, page_id, mode, ancestors=False):
         return set(self.id2page.keys())
 
     def remove_page(self, page_id):
@@ -156,8 +156,11 @@ class MockedPublisher:
     def get_ancestors(self, page_id: int) -> set[int]:
         return set()
 
-    def get_attachments(self, page_id):
-        return {}
+    def get_attachments_bulk(self, page_ids, mode='search'):
+        return {page_id: {} for page_id in page_ids}
+
+    def get_cached_parent(self, page_id):
+        return None
 
     def restrict_ancestors(self, ancestors):
         pass
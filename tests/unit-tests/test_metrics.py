@@ -0,0 +1,194 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger
+from sphinxcontrib.confluencebuilder.metrics import ConfluenceMetrics
+from sphinxcontrib.confluencebuilder.metrics import ConfluenceRequestMetrics
+from sphinxcontrib.confluencebuilder.metrics import normalize_endpoint
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import prepare_dirs
+from tests.lib.emulator import mock_confluence_emulator
+from tests.lib.generator import generate_project
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import json
+import multiprocessing
+import os
+import unittest
+
+
+class TestConfluenceMetrics(ConfluenceTestCase):
+    def test_metrics_disabled(self):
+        out_dir = self.build(self.datasets / 'minimal')
+
+        self.assertTrue((out_dir / 'scb-manifest.json').is_file())
+        self.assertFalse((out_dir / 'scb-metrics.json').exists())
+
+    def test_metrics_phases(self):
+        metrics = ConfluenceMetrics()
+
+        with metrics.track('phase'), metrics.track('phase'):
+            pass
+
+        with metrics.track('phase'):
+            pass
+
+        phase = metrics.phases['phase']
+        self.assertEqual(phase['active'], 0)
+        self.assertEqual(phase['calls'], 3)
+        self.assertGreaterEqual(phase['total'], phase['max'])
+        self.assertGreaterEqual(phase['total'], phase['wall'])
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(),
+        'requires forked processes')
+    def test_metrics_phases_multiprocessing(self):
+        metrics = ConfluenceMetrics()
+        metrics.trace.enabled = True
+
+        def worker(docname):
+            with metrics.track('phase', docname=docname):
+                pass
+
+        # phases tracked in other processes are merged into the metrics
+        ctx = multiprocessing.get_context('fork')
+        with metrics.multiprocessing_tracking():
+            with metrics.track('phase', docname='main'):
+                pass
+
+            for docname in ('doc-a', 'doc-b'):
+                process = ctx.Process(target=worker, args=(docname,))
+                process.start()
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+        phase = metrics.phases['phase']
+        self.assertEqual(phase['active'], 0)
+        self.assertEqual(phase['calls'], 3)
+        self.assertGreaterEqual(phase['total'], phase['max'])
+        self.assertGreaterEqual(phase['total'], phase['wall'])
+
+        # traced spans from other processes are also merged
+        docnames = {e['args']['docname']: e['pid']
+            for e in metrics.trace.events}
+        self.assertCountEqual(docnames, ['main', 'doc-a', 'doc-b'])
+        self.assertEqual(docnames['main'], os.getpid())
+        self.assertNotEqual(docnames['doc-a'], os.getpid())
+
+    def test_metrics_publish(self):
+        config = self.config.clone()
+        config['confluence_parent_page'] = 'Docs'
+        config['confluence_publish'] = True
+        config['confluence_publish_debug'] = 'metrics'
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            emulator.add_page('Docs')
+            generate_project(src_dir, 5)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+            total_requests = emulator.total_requests
+
+        metrics_path = out_dir / 'scb-metrics.json'
+        with metrics_path.open(encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.assertEqual(data['type'], 'SphinxConfluenceBuilder/Metrics')
+
+        phases = data['phases']
+        for phase in ('init', 'prepare_writing', 'doctree_transmute',
+                'preprocess_doctree', 'write_doc', 'publish_doc',
+                'publish_asset', 'publish_cleanup', 'intersphinx',
+                'manifest'):
+            self.assertIn(phase, phases)
+
+        self.assertEqual(phases['write_doc']['calls'], 5)
+        self.assertEqual(phases['publish_doc']['calls'], 5)
+
+        requests = data['requests']
+        self.assertEqual(requests['count'], total_requests)
+        self.assertEqual(requests['retries'], 0)
+        self.assertGreater(requests['received'], 0)
+        self.assertGreater(requests['sent'], 0)
+
+        endpoint = requests['endpoints']['GET rest/api/content/{id}']
+        self.assertEqual(sum(endpoint['status'].values()), endpoint['count'])
+        self.assertIn('p50', endpoint['latency'])
+
+        documents = requests['documents']
+        self.assertCountEqual(documents.keys(), [
+            'doc-00001', 'doc-00002', 'doc-00003', 'doc-00004', 'index',
+        ])
+
+    def test_metrics_publish_summary(self):
+        config = self.config.clone()
+        config['confluence_parent_page'] = 'Docs'
+        config['confluence_publish'] = True
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir, \
+                patch.object(ConfluenceLogger, 'info') as info, \
+                patch.object(ConfluenceLogger, 'verbose') as verbose:
+            emulator.add_page('Docs')
+            generate_project(src_dir, 2)
+
+            self.build(src_dir, config=config)
+
+        # a summary of requests is always reported, where the breakdown of
+        # endpoints/documents is only reported in verbose mode
+        infos = [c.args[0] for c in info.call_args_list if c.args]
+        self.assertEqual(len([msg for msg in infos
+            if msg.startswith('publish requests:')]), 1)
+        self.assertFalse([msg for msg in infos if 'rest/api/' in msg])
+
+        verboses = [c.args[0] for c in verbose.call_args_list if c.args]
+        self.assertTrue([msg for msg in verboses if 'rest/api/' in msg])
+
+    def test_metrics_requests(self):
+        metrics = ConfluenceRequestMetrics()
+
+        metrics.record('GET', 'rest/api/space/KEY', 200, 0, 10, 0.2)
+        with metrics.document('doc-a'):
+            metrics.record('PUT', 'rest/api/content/1', 500, 5, 2, 0.1)
+            metrics.retry()
+            metrics.record('PUT', 'rest/api/content/1', 200, 5, 2, 0.3)
+        metrics.record('PUT', 'rest/api/content/2', None, 5, 0, 0.5)
+
+        summary = metrics.summary()
+        self.assertEqual(summary['count'], 4)
+        self.assertEqual(summary['received'], 14)
+        self.assertEqual(summary['retries'], 1)
+        self.assertEqual(summary['sent'], 15)
+
+        self.assertEqual(summary['documents'], {
+            'doc-a': {
+                'count': 2,
+                'received': 4,
+                'sent': 10,
+            },
+        })
+
+        endpoint = summary['endpoints']['PUT rest/api/content/{id}']
+        self.assertEqual(endpoint['count'], 3)
+        self.assertEqual(endpoint['retries'], 1)
+        self.assertEqual(endpoint['status'], {
+            '200': 1,
+            '500': 1,
+            'error': 1,
+        })
+        self.assertEqual(endpoint['latency'], {
+            'p50': 0.3,
+            'p90': 0.5,
+            'p99': 0.5,
+        })
+
+    def test_metrics_requests_normalize(self):
+        self.assertEqual(normalize_endpoint('rest/api/space/KEY'),
+            'rest/api/space/{key}')
+        self.assertEqual(normalize_endpoint('rest/api/content/12/property/k'),
+            'rest/api/content/{id}/property/{key}')
+        self.assertEqual(normalize_endpoint('api/v2/pages/12/properties/34'),
+            'api/v2/pages/{id}/properties/{id}')
+        self.assertEqual(
+            normalize_endpoint('rest/api/content/12/child/attachment/att34/data'),
+            'rest/api/content/{id}/child/attachment/{id}/data')
@@ -0,0 +1,435 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinx.errors import SphinxWarning
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceCleanupError
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import autocleanup_publisher
+from tests.lib import prepare_conf_publisher
+from tests.lib import prepare_dirs
+from tests.lib.emulator import mock_confluence_emulator
+from tests.lib.generator import generate_project
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import threading
+
+
+class TestConfluencePublishEmulated(ConfluenceTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.config['confluence_parent_page'] = 'Docs'
+        cls.config['confluence_publish'] = True
+        cls.config['confluence_timeout'] = 5
+
+    def _prepare_project(self, src_dir):
+        (src_dir / 'conf.py').write_text('')
+        (src_dir / 'index.rst').write_text('''\
+index
+=====
+
+.. toctree::
+
+    doc-a
+    doc-b
+''')
+
+        (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+content
+''')
+
+        (src_dir / 'doc-b.rst').write_text('''\
+doc-b
+=====
+
+.. toctree::
+
+    doc-c
+''')
+
+        (src_dir / 'doc-c.rst').write_text('''\
+doc-c
+=====
+
+content
+''')
+
+    def _verify_publish(self, config):
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            self._prepare_project(src_dir)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index',
+            ])
+
+            index = emulator.find_page('index')
+            self.assertEqual(index['parent'], docs_id)
+            self.assertEqual(emulator.find_page('doc-a')['parent'], index['id'])
+            self.assertEqual(emulator.find_page('doc-c')['parent'],
+                emulator.find_page('doc-b')['id'])
+
+            # the intersphinx database is attached to the root document
+            self.assertEqual(emulator.attachments(index['id']), [
+                'objects.inv',
+            ])
+
+            # re-publishing unchanged documents does not update any pages
+            emulator.reset_stats()
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.find_page('index')['version'], 1)
+            self.assertEqual(emulator.find_page('doc-c')['version'], 1)
+            self.assertFalse(any(method in ('POST', 'PUT')
+                for method, _ in emulator.requests))
+
+            # changed documents are updated
+            (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+updated content
+''')
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+            self.assertEqual(emulator.find_page('doc-a')['version'], 2)
+            self.assertEqual(emulator.find_page('doc-c')['version'], 1)
+
+    def test_publish_emulated_archive(self):
+        config = self.config.clone()
+        config['confluence_cleanup_archive'] = True
+        config['confluence_publish_workers'] = 3
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config, longtask_delay=1) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            for idx in range(5):
+                emulator.add_page(f'legacy-{idx}', parent=docs_id)
+            self._prepare_project(src_dir)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index',
+            ])
+            self.assertEqual(emulator.pages(status='archived'), [
+                'legacy-0', 'legacy-1', 'legacy-2', 'legacy-3', 'legacy-4',
+            ])
+
+            # each archive request is submitted, with long tasks polled on
+            # together (instead of waiting on each page's long task in turn)
+            archives = emulator.requests[('POST', '/rest/api/content/archive')]
+            self.assertEqual(archives, 5)
+            polls = emulator.requests[('GET', '/rest/api/longtask/{key}')]
+            self.assertLessEqual(polls, 5 * 3)
+
+    def test_publish_emulated_archive_bulk(self):
+        config = self.config.clone()
+        config['confluence_adv_bulk_archiving'] = True
+        config['confluence_cleanup_archive'] = True
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            for idx in range(3):
+                emulator.add_page(f'legacy-{idx}', parent=docs_id)
+            self._prepare_project(src_dir)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.pages(status='archived'), [
+                'legacy-0', 'legacy-1', 'legacy-2',
+            ])
+
+            archives = emulator.requests[('POST', '/rest/api/content/archive')]
+            self.assertEqual(archives, 1)
+
+    def test_publish_emulated_archive_timeout(self):
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config, longtask_delay=60) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            page_ids = [emulator.add_page(f'page-{idx}') for idx in range(3)]
+
+            publisher.init(config)
+            publisher.connect()
+
+            longtasks = [publisher.submit_archive([page_id])
+                for page_id in page_ids]
+
+            # the timeout applies to all long tasks being waited on
+            with self.assertRaises(ConfluenceBadApiError):
+                list(publisher.wait_for_longtasks(longtasks, timeout=1))
+
+            polls = emulator.requests[('GET', '/rest/api/longtask/{key}')]
+            self.assertLessEqual(polls, 3 * 2)
+
+    def test_publish_emulated_archive_incomplete(self):
+        config = self.config.clone()
+        config['confluence_cleanup_archive'] = True
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config, longtask_delay=60) as emulator, \
+                temp_dir() as src_dir, \
+                patch('sphinxcontrib.confluencebuilder.builder.LONGTASK_TIMEOUT',
+                    0.5):
+            docs_id = emulator.add_page('Docs')
+            legacy_ids = [emulator.add_page(f'legacy-{idx}', parent=docs_id)
+                for idx in range(2)]
+            self._prepare_project(src_dir)
+
+            # archive requests which do not complete in time are reported
+            # as a warning (instead of failing the cleanup)
+            with self.assertRaisesRegex(SphinxWarning,
+                    'archive requests') as cm:
+                self.build(src_dir, config=config, out_dir=out_dir)
+
+            # the warning reports which pages are still outstanding
+            for legacy_id in legacy_ids:
+                self.assertIn(legacy_id, str(cm.exception))
+
+            archives = emulator.requests[('POST', '/rest/api/content/archive')]
+            self.assertEqual(archives, 2)
+
+    def test_publish_emulated_cleanup(self):
+        config = self.config.clone()
+        config['confluence_cleanup_purge'] = True
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            legacy_id = emulator.add_page('legacy', parent=docs_id)
+            emulator.add_page('legacy-child', parent=legacy_id)
+            emulator.add_page('unrelated')
+            self._prepare_project(src_dir)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index', 'unrelated',
+            ])
+
+    def test_publish_emulated_cleanup_background(self):
+        config = self.config.clone()
+        config['confluence_cleanup_purge'] = True
+        config['confluence_publish_workers'] = 2
+        out_dir = prepare_dirs()
+
+        published = []
+        all_published = threading.Event()
+        discovery_threads = []
+        get_descendants = ConfluencePublisher.get_descendants
+        store_page = ConfluencePublisher.store_page
+
+        def tracked_store_page(publisher, *args, **kwargs):
+            rv = store_page(publisher, *args, **kwargs)
+            published.append(rv[0])
+            if len(published) == 4:
+                all_published.set()
+            return rv
+
+        # hold discovery until all documents have been published, ensuring
+        # discovery overlaps publishing and finds the newly published pages
+        def delayed_get_descendants(publisher, *args, **kwargs):
+            discovery_threads.append(threading.current_thread().name)
+            all_published.wait(timeout=10)
+            return get_descendants(publisher, *args, **kwargs)
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            emulator.add_page('legacy', parent=docs_id)
+            self._prepare_project(src_dir)
+
+            with patch.object(ConfluencePublisher, 'get_descendants',
+                    delayed_get_descendants), \
+                    patch.object(ConfluencePublisher, 'store_page',
+                    tracked_store_page):
+                self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertTrue(all_published.is_set())
+            self.assertEqual(len(discovery_threads), 1)
+            self.assertTrue(discovery_threads[0].startswith('scb-discovery'))
+
+            # only legacy pages are removed
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index',
+            ])
+
+    def test_publish_emulated_cleanup_concurrent(self):
+        config = self.config.clone()
+        config['confluence_cleanup_purge'] = True
+        config['confluence_publish_workers'] = 3
+        out_dir = prepare_dirs()
+
+        removed = []
+        remove_page = ConfluencePublisher.remove_page
+
+        def tracked_remove_page(publisher, page_id):
+            remove_page(publisher, page_id)
+            removed.append(page_id)
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            index_id = emulator.add_page('index', parent=docs_id)
+            emulator.add_attachment(index_id, 'legacy.png')
+
+            parents = {}
+            legacy_id = emulator.add_page('legacy', parent=docs_id)
+            emulator.add_attachment(legacy_id, 'legacy.png')
+            for idx in range(3):
+                child_id = emulator.add_page(f'legacy-{idx}', parent=legacy_id)
+                parents[child_id] = legacy_id
+                for sub_idx in range(2):
+                    grandchild_id = emulator.add_page(
+                        f'legacy-{idx}-{sub_idx}', parent=child_id)
+                    parents[grandchild_id] = child_id
+
+            self._prepare_project(src_dir)
+
+            emulator.reset_stats()
+            with patch.object(ConfluencePublisher, 'remove_page',
+                    tracked_remove_page):
+                self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index',
+            ])
+            self.assertEqual(emulator.attachments(index_id), [
+                'objects.inv',
+            ])
+
+            # attachments on removed pages are not removed individually
+            deletes = emulator.requests[('DELETE', '/rest/api/content/{id}')]
+            self.assertEqual(deletes, len(parents) + 2)
+
+            # pages are removed before their ancestors
+            self.assertEqual(len(removed), len(parents) + 1)
+            for page_id, parent_id in parents.items():
+                self.assertLess(removed.index(page_id),
+                    removed.index(parent_id))
+
+    def test_publish_emulated_cleanup_failures(self):
+        config = self.config.clone()
+        config['confluence_cleanup_purge'] = True
+        config['confluence_publish_workers'] = 2
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            docs_id = emulator.add_page('Docs')
+            legacy_ids = [emulator.add_page(f'legacy-{idx}', parent=docs_id)
+                for idx in range(4)]
+            self._prepare_project(src_dir)
+
+            remove_page = ConfluencePublisher.remove_page
+
+            def failing_remove_page(publisher, page_id):
+                if page_id == legacy_ids[1]:
+                    raise ConfluenceBadApiError(409, 'conflict')
+                remove_page(publisher, page_id)
+
+            # a failed removal is reported after all other content is removed
+            with patch.object(ConfluencePublisher, 'remove_page',
+                    failing_remove_page), \
+                    self.assertRaises(ConfluenceCleanupError) as cm:
+                self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertIn(f'page {legacy_ids[1]}', str(cm.exception))
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index', 'legacy-1',
+            ])
+
+    def test_publish_emulated_faults(self):
+        config = self.config.clone()
+        config['confluence_publish_retry_duration'] = 1
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            emulator.add_page('Docs')
+            self._prepare_project(src_dir)
+
+            # requests are retried when the instance fails
+            emulator.inject(500)
+            emulator.inject(503)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertEqual(emulator.faults, 2)
+            self.assertEqual(emulator.pages(), [
+                'Docs', 'doc-a', 'doc-b', 'doc-c', 'index',
+            ])
+
+    def test_publish_emulated_generated(self):
+        config = self.config.clone()
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            emulator.add_page('Docs')
+            docnames = generate_project(src_dir, 20, depth=2, images=2)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+
+            self.assertCountEqual(emulator.pages(), ['Docs', *docnames])
+
+            for docname in docnames:
+                page = emulator.find_page(docname)
+                attachments = emulator.attachments(page['id'])
+                self.assertIn(f'{docname}-0.png', attachments)
+                self.assertIn(f'{docname}-1.png', attachments)
+
+    def test_publish_emulated_rate_limited(self):
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config, retry_after=0) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            page_id = emulator.add_page('Docs')
+
+            # requests are retried when rate limited
+            emulator.inject(429)
+
+            publisher.init(config)
+            publisher.connect()
+
+            _, page = publisher.get_page_by_id(page_id)
+            self.assertEqual(page['title'], 'Docs')
+            self.assertEqual(emulator.faults, 1)
+
+            space_route = ('GET', '/rest/api/space/{key}')
+            self.assertEqual(emulator.requests[space_route], 2)
+
+    def test_publish_emulated_v1(self):
+        config = self.config.clone()
+        config['confluence_api_mode'] = 'v1'
+
+        self._verify_publish(config)
+
+    def test_publish_emulated_v1_search(self):
+        config = self.config.clone()
+        config['confluence_api_mode'] = 'v1'
+        config['confluence_page_search_mode'] = 'search'
+
+        self._verify_publish(config)
+
+    def test_publish_emulated_v2(self):
+        config = self.config.clone()
+        config['confluence_api_mode'] = 'v2'
+
+        self._verify_publish(config)
@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from sphinxcontrib.confluencebuilder.env import ENV_CACHE_JOURNAL
+from sphinxcontrib.confluencebuilder.journal import ConfluencePublishJournal
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+
+
+class TestConfluencePublishJournal(ConfluenceTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.config['confluence_publish'] = True
+        cls.config['confluence_publish_intersphinx'] = False
+        cls.config['confluence_server_url'] = 'https://example.com/'
+        cls.config['confluence_space_key'] = 'TEST'
+
+    def _publish(self, src_dir, out_dir, publisher, config=None):
+        old_init = ConfluenceBuilder.init
+
+        def wrapped_init(builder):
+            builder.publisher = publisher
+            return old_init(builder)
+
+        publisher.stored = []
+
+        with patch.object(ConfluenceBuilder, 'init', wrapped_init):
+            self.build(src_dir, config=config or self.config, out_dir=out_dir)
+
+    def _prepare_project(self, src_dir):
+        (src_dir / 'conf.py').write_text('')
+        (src_dir / 'index.rst').write_text('''\
+index
+=====
+
+.. toctree::
+
+    doc-a
+    doc-b
+''')
+
+        for docname in ['doc-a', 'doc-b']:
+            (src_dir / f'{docname}.rst').write_text(f'''\
+{docname}
+=====
+
+content
+''')
+
+    def test_publish_journal_resume(self):
+        out_dir = prepare_dirs()
+        publisher = MockedPublisher()
+
+        config = self.config.clone()
+        config['confluence_publish_resume'] = True
+
+        with temp_dir() as src_dir:
+            self._prepare_project(src_dir)
+
+            # an interrupted publish leaves a journal behind
+            publisher.failures.add('doc-b')
+            with self.assertRaises(MockedPublishError):
+                self._publish(src_dir, out_dir, publisher, config=config)
+
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a'])
+            self.assertTrue((out_dir / ENV_CACHE_JOURNAL).is_file())
+
+            # resuming only publishes the remaining pages
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertEqual(publisher.stored, ['doc-b'])
+            self.assertFalse((out_dir / ENV_CACHE_JOURNAL).exists())
+
+            # a completed publish has nothing to resume from
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a', 'doc-b'])
+
+    def test_publish_journal_resume_changed(self):
+        out_dir = prepare_dirs()
+        publisher = MockedPublisher()
+
+        config = self.config.clone()
+        config['confluence_publish_resume'] = True
+
+        with temp_dir() as src_dir:
+            self._prepare_project(src_dir)
+
+            publisher.failures.add('doc-b')
+            with self.assertRaises(MockedPublishError):
+                self._publish(src_dir, out_dir, publisher, config=config)
+
+            # a journal is not used if the documents have changed
+            (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+updated content
+''')
+
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a', 'doc-b'])
+
+    def test_publish_journal_resume_after_plain_publish(self):
+        out_dir = prepare_dirs()
+        publisher = MockedPublisher()
+
+        with temp_dir() as src_dir:
+            self._prepare_project(src_dir)
+
+            # an interrupted publish (not requesting resume)
+            publisher.failures.add('doc-b')
+            with self.assertRaises(MockedPublishError):
+                self._publish(src_dir, out_dir, publisher)
+
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a'])
+
+            # a re-run requesting a resume (with other publish-control
+            # options changed) only publishes the remaining pages
+            config = self.config.clone()
+            config['confluence_publish_resume'] = True
+            config['confluence_publish_workers'] = 2
+
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertEqual(publisher.stored, ['doc-b'])
+
+    def test_publish_journal_without_resume(self):
+        out_dir = prepare_dirs()
+        publisher = MockedPublisher()
+
+        with temp_dir() as src_dir:
+            self._prepare_project(src_dir)
+
+            publisher.failures.add('doc-b')
+            with self.assertRaises(MockedPublishError):
+                self._publish(src_dir, out_dir, publisher)
+
+            # a journal is ignored if not resuming
+            self._publish(src_dir, out_dir, publisher)
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a', 'doc-b'])
+
+    def test_publish_journal_partial_entry(self):
+        with temp_dir() as tmp_dir:
+            path = tmp_dir / 'journal'
+
+            journal = ConfluencePublishJournal(path)
+            self.assertEqual(journal.start('hash'), 0)
+            journal.record('page', 'doc-a', id='1')
+
+            # simulate an interrupted write of a step
+            with path.open('a', encoding='utf-8') as f:
+                f.write('{"step": "page", "key": "do')
+
+            journal = ConfluencePublishJournal(path)
+            self.assertEqual(journal.start('hash', resume=True), 1)
+            self.assertEqual(journal.lookup('page', 'doc-a'), {'id': '1'})
+
+            journal.record('page', 'doc-b', id='2')
+
+            journal = ConfluencePublishJournal(path)
+            self.assertEqual(journal.start('hash', resume=True), 2)
+
+            # journals for other builds are not resumed
+            journal = ConfluencePublishJournal(path)
+            self.assertEqual(journal.start('other', resume=True), 0)
+            self.assertIsNone(journal.lookup('page', 'doc-a'))
+
+            journal.complete()
+            self.assertFalse(path.exists())
+
+
+class MockedPublishError(Exception):
+    pass
+
+
+class MockedPublisher:
+    def __init__(self):
+        self.failures = set()
+        self.ids = {}
+        self.stored = []
+
+    def init(self, config, cloud=None):
+        pass
+
+    def get_base_page_id(self):
+        return 1
+
+    def store_page(self, page_name, data, parent_id=None, force=False):
+        if page_name in self.failures:
+            self.failures.remove(page_name)
+            msg = f'failed to publish: {page_name}'
+            raise MockedPublishError(msg)
+
+        self.stored.append(page_name)
+
+        page_id = self.ids.setdefault(page_name, str(len(self.ids) + 2))
+        return page_id, False
+
+    # other unused methods
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_ancestors(self, page_id: int) -> set[int]:
+        return set()
+
+    def restrict_ancestors(self, ancestors):
+        pass
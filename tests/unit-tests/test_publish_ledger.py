@@ -0,0 +1,172 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import prepare_dirs
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+
+
+class TestConfluencePublishLedger(ConfluenceTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.config['confluence_publish'] = True
+        cls.config['confluence_publish_intersphinx'] = False
+        cls.config['confluence_publish_ledger'] = True
+        cls.config['confluence_server_url'] = 'https://example.com/'
+        cls.config['confluence_space_key'] = 'TEST'
+
+    def _publish(self, src_dir, out_dir, publisher, config=None):
+        old_init = ConfluenceBuilder.init
+
+        def wrapped_init(builder):
+            builder.publisher = publisher
+            return old_init(builder)
+
+        publisher.stored = []
+        publisher.verified = []
+
+        with patch.object(ConfluenceBuilder, 'init', wrapped_init):
+            self.build(src_dir, config=config or self.config, out_dir=out_dir)
+
+    def test_publish_ledger(self):
+        out_dir = prepare_dirs()
+        publisher = MockedPublisher()
+
+        with temp_dir() as src_dir:
+            (src_dir / 'conf.py').write_text('')
+            (src_dir / 'index.rst').write_text('''\
+index
+=====
+
+.. toctree::
+
+    doc-a
+''')
+
+            (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+content
+''')
+
+            # initial publish stores all pages
+            self._publish(src_dir, out_dir, publisher)
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a'])
+
+            # unchanged pages skip any publish requests
+            self._publish(src_dir, out_dir, publisher)
+            self.assertEqual(publisher.stored, [])
+            self.assertEqual(publisher.verified, [])
+
+            # only changed pages are published
+            (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+updated content
+''')
+
+            self._publish(src_dir, out_dir, publisher)
+            self.assertEqual(publisher.stored, ['doc-a'])
+
+            # forced publishing ignores the ledger
+            config = self.config.clone()
+            config['confluence_publish_force'] = True
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a'])
+
+    def test_publish_ledger_verify(self):
+        out_dir = prepare_dirs()
+        publisher = MockedPublisher()
+
+        config = self.config.clone()
+        config['confluence_publish_ledger_verify'] = 1
+
+        with temp_dir() as src_dir:
+            (src_dir / 'conf.py').write_text('')
+            (src_dir / 'index.rst').write_text('''\
+index
+=====
+
+.. toctree::
+
+    doc-a
+''')
+
+            (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+content
+''')
+
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertCountEqual(publisher.stored, ['index', 'doc-a'])
+
+            # unchanged pages with matching remote versions are skipped
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertEqual(publisher.stored, [])
+            self.assertCountEqual(publisher.verified, ['index', 'doc-a'])
+
+            # pages modified outside of the ledger are checked again
+            publisher.versions['doc-a'] += 1
+
+            self._publish(src_dir, out_dir, publisher, config=config)
+            self.assertEqual(publisher.stored, ['doc-a'])
+
+
+class MockedPublisher:
+    def __init__(self):
+        self.ids = {}
+        self.stored = []
+        self.verified = []
+        self.versions = {}
+
+    def init(self, config, cloud=None):
+        pass
+
+    def get_base_page_id(self):
+        return 1
+
+    def get_page_by_id(self, page_id, expand='version'):
+        title = next(k for k, v in self.ids.items() if v == page_id)
+        self.verified.append(title)
+
+        return page_id, {
+            'id': page_id,
+            'title': title,
+            'version': {
+                'number': self.versions[title],
+            },
+        }
+
+    def get_page_version(self, page_id):
+        title = next(k for k, v in self.ids.items() if v == page_id)
+        return self.versions[title]
+
+    def store_page(self, page_name, data, parent_id=None, force=False):
+        self.stored.append(page_name)
+
+        page_id = self.ids.setdefault(page_name, str(len(self.ids) + 2))
+        self.versions[page_name] = self.versions.get(page_name, 0) + 1
+
+        return page_id, False
+
+    # other unused methods
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_ancestors(self, page_id: int) -> set[int]:
+        return set()
+
+    def restrict_ancestors(self, ancestors):
+        pass
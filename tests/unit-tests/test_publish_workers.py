@@ -0,0 +1,220 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.builder import ConfluenceBuilder
+from sphinxcontrib.confluencebuilder.concurrency import dependency_pool
+from sphinxcontrib.confluencebuilder.state import ConfluenceState
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib.testcase import ConfluenceTestCase
+from unittest.mock import patch
+import shutil
+import threading
+import time
+
+
+class TestConfluencePublishWorkers(ConfluenceTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.dataset = cls.datasets / 'hierarchy'
+
+    def test_publish_workers_assets(self):
+        def publish(workers):
+            config = dict(self.config)
+            config['confluence_publish'] = True
+            config['confluence_publish_asset_workers'] = workers
+            config['confluence_publish_intersphinx'] = False
+            config['confluence_server_url'] = 'https://example.com/'
+            config['confluence_space_key'] = 'TEST'
+
+            old_init = ConfluenceBuilder.init
+            publisher = MockedPublisher()
+            events = []
+
+            def track_event(app, docname, key, attachment_id, meta):
+                events.append(key)
+
+            def wrapped_init(builder):
+                builder.publisher = publisher
+                builder.app.connect('confluence-publish-attachment', track_event)
+                return old_init(builder)
+
+            with temp_dir() as src_dir:
+                for image in ('image01.png', 'image02.png', 'image03.png'):
+                    shutil.copy(self.assets_dir / image, src_dir / image)
+
+                (src_dir / 'conf.py').write_text('')
+                (src_dir / 'index.rst').write_text('''\
+index
+=====
+
+.. toctree::
+
+    doc-a
+    doc-b
+''')
+
+                (src_dir / 'doc-a.rst').write_text('''\
+doc-a
+=====
+
+.. image:: image01.png
+.. image:: image02.png
+.. image:: image03.png
+''')
+
+                (src_dir / 'doc-b.rst').write_text('''\
+doc-b
+=====
+
+.. image:: image03.png
+.. image:: image02.png
+''')
+
+                with patch.object(ConfluenceBuilder, 'init', wrapped_init):
+                    self.build(src_dir, config=config)
+
+            return publisher.attachments, events
+
+        serial_attachments, serial_events = publish(1)
+        attachments, events = publish(4)
+
+        # all attachments uploaded (and events fired) for each page in the
+        # same order as a serial publish
+        self.assertEqual(len(serial_attachments), 5)
+        self.assertCountEqual(attachments, serial_attachments)
+        self.assertCountEqual(events, serial_events)
+
+        for page_id in (2, 3):
+            self.assertEqual(
+                [name for pid, name in attachments if pid == page_id],
+                [name for pid, name in serial_attachments if pid == page_id],
+            )
+
+    def test_publish_workers_dependency_pool_error(self):
+        def process(item):
+            if item == 'b':
+                msg = 'failure'
+                raise ValueError(msg)
+            return item
+
+        results = dependency_pool(process, ['a', 'b', 'c'], 2)
+        with self.assertRaises(ValueError):
+            list(results)
+
+    def test_publish_workers_dependency_pool_order(self):
+        dependencies = {
+            'a': [],
+            'b': ['a'],
+            'c': ['a'],
+            'd': ['b', 'unknown'],
+        }
+
+        processed = []
+
+        def process(item):
+            processed.append(item)
+            return item.upper()
+
+        results = list(dependency_pool(process, dependencies.keys(), 4,
+            depends=dependencies.get))
+
+        self.assertCountEqual(results, [
+            ('a', 'A'),
+            ('b', 'B'),
+            ('c', 'C'),
+            ('d', 'D'),
+        ])
+
+        self.assertEqual(processed[0], 'a')
+        self.assertLess(processed.index('b'), processed.index('d'))
+
+    def test_publish_workers_hierarchy(self):
+        config = dict(self.config)
+        config['confluence_publish'] = True
+        config['confluence_publish_intersphinx'] = False
+        config['confluence_publish_workers'] = 4
+        config['confluence_server_url'] = 'https://example.com/'
+        config['confluence_space_key'] = 'TEST'
+
+        old_init = ConfluenceBuilder.init
+        publisher = MockedPublisher()
+
+        def wrapped_init(builder):
+            builder.publisher = publisher
+            return old_init(builder)
+
+        with patch.object(ConfluenceBuilder, 'init', wrapped_init):
+            self.build(self.dataset, config=config)
+
+        self.assertEqual(len(publisher.published), 9)
+
+        # each child page should be published with its parent's page id
+        for docname in publisher.docnames:
+            title = ConfluenceState.title(docname)
+            parent_id = publisher.published[title]
+
+            parent = ConfluenceState.parent_docname(docname)
+            if parent:
+                expected_id = str(ConfluenceState.upload_id(parent))
+            else:
+                expected_id = '1'
+
+            self.assertEqual(parent_id, expected_id, docname)
+
+
+class MockedPublisher:
+    def init(self, config, cloud=None):
+        self.docnames = [
+            'index',
+            'toctree-doc1',
+            'toctree-doc2',
+            'toctree-doc2a',
+            'toctree-doc2aa',
+            'toctree-doc2aaa',
+            'toctree-doc2b',
+            'toctree-doc2c',
+            'toctree-doc3',
+        ]
+        self.attachments = []
+        self.lock = threading.Lock()
+        self.next_page_id = 2
+        self.published = {}
+
+    def get_base_page_id(self):
+        return 1
+
+    def store_attachment(self, page_id, name, data, mimetype, hash_, force=False):
+        # delay to help ensure workers overlap
+        time.sleep(0.01)
+
+        with self.lock:
+            self.attachments.append((int(page_id), name))
+
+        return name
+
+    def store_page(self, page_name, data, parent_id=None, force=False):
+        # delay to help ensure workers overlap
+        time.sleep(0.01)
+
+        with self.lock:
+            page_id = self.next_page_id
+            self.next_page_id += 1
+            self.published[page_name] = str(parent_id)
+
+        return page_id, False
+
+    # other unused methods
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_ancestors(self, page_id: int) -> set[int]:
+        return set()
+
+    def restrict_ancestors(self, ancestors):
+        pass
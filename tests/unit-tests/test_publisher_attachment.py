@@ -0,0 +1,205 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import mock_confluence_instance
+from tests.lib import prepare_conf_publisher
+from tests.lib.emulator import mock_confluence_emulator
+from unittest.mock import patch
+import unittest
+
+
+class TestConfluencePublisherAttachment(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = prepare_conf_publisher()
+        cls.config.confluence_space_key = 'MOCK'
+
+        cls.std_space_connect_rsp = {
+            'id': 1,
+            'key': 'MOCK',
+            'name': 'Mock Space',
+            'type': 'global',
+        }
+
+        cls.std_attachments_rsp = {
+            'results': [
+                {
+                    'id': '2001',
+                    'title': 'image01.png',
+                    'metadata': {
+                        'comment': 'SCB_KEY:12345678\n90abcdef',
+                    },
+                },
+                {
+                    'id': '2002',
+                    'title': 'image02.png',
+                    'metadata': {
+                        'comment': 'SCB_KEY:fedcba09\n87654321',
+                    },
+                },
+            ],
+            'size': 2,
+        }
+
+    def test_publisher_attachment_index(self):
+        """validate publisher lists attachments once per page"""
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.register_get_rsp(200, self.std_attachments_rsp)
+
+            attachment_id = publisher.store_attachment(
+                '1000', 'image01.png', b'', 'image/png', '1234567890abcdef')
+            self.assertEqual(attachment_id, '2001')
+
+            # verify a single listing request was made for the page
+            list_req = daemon.pop_get_request()
+            self.assertIsNotNone(list_req)
+            req_path, _ = list_req
+            self.assertTrue(req_path.startswith(
+                '/rest/api/content/1000/child/attachment?'))
+            self.assertNotIn('filename', req_path)
+
+            # additional attachments on the same page use the listing
+            attachment_id = publisher.store_attachment(
+                '1000', 'image02.png', b'', 'image/png', 'fedcba0987654321')
+            self.assertEqual(attachment_id, '2002')
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_attachment_index_listing(self):
+        """validate publisher re-uses a page's attachment listing"""
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.register_get_rsp(200, self.std_attachments_rsp)
+
+            attachments = publisher.get_attachments('1000')
+            self.assertEqual(attachments, {
+                '2001': 'image01.png',
+                '2002': 'image02.png',
+            })
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            attachment_id = publisher.store_attachment(
+                '1000', 'image02.png', b'', 'image/png', 'fedcba0987654321')
+            self.assertEqual(attachment_id, '2002')
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+            # removing an attachment drops it from the listing
+            daemon.register_delete_rsp(200)
+            publisher.remove_attachment('2002')
+            self.assertIsNotNone(daemon.pop_delete_request())
+
+            page_attachments = publisher._attachment_index['1000']  # noqa: SLF001
+            self.assertIn('image01.png', page_attachments)
+            self.assertNotIn('image02.png', page_attachments)
+
+            daemon.check_unhandled_requests()
+
+    def test_publisher_attachment_bulk(self):
+        """validate publisher can search for attachments over many pages"""
+
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            expected = {}
+            for idx in range(5):
+                page_id = emulator.add_page(f'page-{idx}')
+                expected[page_id] = {}
+                for att_idx in range(idx):
+                    name = f'image-{idx}-{att_idx}.png'
+                    att_id = emulator.add_attachment(page_id, name)
+                    expected[page_id][att_id] = name
+
+            other_id = emulator.add_page('other')
+            emulator.add_attachment(other_id, 'other.png')
+
+            publisher.init(config)
+            publisher.connect()
+            emulator.reset_stats()
+
+            with patch('sphinxcontrib.confluencebuilder.publisher.CQL_IN_LIMIT',
+                    2):
+                attachments = publisher.get_attachments_bulk(expected.keys())
+
+            self.assertEqual(attachments, expected)
+
+            # a single search for each group of pages
+            self.assertEqual(emulator.total_requests, 3)
+
+    def test_publisher_attachment_bulk_direct(self):
+        """validate publisher can list attachments over many pages"""
+
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            expected = {}
+            for idx in range(3):
+                page_id = emulator.add_page(f'page-{idx}')
+                expected[page_id] = {}
+                for att_idx in range(idx):
+                    name = f'image-{idx}-{att_idx}.png'
+                    att_id = emulator.add_attachment(page_id, name)
+                    expected[page_id][att_id] = name
+
+            publisher.init(config)
+            publisher.connect()
+            emulator.reset_stats()
+
+            attachments = publisher.get_attachments_bulk(expected.keys(),
+                mode='direct')
+            self.assertEqual(attachments, expected)
+
+            # attachments of each page are listed (no search is made)
+            self.assertEqual(emulator.total_requests, 3)
+            self.assertEqual(emulator.requests[
+                ('GET', '/rest/api/content/search')], 0)
+
+    def test_publisher_attachment_bulk_partial_pages(self):
+        """validate publisher searches for attachments over partial pages"""
+
+        config = prepare_conf_publisher()
+
+        # emulate an instance which returns less results than requested for
+        # each page of results
+        with patch('tests.lib.emulator.MAX_LIMIT', 2), \
+                mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            page_id = emulator.add_page('page')
+            expected = {page_id: {}}
+            for idx in range(5):
+                name = f'image-{idx}.png'
+                expected[page_id][emulator.add_attachment(page_id, name)] = name
+
+            publisher.init(config)
+            publisher.connect()
+
+            for mode in ('direct', 'search'):
+                with self.subTest(mode=mode):
+                    attachments = publisher.get_attachments_bulk(
+                        expected.keys(), mode=mode)
+                    self.assertEqual(attachments, expected)
@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import prepare_conf_publisher
+from tests.lib.emulator import mock_confluence_emulator
+from unittest.mock import patch
+import sys
+import unittest
+
+
+class TestConfluencePublisherDescendants(unittest.TestCase):
+    def test_publisher_descendants_aggressive(self):
+        config = prepare_conf_publisher()
+        config.confluence_publish_workers = 3
+
+        with mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            root_id = emulator.add_page('root')
+            expected = set()
+            for idx in range(4):
+                child_id = emulator.add_page(f'child-{idx}', parent=root_id)
+                expected.add(child_id)
+                for sub_idx in range(3):
+                    expected.add(emulator.add_page(
+                        f'child-{idx}-{sub_idx}', parent=child_id))
+            emulator.add_page('unrelated')
+
+            publisher.init(config)
+            publisher.connect()
+
+            searched = []
+
+            def progress(count, found):
+                searched.append((count, found))
+
+            descendants = publisher.get_descendants(
+                root_id, 'search-aggressive', progress=progress)
+            self.assertEqual(descendants, expected)
+
+            # each discovered page is searched on only once
+            self.assertEqual(len(searched), len(expected) + 1)
+            self.assertEqual(searched[-1], (len(expected) + 1, len(expected)))
+
+            # consistent with a non-aggressive search
+            descendants = publisher.get_descendants(root_id, 'search')
+            self.assertEqual(descendants, expected)
+
+    def test_publisher_descendants_ancestors(self):
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            root_id = emulator.add_page('root')
+            child_id = emulator.add_page('child', parent=root_id)
+
+            publisher.init(config)
+            publisher.connect()
+
+            # parents are not tracked unless ancestors are requested
+            descendants = publisher.get_descendants(root_id, 'search')
+            self.assertEqual(descendants, {child_id})
+            self.assertIsNone(publisher.get_cached_parent(child_id))
+
+            descendants = publisher.get_descendants(
+                root_id, 'search', ancestors=True)
+            self.assertEqual(descendants, {child_id})
+            self.assertEqual(publisher.get_cached_parent(child_id), root_id)
+
+    def test_publisher_descendants_partial_pages(self):
+        config = prepare_conf_publisher()
+
+        # emulate an instance which returns less results than requested for
+        # each page of results
+        with patch('tests.lib.emulator.MAX_LIMIT', 4), \
+                mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            root_id = emulator.add_page('root')
+            expected = {emulator.add_page(f'child-{idx}', parent=root_id)
+                for idx in range(10)}
+
+            publisher.init(config)
+            publisher.connect()
+
+            descendants = publisher.get_descendants(root_id, 'search')
+            self.assertEqual(descendants, expected)
+
+    def test_publisher_descendants_aggressive_deep(self):
+        config = prepare_conf_publisher()
+        depth = sys.getrecursionlimit() * 2
+
+        # emulate a deep hierarchy, where each search reports a page's
+        # child along with an (already known) sibling entry
+        def get_descendants(page_id, mode, *, ancestors=False):
+            if page_id is None:
+                return {'0'}
+
+            if int(page_id) >= depth:
+                return set()
+
+            return {str(int(page_id) + 1), page_id}
+
+        with autocleanup_publisher(ConfluencePublisher) as publisher:
+            publisher.init(config)
+
+            with patch.object(publisher, '_get_descendants',
+                    side_effect=get_descendants) as mocked:
+                descendants = publisher.get_descendants(
+                    None, 'search-aggressive')
+
+            self.assertEqual(len(descendants), depth + 1)
+            self.assertEqual(mocked.call_count, depth + 2)
@@ -4,9 +4,12 @@
 from collections import defaultdict
 from sphinxcontrib.confluencebuilder.publisher import CB_PROP_KEY
 from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
 from tests.lib import autocleanup_publisher
 from tests.lib import mock_confluence_instance
 from tests.lib import prepare_conf_publisher
+from tests.lib.emulator import mock_confluence_emulator
+from unittest.mock import patch
 import unittest
 
 
@@ -269,3 +272,113 @@ class TestConfluencePublisherPage(unittest.TestCase):
 
             # verify that no update request was made
             daemon.check_unhandled_requests()
+
+    def test_publisher_page_store_page_unchanged_v2(self):
+        """validate publisher fetches builder properties with a page (v2)"""
+        #
+        # Verify that a publisher checking an unchanged page (v2) will fetch
+        # this extension's properties as part of the page lookup, and not
+        # with an additional property request.
+
+        config = self.config.clone()
+        config.confluence_api_mode = 'v2'
+        config.confluence_append_labels = False
+
+        page_content = 'dummy page data'
+        page_version = 3
+        page_hash = ConfluenceUtil.hash(page_content)
+
+        with mock_confluence_instance(config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, {
+                'results': [
+                    self.std_space_connect_rsp,
+                ],
+            })
+
+            publisher.init(config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # prepare response for a page fetch
+            expected_page_id = '4821'
+            daemon.register_get_rsp(200, {
+                'results': [
+                    {
+                        'id': expected_page_id,
+                        'title': 'mock page',
+                        'version': {
+                            'number': page_version,
+                        },
+                    },
+                ],
+            })
+
+            # prepare response for properties fetch
+            daemon.register_get_rsp(200, {
+                'results': [
+                    {
+                        'id': '1234',
+                        'key': CB_PROP_KEY,
+                        'value': {
+                            'hash': f'{page_hash}{page_version}',
+                        },
+                        'version': {
+                            'number': 1,
+                        },
+                    },
+                ],
+            })
+
+            page_id, is_new = publisher.store_page('mock page', {
+                'content': page_content,
+            })
+            self.assertEqual(page_id, expected_page_id)
+            self.assertFalse(is_new)
+
+            # verify the page fetch
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+            req_path, _ = fetch_req
+            self.assertTrue(req_path.startswith('/api/v2/pages?'))
+
+            # verify the properties fetch
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+            req_path, _ = fetch_req
+            self.assertTrue(req_path.startswith(
+                f'/api/v2/pages/{expected_page_id}/properties?'))
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_properties_partial_pages_v2(self):
+        """validate publisher fetches page properties over partial pages"""
+
+        config = prepare_conf_publisher()
+        config.confluence_api_mode = 'v2'
+
+        # emulate an instance which returns less results than requested for
+        # each page of properties
+        with patch('tests.lib.emulator.MAX_LIMIT', 2), \
+                mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            properties = {f'dummy-{idx}': idx for idx in range(4)}
+            properties['editor'] = 'v2'
+            properties[CB_PROP_KEY] = {'hash': 'dummy'}
+            emulator.add_page('mock page', properties=properties)
+
+            publisher.init(config)
+            publisher.connect()
+
+            _, page = publisher.get_page('mock page', expand=','.join([
+                'version',
+                'metadata.properties.editor',
+                f'metadata.properties.{CB_PROP_KEY}',
+            ]))
+
+            props = page['metadata']['properties']
+            self.assertEqual(props['editor']['value'], 'v2')
+            self.assertEqual(props[CB_PROP_KEY]['value'], {'hash': 'dummy'})
@@ -0,0 +1,194 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import mock_confluence_instance
+from tests.lib import prepare_conf_publisher
+from tests.lib.emulator import mock_confluence_emulator
+from unittest.mock import patch
+from urllib.parse import unquote_plus
+import unittest
+
+
+class TestConfluencePublisherPageIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = prepare_conf_publisher()
+        cls.config.confluence_space_key = 'MOCK'
+
+        cls.std_space_connect_rsp = {
+            'id': 1,
+            'key': 'MOCK',
+            'name': 'Mock Space',
+            'type': 'global',
+        }
+
+        cls.std_index_rsp = {
+            'results': [
+                {
+                    'id': '1001',
+                    'title': 'Existing Page',
+                    'status': 'current',
+                    'version': {
+                        'number': 3,
+                    },
+                    'ancestors': [
+                        {
+                            'id': '1000',
+                        },
+                    ],
+                },
+                {
+                    'id': '1002',
+                    'title': 'Archived Page',
+                    'status': 'archived',
+                    'version': {
+                        'number': 1,
+                    },
+                    'ancestors': [],
+                },
+            ],
+            'size': 2,
+        }
+
+    def test_publisher_page_index_build(self):
+        """validate publisher can build a page index"""
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.register_get_rsp(200, self.std_index_rsp)
+
+            total = publisher.build_page_index()
+            self.assertEqual(total, 2)
+
+            # verify a space-wide search including archived pages was made
+            index_req = daemon.pop_get_request()
+            self.assertIsNotNone(index_req)
+            req_path, _ = index_req
+            req_path = unquote_plus(req_path)
+            self.assertTrue(req_path.startswith('/rest/api/content/search?'))
+            self.assertIn('space="MOCK" and type=page', req_path)
+            self.assertIn('archived', req_path)
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_index_partial_pages(self):
+        """validate publisher builds a page index over partial pages"""
+
+        for api_mode in ('v1', 'v2'):
+            config = prepare_conf_publisher()
+            config.confluence_api_mode = api_mode
+
+            # emulate an instance which returns less results than requested
+            # for each page of results
+            with self.subTest(api_mode=api_mode), \
+                    patch('tests.lib.emulator.MAX_LIMIT', 2), \
+                    mock_confluence_emulator(config) as emulator, \
+                    autocleanup_publisher(ConfluencePublisher) as publisher:
+                for idx in range(3):
+                    emulator.add_page(f'current-{idx}')
+                    emulator.add_page(f'archived-{idx}', status='archived')
+
+                publisher.init(config)
+                publisher.connect()
+
+                total = publisher.build_page_index()
+                self.assertEqual(total, 6)
+
+    def test_publisher_page_index_lookup(self):
+        """validate publisher page lookups use a page index"""
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.register_get_rsp(200, self.std_index_rsp)
+            publisher.build_page_index()
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            # pages not in the index are not queried for
+            page_id, page = publisher.get_page('Missing Page')
+            self.assertIsNone(page_id)
+            self.assertIsNone(page)
+
+            page_id, page = publisher.get_page('Existing Page',
+                status='archived')
+            self.assertIsNone(page_id)
+            self.assertIsNone(page)
+
+            page_id, page = publisher.get_page_case_insensitive('missing page')
+            self.assertIsNone(page_id)
+            self.assertIsNone(page)
+
+            daemon.check_unhandled_requests()
+
+            # pages in the index are still queried for
+            daemon.register_get_rsp(200, {
+                'results': [
+                    {
+                        'id': '1001',
+                        'title': 'Existing Page',
+                        'type': 'page',
+                        'version': {
+                            'number': 3,
+                        },
+                    },
+                ],
+                'size': 1,
+            })
+
+            page_id, page = publisher.get_page_case_insensitive('existing page')
+            self.assertEqual(page_id, '1001')
+            self.assertIsNotNone(page)
+
+            fetch_req = daemon.pop_get_request()
+            self.assertIsNotNone(fetch_req)
+            req_path, _ = fetch_req
+            self.assertIn('Existing+Page', req_path)
+
+            daemon.check_unhandled_requests()
+
+    def test_publisher_page_index_store_page_dryrun(self):
+        """validate publisher does not lookup new pages with a page index"""
+
+        config = self.config.clone()
+        config.confluence_publish_dryrun = True
+
+        with mock_confluence_instance(config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.register_get_rsp(200, self.std_index_rsp)
+            publisher.build_page_index()
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            page_id, is_new = publisher.store_page('New Page', {
+                'content': 'dummy page data',
+            })
+            self.assertIsNone(page_id)
+            self.assertTrue(is_new)
+
+            # verify that no other request was made
+            daemon.check_unhandled_requests()
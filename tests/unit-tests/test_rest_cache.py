@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.cache import ResponseCache
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from tests.lib import autocleanup_publisher
+from tests.lib import mock_confluence_instance
+from tests.lib import prepare_conf_publisher
+import threading
+import time
+import unittest
+
+
+class TestRestCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = prepare_conf_publisher()
+        cls.config.confluence_publish_cache_ttl = 60
+        cls.config.confluence_space_key = 'MOCK'
+
+        cls.std_space_connect_rsp = {
+            'id': 1,
+            'key': 'MOCK',
+            'name': 'Mock Space',
+            'type': 'global',
+        }
+
+        cls.std_page_rsp = {
+            'id': '1234',
+            'title': 'mock page',
+            'type': 'page',
+            'version': {
+                'number': 2,
+            },
+        }
+
+    def test_rest_cache_invalidate(self):
+        """validate cached responses are invalidated on modifications"""
+
+        with mock_confluence_instance(self.config) as daemon, \
+                autocleanup_publisher(ConfluencePublisher) as publisher:
+            daemon.register_get_rsp(200, self.std_space_connect_rsp)
+
+            publisher.init(self.config)
+            publisher.connect()
+
+            # consume connect request
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.register_get_rsp(200, self.std_page_rsp)
+
+            # repeated requests for a page only fetch once
+            _, page = publisher.get_page_by_id('1234')
+            self.assertEqual(page['title'], 'mock page')
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            page['title'] = 'modified'
+            _, page = publisher.get_page_by_id('1234')
+            self.assertEqual(page['title'], 'mock page')
+
+            daemon.check_unhandled_requests()
+
+            # modifying the page invalidates the cached page
+            daemon.register_delete_rsp(200)
+            publisher.remove_page('1234')
+            self.assertIsNotNone(daemon.pop_delete_request())
+
+            daemon.register_get_rsp(200, self.std_page_rsp)
+            publisher.get_page_by_id('1234')
+            self.assertIsNotNone(daemon.pop_get_request())
+
+            daemon.check_unhandled_requests()
+
+    def test_rest_cache_revalidate(self):
+        """validate expired responses are revalidated with an etag"""
+
+        cache = ResponseCache(0)
+        etags = []
+
+        def request(etag):
+            etags.append(etag)
+            if etag:
+                return None, etag, True
+            return {'value': 1}, '"v1"', False
+
+        data = cache.fetch('key', 'content/1', request)
+        self.assertEqual(data, {'value': 1})
+
+        data = cache.fetch('key', 'content/1', request)
+        self.assertEqual(data, {'value': 1})
+        self.assertEqual(etags, [None, '"v1"'])
+
+    def test_rest_cache_single_flight(self):
+        """validate concurrent requests share a single request"""
+
+        cache = ResponseCache(60)
+        calls = []
+        results = []
+
+        def request(etag):
+            calls.append(etag)
+            time.sleep(0.1)
+            return {'value': 1}, None, False
+
+        def fetch():
+            results.append(cache.fetch('key', 'content/1', request))
+
+        threads = [threading.Thread(target=fetch) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 4)
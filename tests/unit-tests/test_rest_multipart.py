@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.multipart import MultipartStream
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from unittest.mock import patch
+import requests
+import unittest
+
+
+class TestRestMultipart(unittest.TestCase):
+    def test_rest_multipart_encoding(self):
+        fields = {
+            'comment': 'SCB_KEY:0123456789abcdef',
+            'minorEdit': 'true',
+        }
+
+        with temp_dir() as tmp_dir:
+            asset = tmp_dir / 'asset.bin'
+            asset.write_bytes(bytes(range(256)) * 1024)
+
+            stream = MultipartStream(fields, {
+                'file': ('image "01".png', asset, 'image/png'),
+            })
+
+            # build the same body using requests' multipart encoding
+            with patch('urllib3.filepost.choose_boundary',
+                    return_value=stream.boundary):
+                req = requests.Request('POST', 'https://example.com/',
+                    data=fields, files={
+                        'file': ('image "01".png', asset.read_bytes(),
+                            'image/png'),
+                    }).prepare()
+
+            self.assertEqual(stream.content_type, req.headers['Content-Type'])
+            self.assertEqual(len(stream), len(req.body))
+
+            # read in small chunks to verify chunk boundaries
+            body = b''
+            while chunk := stream.read(1000):
+                self.assertLessEqual(len(chunk), 1000)
+                body += chunk
+            stream.close()
+
+            self.assertEqual(body, req.body)
+
+    def test_rest_multipart_stream(self):
+        with temp_dir() as tmp_dir:
+            asset = tmp_dir / 'asset.bin'
+            asset.write_bytes(b'0123456789' * 100000)
+
+            stream = MultipartStream(files={
+                'file': ('asset.bin', asset, 'application/octet-stream'),
+            })
+
+            # body is provided in bounded chunks when iterated
+            chunks = list(stream)
+            self.assertGreater(len(chunks), 1)
+            self.assertEqual(sum(len(x) for x in chunks), len(stream))
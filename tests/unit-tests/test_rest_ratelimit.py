@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.ratelimit import MAX_RATE
+from sphinxcontrib.confluencebuilder.ratelimit import MIN_RATE
+from sphinxcontrib.confluencebuilder.ratelimit import RateGovernor
+import unittest
+
+
+class TestRestRateLimit(unittest.TestCase):
+    def test_rest_ratelimit_default(self):
+        governor = RateGovernor()
+        self.assertIsNone(governor.rate)
+
+        # an unlimited governor never delays requests
+        for _ in range(10):
+            self.assertEqual(governor.acquire(), 0)
+
+        self.assertEqual(governor.pending(), 0)
+
+    def test_rest_ratelimit_near_limit(self):
+        governor = RateGovernor()
+
+        # no throttling if not near a limit
+        governor.observe({
+            'X-RateLimit-Limit': '100',
+            'X-RateLimit-Remaining': '90',
+        })
+        self.assertIsNone(governor.rate)
+
+        # remaining requests spread over the remaining reset window
+        governor.observe({
+            'X-RateLimit-Limit': '100',
+            'X-RateLimit-Remaining': '10',
+            'X-RateLimit-Reset': '20',
+        })
+        self.assertIsNotNone(governor.rate)
+        self.assertAlmostEqual(governor.rate, 0.5, places=1)
+
+        # a near-limit flag (without reset details) eases off the rate
+        rate = governor.rate
+        governor.observe({
+            'X-RateLimit-NearLimit': 'true',
+        })
+        self.assertLess(governor.rate, rate)
+
+    def test_rest_ratelimit_pause(self):
+        governor = RateGovernor()
+
+        governor.pause(5)
+        self.assertGreater(governor.pending(), 4)
+
+        # a shorter pause does not reduce an active pause
+        governor.pause(1)
+        self.assertGreater(governor.pending(), 4)
+
+        # requests wait for an active pause to complete
+        governor = RateGovernor()
+        governor.pause(0.2)
+        self.assertGreater(governor.acquire(), 0)
+        self.assertEqual(governor.pending(), 0)
+
+    def test_rest_ratelimit_throttle(self):
+        governor = RateGovernor()
+
+        governor.throttle()
+        rate = governor.rate
+        self.assertIsNotNone(rate)
+
+        # throttling never drops below a minimum rate
+        for _ in range(20):
+            governor.throttle()
+        self.assertEqual(governor.rate, MIN_RATE)
+
+        # successful requests slowly recover until unlimited
+        governor.recover()
+        self.assertGreater(governor.rate, MIN_RATE)
+
+        for _ in range(int(MAX_RATE / 0.05) + 1):
+            governor.recover()
+        self.assertIsNone(governor.rate)
@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.trace import ConfluenceTrace
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import prepare_dirs
+from tests.lib.emulator import mock_confluence_emulator
+from tests.lib.generator import generate_project
+from tests.lib.testcase import ConfluenceTestCase
+import json
+import time
+
+
+class TestConfluenceTrace(ConfluenceTestCase):
+    def test_trace_disabled(self):
+        trace = ConfluenceTrace()
+
+        trace.add('span', 'test', time.perf_counter(), 0)
+
+        self.assertEqual(trace.events, [])
+
+    def test_trace_publish(self):
+        config = self.config.clone()
+        config['confluence_parent_page'] = 'Docs'
+        config['confluence_publish'] = True
+        config['confluence_publish_debug'] = 'trace'
+        config['confluence_publish_retry_duration'] = 1
+        config['confluence_publish_workers'] = 2
+        out_dir = prepare_dirs()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as src_dir:
+            emulator.add_page('Docs')
+            generate_project(src_dir, 5)
+
+            emulator.inject(500)
+
+            self.build(src_dir, config=config, out_dir=out_dir)
+            total_requests = emulator.total_requests
+
+        self.assertFalse((out_dir / 'scb-metrics.json').exists())
+
+        trace_path = out_dir / 'scb-trace.json'
+        with trace_path.open(encoding='utf-8') as f:
+            data = json.load(f)
+
+        events = data['traceEvents']
+        spans = [e for e in events if e['ph'] == 'X']
+        threads = {e['tid'] for e in events if e['ph'] == 'M'}
+
+        for span in spans:
+            self.assertIn(span['tid'], threads)
+            self.assertGreaterEqual(span['dur'], 0)
+
+        def find(category, name=None):
+            return [e for e in spans
+                if e['cat'] == category and (not name or e['name'] == name)]
+
+        # phases, with per-document spans
+        self.assertTrue(find('phase', 'prepare_writing'))
+        self.assertCountEqual([e['args']['docname']
+            for e in find('phase', 'write_doc')], [
+                'doc-00001', 'doc-00002', 'doc-00003', 'doc-00004', 'index',
+            ])
+
+        # requests
+        requests = find('request')
+        self.assertEqual(len(requests), total_requests)
+        self.assertIn(500, [e['args']['status'] for e in requests])
+
+        # retry waits from the injected failure
+        self.assertEqual(len(find('wait', 'retry wait')), 1)
@@ -1,11 +1,26 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright Sphinx Confluence Builder Contributors (AUTHORS)
 
+from hashlib import sha256
 from sphinxcontrib.confluencebuilder.util import ConfluenceUtil
+from sphinxcontrib.confluencebuilder.util import temp_dir
 import unittest
 
 
 class TestConfluenceUtil(unittest.TestCase):
+    def test_util_hash_asset(self):
+        with temp_dir() as tmp_dir:
+            empty_file = tmp_dir / 'empty'
+            empty_file.write_bytes(b'')
+
+            data_file = tmp_dir / 'data'
+            data_file.write_bytes(b'0123456789' * 10000)
+
+            self.assertEqual(ConfluenceUtil.hash_asset(empty_file),
+                sha256(b'').hexdigest())
+            self.assertEqual(ConfluenceUtil.hash_asset(data_file),
+                sha256(b'0123456789' * 10000).hexdigest())
+
     def test_util_normalize_baseurl(self):
         data = {
 'https://example.atlassian.net/wiki':             'https://example.atlassian.net/wiki/',
@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright Sphinx Confluence Builder Contributors (AUTHORS)
+
+from sphinxcontrib.confluencebuilder.__main__ import main
+from sphinxcontrib.confluencebuilder.cmd.wipe import WIPE_PLAN_FILENAME
+from sphinxcontrib.confluencebuilder.cmd.wipe import discover_wipe_plan
+from sphinxcontrib.confluencebuilder.cmd.wipe import load_wipe_plan
+from sphinxcontrib.confluencebuilder.cmd.wipe import wipe_pages
+from sphinxcontrib.confluencebuilder.cmd.wipe import write_wipe_plan
+from sphinxcontrib.confluencebuilder.exceptions import ConfluenceBadApiError
+from sphinxcontrib.confluencebuilder.logger import ConfluenceLogger
+from sphinxcontrib.confluencebuilder.publisher import ConfluencePublisher
+from sphinxcontrib.confluencebuilder.util import temp_dir
+from tests.lib import autocleanup_publisher
+from tests.lib import prepare_conf_publisher
+from tests.lib.emulator import mock_confluence_emulator
+from unittest.mock import patch
+import sys
+import unittest
+
+
+# module of the wipe command
+WIPE_MODULE = 'sphinxcontrib.confluencebuilder.cmd.wipe'
+
+
+class TestWipe(unittest.TestCase):
+    def test_wipe_plan(self):
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config) as emulator, \
+                autocleanup_publisher(ConfluencePublisher) as publisher, \
+                temp_dir() as work_dir:
+            root_id = emulator.add_page('root')
+            parents = {}
+            for idx in range(3):
+                child_id = emulator.add_page(f'child-{idx}', parent=root_id)
+                parents[child_id] = root_id
+                for sub_idx in range(2):
+                    parents[emulator.add_page(f'child-{idx}-{sub_idx}',
+                        parent=child_id)] = child_id
+
+            publisher.init(config)
+            publisher.connect()
+
+            plan = discover_wipe_plan(publisher, None)
+            self.assertEqual(len(plan['pages']), len(parents) + 1)
+            self.assertEqual(plan['pages'][root_id], {
+                'parent': None,
+                'title': 'root',
+            })
+            for page_id, parent_id in parents.items():
+                self.assertEqual(plan['pages'][page_id]['parent'], parent_id)
+
+            plan_path = work_dir / 'plan.json'
+            write_wipe_plan(plan_path, plan)
+
+            # interrupt a wipe after removing a page
+            def interrupt(removed, total):
+                raise KeyboardInterrupt
+
+            with self.assertRaises(KeyboardInterrupt):
+                wipe_pages(publisher, plan, 1, plan_path=plan_path,
+                    progress=interrupt)
+
+            # a resumed plan only tracks the remaining pages
+            plan = load_wipe_plan(plan_path)
+            self.assertEqual(len(plan['removed']), 1)
+
+            # leaf pages are removed before their parents
+            failed_id = next(iter(parents))
+            ordered = []
+            remove_page = ConfluencePublisher.remove_page
+
+            def tracked_remove_page(publisher, page_id):
+                if page_id == failed_id:
+                    raise ConfluenceBadApiError(409, 'conflict')
+                remove_page(publisher, page_id)
+                ordered.append(page_id)
+
+            with patch.object(ConfluencePublisher, 'remove_page',
+                    tracked_remove_page):
+                failures = wipe_pages(publisher, plan, 3, plan_path=plan_path)
+
+            self.assertEqual([page_id for page_id, _ in failures], [failed_id])
+            self.assertEqual(len(ordered), len(parents) - 1)
+            for page_id, parent_id in parents.items():
+                if page_id in ordered and parent_id in ordered:
+                    self.assertLess(ordered.index(page_id),
+                        ordered.index(parent_id))
+
+            self.assertEqual(emulator.pages(), ['child-0'])
+
+            # only the failed page remains to be removed
+            plan = load_wipe_plan(plan_path)
+            self.assertEqual(set(plan['pages']) - plan['removed'], {failed_id})
+
+    def test_wipe_plan_invalid(self):
+        with temp_dir() as work_dir:
+            plan_path = work_dir / 'plan.json'
+            self.assertIsNone(load_wipe_plan(plan_path))
+
+            plan_path.write_text('{"type": "unknown"}\n')
+            self.assertIsNone(load_wipe_plan(plan_path))
+
+    def test_wipe_main(self):
+        config = prepare_conf_publisher()
+
+        with mock_confluence_emulator(config) as emulator, \
+                temp_dir() as work_dir, \
+                patch(f'{WIPE_MODULE}.ask_question', return_value=True), \
+                patch.object(ConfluenceLogger, 'warn') as warn:
+            root_id = emulator.add_page('root')
+            failed_id = emulator.add_page('child', parent=root_id)
+
+            (work_dir / 'conf.py').write_text(f"""
+extensions = ['sphinxcontrib.confluencebuilder']
+confluence_publish = True
+confluence_server_url = '{config.confluence_server_url}'
+confluence_space_key = '{config.confluence_space_key}'
+""")
+            (work_dir / 'index.rst').write_text('index\n=====\n')
+
+            argv = ['scb', 'wipe', '--danger', '--work-dir', str(work_dir)]
+            plan_path = work_dir / '_build' / 'confluence' / WIPE_PLAN_FILENAME
+
+            # a failed wipe reports the failed page and keeps its plan in
+            # the output directory
+            remove_page = ConfluencePublisher.remove_page
+
+            def failing_remove_page(publisher, page_id):
+                if page_id == failed_id:
+                    raise ConfluenceBadApiError(409, 'conflict')
+                remove_page(publisher, page_id)
+
+            with patch.object(sys, 'argv', argv), \
+                    patch.object(ConfluencePublisher, 'remove_page',
+                        failing_remove_page):
+                self.assertEqual(main(), 1)
+
+            self.assertTrue(plan_path.is_file())
+            self.assertFalse((work_dir / WIPE_PLAN_FILENAME).exists())
+            self.assertTrue(any(failed_id in c.args[0]
+                for c in warn.call_args_list))
+            self.assertEqual(emulator.pages(), ['child'])
+
+            # a resumed wipe which completes removes its plan
+            with patch.object(sys, 'argv', [*argv, '--resume', str(plan_path)]):
+                self.assertEqual(main(), 0)
+
+            self.assertFalse(plan_path.exists())
+            self.assertEqual(emulator.pages(), [])